@@ -0,0 +1,61 @@
+import os
+import logging
+import torch
+import torch.nn as nn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# torch 기반 TSRNet 추론 방식 (선택은 aiModels.registry.TSRNET_BACKEND)
+#   eager       : 기존 PyTorch 모듈 그대로 실행
+#   torchscript : torch.jit.trace + freeze 로 그래프 최적화
+#   quantized   : Linear 계층 동적 int8 양자화 후 torchscript
+TSRNET_BACKENDS = ("eager", "torchscript", "quantized")
+
+# torch 스레드 수 (설정하지 않거나 0 이면 torch 기본값을 그대로 사용)
+# 연결이 많아 여러 추론이 동시에 실행되면 1 로 설정해 코어 과점유를 줄일 수 있지만,
+# 한 번의 추론은 느려지므로 python -m benchmarks.tsrnet_backend 로 확인한 뒤 설정한다.
+TORCH_INTRA_OP_THREADS = int(os.getenv("TORCH_INTRA_OP_THREADS", 0))
+TORCH_INTER_OP_THREADS = int(os.getenv("TORCH_INTER_OP_THREADS", 0))
+
+_threads_configured = False
+
+def configure_torch_threads(intra_op: int = TORCH_INTRA_OP_THREADS, inter_op: int = TORCH_INTER_OP_THREADS) -> None:
+    global _threads_configured
+    if _threads_configured:
+        return
+    if intra_op > 0:
+        torch.set_num_threads(intra_op)
+    if inter_op > 0:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            # 이미 병렬 작업이 실행된 뒤에는 변경할 수 없음
+            logger.warning("Inter-op thread count could not be changed after torch started parallel work")
+    _threads_configured = True
+
+def quantize_tsrnet(model: nn.Module) -> nn.Module:
+    # 동적 양자화는 Linear 계층만 지원 (Conv 계층은 정적 양자화와 보정 데이터가 필요)
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def trace_tsrnet(model: nn.Module, example_inputs) -> torch.jit.ScriptModule:
+    with torch.inference_mode(False), torch.no_grad():
+        traced = torch.jit.trace(model, example_inputs, check_trace=False)
+        traced = torch.jit.freeze(traced.eval())
+    return traced
+
+def build_tsrnet_backend(model: nn.Module, backend: str, example_inputs) -> nn.Module:
+    """
+    eval 상태의 TSRNet을 지정한 추론 방식으로 변환한다.
+    반환된 모듈은 TSRNet.forward 와 같은 입력/출력 형식을 가진다.
+    """
+    if backend not in TSRNET_BACKENDS:
+        raise ValueError(f"Unknown TSRNET_BACKEND: {backend}")
+    model.eval()
+    if backend == "eager":
+        return model
+    if backend == "quantized":
+        model = quantize_tsrnet(model)
+    return trace_tsrnet(model, example_inputs)
@@ -1,7 +1,10 @@
-import pandas as pd
+import math
 import numpy as np
 import pickle
 
+# KMeans 입력 특성 : IMU 6채널의 평균 + 표준편차(ddof=1, pandas 기본값)
+IMU_CHANNELS = ['ax', 'ay', 'az', 'gx', 'gy', 'gz']
+
 # 운동 수치 계산 함수
 # 여기서는 0: 수면, 1: 중간 강도, 2: 높은 강도, 3: 낮은 강도로 분류.
 # 운동 수치 계산할때만 이렇게 하고, 출력할때는 숫자 순으로 출력되도록 하는 'cluster_mapping' 변수가 있음.
@@ -10,30 +13,129 @@ def calculate_activity(cluster, duration, dog_weight):
     intensity_scores = {0: 1, 1: 6, 2: 10, 3: 3}
     return round(intensity_scores[cluster] * dog_weight * duration, 4)
 
-# dog_weight(강아지 몸무게)는 DB에서 가져와야함.
-def process_data(batch_data, model_path, dog_weight=20):
-    # 모델 로드
-    with open(model_path, 'rb') as file:
-        kmeans = pickle.load(file)
-    
-    # 데이터 프레임 생성
-    data = pd.DataFrame(batch_data, columns=['timestamp', 'ax', 'ay', 'az', 'bcg', 'gx', 'gy', 'gz','temperature'])
+# calculate_activity / cluster_mapping 의 배열 버전 (인덱스 = KMeans 클러스터)
+INTENSITY_SCORES = np.array([1, 6, 10, 3])
+CLUSTER_MAPPING = np.array([0, 2, 3, 1])
 
-    # 특성 계산
-    features = np.hstack([data[['ax', 'ay', 'az', 'gx', 'gy', 'gz']].mean(), data[['ax', 'ay', 'az', 'gx', 'gy', 'gz']].std()])
-    features_reshaped = features.reshape(1, -1)
-    
-    # 클러스터링 수행
-    cluster = kmeans.predict(features_reshaped)[0]
+# 한 window(560 샘플)의 운동 시간 (h 단위)
+WINDOW_DURATION = 5.6 / 60
+
+def calculate_activity_batch(clusters, duration, dog_weight):
+    """
+    calculate_activity 의 배열 버전. dog_weight는 스칼라 또는 clusters와 같은 길이의 배열.
+    """
+    scores = INTENSITY_SCORES[clusters] * np.asarray(dog_weight) * duration
+    # round()와 같은 결과를 위해 원소마다 파이썬 round 적용 (np.round는 마지막 자리가 다를 수 있음)
+    return np.array([round(score, 4) for score in scores.tolist()])
+
+def extract_features(batch_data):
+    """
+    batch_data : 채널별 배열 dict (1차원 (samples,) 또는 2차원 (windows, samples))
+    반환 : (windows, 12) 특성 행렬 - process_data 의 pandas 계산과 같은 값
+    """
+    imu = np.stack([np.asarray(batch_data[name], dtype=np.float64) for name in IMU_CHANNELS], axis=-1)
+    imu = imu.reshape(-1, *imu.shape[-2:])  # (windows, samples, 6)
+    return np.concatenate([imu.mean(axis=1), imu.std(axis=1, ddof=1)], axis=1)
+
+class RunningImuStats:
+    """
+    기기(연결) 하나에 대한 이동 window IMU 특성 누적기.
+
+    window를 hop 크기의 블록(hop이 window를 나누지 않으면 gcd 크기)으로 나누어
+    블록별 (평균, 편차 제곱합)만 보관하고, 새 hop이 들어오면 새 블록만 계산한 뒤
+    블록 통계를 병합(Welford/Chan)하여 window 전체 평균과 표준편차(ddof=1)를 만든다.
+    이미 본 샘플은 다시 읽지 않으므로 hop을 줄여도(예: 100 샘플 = 1초) 계산량이 window 크기에 비례해 늘지 않는다.
+    결과는 extract_features 와 부동소수 오차 범위에서 같다.
+    """
+    def __init__(self, window_size=560, hop_size=280):
+        self.window_size = window_size
+        self.hop_size = hop_size
+        self.block_size = math.gcd(window_size, hop_size)
+        self.block_count = window_size // self.block_size
+        # (채널, 블록) 형태로 블록별 평균과 편차 제곱합을 원형으로 보관
+        self.means = np.zeros((len(IMU_CHANNELS), self.block_count))
+        self.m2s = np.zeros((len(IMU_CHANNELS), self.block_count))
+        self.filled = 0
+        self.next_block = 0
 
-    # 운동 수치 계산
-    # duration은 h 단위로 전환
-    duration = 5.6 / 60
-    activity_score = calculate_activity(cluster, duration, dog_weight)
+    def reset(self) -> None:
+        self.filled = 0
+        self.next_block = 0
 
-    # 클러스터 매핑
-    # 0: 수면, 1: 낮은 강도, 2: 중간 강도, 3: 높은 강도로 바꿔서 출력되도록.
-    cluster_mapping = {0: 0, 3: 1, 1: 2, 2: 3}
-    mapped_cluster = cluster_mapping[cluster]
+    def push(self, samples) -> None:
+        """
+        samples : 채널별 1차원 배열 dict, 길이는 block_size의 배수
+        """
+        imu = np.array([samples[name] for name in IMU_CHANNELS], dtype=np.float64)[:, -self.window_size:]
+        if imu.shape[1] % self.block_size:
+            raise ValueError(f"Sample count must be a multiple of {self.block_size}")
+        blocks = imu.reshape(len(IMU_CHANNELS), -1, self.block_size)
+        means = blocks.mean(axis=2)
+        m2s = np.square(blocks - means[:, :, None]).sum(axis=2)
+
+        for i in range(blocks.shape[1]):
+            self.means[:, self.next_block] = means[:, i]
+            self.m2s[:, self.next_block] = m2s[:, i]
+            self.next_block = (self.next_block + 1) % self.block_count
+        self.filled = min(self.filled + blocks.shape[1], self.block_count)
+
+    def features(self) -> np.ndarray:
+        """
+        현재 window의 (1, 12) 특성 (extract_features 형식)
+        """
+        if self.filled < self.block_count:
+            raise ValueError("Window is not filled yet")
+        # 크기가 같은 블록의 병합 : M2 = sum(M2_k) + n_b * sum((mean_k - mean)^2)
+        mean = self.means.mean(axis=1)
+        m2 = self.m2s.sum(axis=1) + self.block_size * np.square(self.means - mean[:, None]).sum(axis=1)
+        std = np.sqrt(m2 / (self.window_size - 1))
+        return np.concatenate([mean, std])[None, :]
+
+    def update(self, window) -> np.ndarray:
+        """
+        SensorRingBuffer.window() 처럼 hop_size 씩 이동한 연속 window를 넣으면
+        처음에는 window 전체를, 이후에는 마지막 hop_size 샘플만 반영해 특성을 반환한다.
+        """
+        if self.filled < self.block_count:
+            self.push(window)
+        else:
+            self.push({name: window[name][-self.hop_size:] for name in IMU_CHANNELS})
+        return self.features()
+
+def predict_clusters(features, centers):
+    """
+    학습된 KMeans 중심으로 가장 가까운 클러스터를 찾는다.
+    sklearn KMeans.predict 와 같은 식(|c|^2 - 2 x.c, 같은 값이면 작은 인덱스)을 사용하므로 결과가 같다.
+    """
+    features = np.ascontiguousarray(features, dtype=np.float64)
+    centers = np.asarray(centers, dtype=np.float64)
+    distances = np.einsum('ij,ij->i', centers, centers) - 2 * (features @ centers.T)
+    return distances.argmin(axis=1)
+
+def process_data_batch(batch_data, kmeans, dog_weight=20, features=None):
+    """
+    여러 window를 한 번에 분류한다. batch_data의 각 채널은 (windows, samples) 배열.
+    features : 이미 계산된 특성 (예: RunningImuStats), 없으면 batch_data에서 계산
+    반환 : (시작 시간, 종료 시간, 매핑된 클러스터, 운동 수치) 배열
+    """
+    timestamps = np.atleast_2d(batch_data['timestamp'])
+    if features is None:
+        features = extract_features(batch_data)
+    clusters = predict_clusters(features, kmeans.cluster_centers_)
+    activity_scores = calculate_activity_batch(clusters, WINDOW_DURATION, dog_weight)
+    return timestamps[:, 0], timestamps[:, -1], CLUSTER_MAPPING[clusters], activity_scores
+
+# dog_weight(강아지 몸무게)는 DB에서 가져와야함.
+# kmeans : 이미 로드된 모델 (aiModels.registry), 없으면 model_path에서 로드
+# features : RunningImuStats 로 누적 계산한 특성 (없으면 batch_data에서 계산)
+def process_data(batch_data, model_path, dog_weight=20, kmeans=None, features=None):
+    # 모델 로드
+    if kmeans is None:
+        with open(model_path, 'rb') as file:
+            kmeans = pickle.load(file)
+    
+    # 특성 계산 및 클러스터링 수행 (pandas 없이 NumPy로 계산)
+    start_times, end_times, mapped_clusters, activity_scores = process_data_batch(batch_data, kmeans, dog_weight, features)
 
-    return data['timestamp'].iloc[0], data['timestamp'].iloc[-1], mapped_cluster, activity_score
\ No newline at end of file
+    # 0: 수면, 1: 낮은 강도, 2: 중간 강도, 3: 높은 강도로 바꿔서 출력되도록 매핑됨 (CLUSTER_MAPPING)
+    return start_times[0], end_times[0], int(mapped_clusters[0]), float(activity_scores[0])
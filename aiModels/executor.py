@@ -0,0 +1,90 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dotenv import load_dotenv
+from aiModels.registry import registry, get_tsrnet_batch
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 분석 실행 방식 : thread(기본) / process
+MODEL_EXECUTOR = os.getenv("MODEL_EXECUTOR", "thread").lower()
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", os.cpu_count() or 1))
+# 동시에 실행(대기 포함)될 수 있는 분석 작업 수
+MODEL_MAX_INFLIGHT = int(os.getenv("MODEL_MAX_INFLIGHT", MODEL_WORKERS * 2))
+
+# 이상치 판단 기준 (TSRNet 복원 오차)
+ANOMALY_THRESHOLD = 0.05
+
+def analyze_window(inputSequence, time, bcg, dog_weight, activity_stats=None):
+    """
+    한 window에 대해 process_data -> preprocess_data 를 실행한다.
+    수면 중(cluster 0, 1)이면 TSRNet 입력(time_instance, spec_instance)도 함께 반환하며,
+    이상치 탐지는 여러 기기를 모아 aiModels.scheduler 에서 배치로 실행한다.
+    activity_stats(RunningImuStats)가 있으면 새 hop 샘플만으로 활동 특성을 갱신하고,
+    프로세스 워커에서도 상태가 유지되도록 갱신된 activity_stats를 함께 반환한다.
+    워커(스레드/프로세스)에서 실행되므로 DB나 websocket에 접근하지 않는다.
+    """
+    # 분석 모듈(pandas, scipy, pywt)은 처음 분석할 때 워커에서 import (REST 요청만 처리하는 서버의 시작 시간 단축)
+    from aiModels.dongukKim import process_data
+    from aiModels.yeinOh import preprocess_data
+
+    # 모델 로직 - 동욱님 코드
+    features = activity_stats.update(inputSequence) if activity_stats is not None else None
+    _, _, cluster, excerciseNum = process_data(inputSequence, registry.kmeans_path, dog_weight, kmeans=registry.kmeans, features=features)
+    run_model = (cluster == 0 or cluster == 1)
+
+    # 전처리 - 예인님 코드
+    bpm_h, bpm_r, combined_matrix_for_s, time_instance, spec_instance = preprocess_data(time, bcg, run_model=run_model)
+
+    return cluster, excerciseNum, bpm_h, bpm_r, combined_matrix_for_s, time_instance, spec_instance, activity_stats
+
+def detect_anomalies(time_instances, spec_instances, threshold=ANOMALY_THRESHOLD):
+    # 모델 함수 (수면 중일 때 이상치 탐지) - 예인님 코드
+    return get_tsrnet_batch(registry.tsrnet_backend)(registry.tsrnet, time_instances, spec_instances, threshold)
+
+def _init_process_worker():
+    # 프로세스 워커마다 모델을 한 번 로드
+    registry.load()
+
+class AnalysisExecutor:
+    def __init__(self, mode: str = MODEL_EXECUTOR, workers: int = MODEL_WORKERS, max_inflight: int = MODEL_MAX_INFLIGHT):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown MODEL_EXECUTOR: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.max_inflight = max_inflight
+        self._pool = None
+        self._semaphore = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process_worker)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analysis")
+            logger.info(f"Analysis executor started ({self.mode}, workers={self.workers}, max_inflight={self.max_inflight})")
+        return self._pool
+
+    async def run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_inflight)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, func, *args)
+
+    async def analyze(self, inputSequence, time, bcg, dog_weight, activity_stats=None):
+        return await self.run(analyze_window, inputSequence, time, bcg, dog_weight, activity_stats)
+
+    async def detect_anomalies(self, time_instances, spec_instances):
+        return await self.run(detect_anomalies, time_instances, spec_instances)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+executor = AnalysisExecutor()
@@ -0,0 +1,188 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# torch 없이 TSRNet.forward(eval 모드)를 실행하는 NumPy 구현
+# 가중치는 export_tsrnet_weights()로 .pt 체크포인트의 state_dict를 .npz로 변환해 사용한다.
+# (변환에만 torch가 필요하며, 추론 워커에는 numpy만 있으면 된다.)
+
+# (종류, state_dict 내 인덱스, stride, padding) - aiModels.tsrnet 의 nn.Sequential 구성과 같은 순서
+ENCODER1D_LAYERS = [
+    ("conv1d", 0, 2, 1), ("lrelu",),
+    ("conv1d", 2, 2, 1), ("bn", 3), ("lrelu",),
+    ("conv1d", 5, 2, 1), ("bn", 6), ("lrelu",),
+    ("conv1d", 8, 2, 1), ("bn", 9), ("lrelu",),
+    ("conv1d", 11, 2, 1), ("bn", 12), ("lrelu",),
+    ("conv1d", 14, 1, 0),
+]
+DECODER1D_LAYERS = [
+    ("convT1d", 0, 1, 0), ("bn", 1), ("relu",),
+    ("convT1d", 3, 2, 1), ("bn", 4), ("relu",),
+    ("convT1d", 6, 2, 1), ("bn", 7), ("relu",),
+    ("convT1d", 9, 2, 1), ("bn", 10), ("relu",),
+    ("convT1d", 12, 2, 1), ("bn", 13), ("relu",),
+    ("convT1d", 15, 2, 1), ("sigmoid",),
+]
+ENCODER2D_LAYERS = [
+    ("conv2d", 0, 1, 0), ("lrelu",),
+    ("conv2d", 2, 1, 1), ("bn", 3), ("lrelu",),
+    ("conv2d", 5, 1, 0), ("bn", 6), ("lrelu",),
+    ("conv2d", 8, 1, 1), ("bn", 9), ("lrelu",),
+    ("conv2d", 11, 1, 0), ("bn", 12), ("lrelu",),
+    ("conv2d", 14, 1, 0),
+]
+
+BATCHNORM_EPS = 1e-5
+
+def conv1d(x, weight, bias, stride, padding):
+    # x : (N, C, L), weight : (O, C, K)
+    kernel = weight.shape[-1]
+    x = np.pad(x, ((0, 0), (0, 0), (padding, padding)))
+    windows = sliding_window_view(x, kernel, axis=2)[:, :, ::stride, :]  # (N, C, L_out, K)
+    out = np.tensordot(windows, weight, axes=([1, 3], [1, 2])).transpose(0, 2, 1)
+    if bias is not None:
+        out += bias[None, :, None]
+    return out
+
+def conv_transpose1d(x, weight, bias, stride, padding):
+    # x : (N, C_in, L), weight : (C_in, C_out, K)
+    # 입력 사이에 stride-1 개의 0을 넣고 뒤집은 커널로 일반 합성곱을 수행
+    n, channels, length = x.shape
+    kernel = weight.shape[-1]
+    dilated = np.zeros((n, channels, (length - 1) * stride + 1), dtype=x.dtype)
+    dilated[:, :, ::stride] = x
+    flipped = np.ascontiguousarray(weight[:, :, ::-1].transpose(1, 0, 2))
+    return conv1d(dilated, flipped, bias, 1, kernel - 1 - padding)
+
+def conv2d(x, weight, bias, stride, padding):
+    # x : (N, C, H, W), weight : (O, C, KH, KW)
+    kh, kw = weight.shape[-2:]
+    x = np.pad(x, ((0, 0), (0, 0), (padding, padding), (padding, padding)))
+    windows = sliding_window_view(x, (kh, kw), axis=(2, 3))[:, :, ::stride, ::stride]  # (N, C, H_out, W_out, KH, KW)
+    out = np.tensordot(windows, weight, axes=([1, 4, 5], [1, 2, 3])).transpose(0, 3, 1, 2)
+    if bias is not None:
+        out += bias[None, :, None, None]
+    return out
+
+def batch_norm(x, weight, bias, running_mean, running_var):
+    shape = (1, -1) + (1,) * (x.ndim - 2)
+    scale = (weight / np.sqrt(running_var + BATCHNORM_EPS)).reshape(shape)
+    return (x - running_mean.reshape(shape)) * scale + bias.reshape(shape)
+
+def linear(x, weight, bias):
+    return x @ weight.T + bias
+
+def softmax(x, axis=-1):
+    x = np.exp(x - x.max(axis=axis, keepdims=True))
+    return x / x.sum(axis=axis, keepdims=True)
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+class NumpyTSRNet:
+    def __init__(self, weights: dict, heads: int = 2):
+        self.weights = {name: np.asarray(value, dtype=np.float32) for name, value in weights.items()}
+        self.heads = heads
+        self.channel = self.weights["time_encoder.main.0.weight"].shape[1]
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as weights:
+            return cls(dict(weights))
+
+    def _get(self, name):
+        return self.weights.get(name)
+
+    def _sequential(self, x, prefix, layers):
+        for layer in layers:
+            kind = layer[0]
+            if kind in ("conv1d", "convT1d", "conv2d"):
+                _, index, stride, padding = layer
+                weight = self._get(f"{prefix}.{index}.weight")
+                bias = self._get(f"{prefix}.{index}.bias")
+                op = {"conv1d": conv1d, "convT1d": conv_transpose1d, "conv2d": conv2d}[kind]
+                x = op(x, weight, bias, stride, padding)
+            elif kind == "bn":
+                base = f"{prefix}.{layer[1]}"
+                x = batch_norm(x, self._get(f"{base}.weight"), self._get(f"{base}.bias"),
+                               self._get(f"{base}.running_mean"), self._get(f"{base}.running_var"))
+            elif kind == "lrelu":
+                x = np.where(x > 0, x, 0.2 * x)
+            elif kind == "relu":
+                x = np.maximum(x, 0)
+            elif kind == "sigmoid":
+                x = sigmoid(x)
+        return x
+
+    def _attention(self, x):
+        # MultiHeadedAttention (dropout은 eval 모드에서 항등)
+        batch_size, length, d_model = x.shape
+        d_k = d_model // self.heads
+        query, key, value = [
+            linear(x, self._get(f"attn1.linear_layers.{i}.weight"), self._get(f"attn1.linear_layers.{i}.bias"))
+            .reshape(batch_size, length, self.heads, d_k).transpose(0, 2, 1, 3)
+            for i in range(3)
+        ]
+        scores = query @ key.transpose(0, 1, 3, 2) / np.sqrt(d_k)
+        out = softmax(scores) @ value
+        out = out.transpose(0, 2, 1, 3).reshape(batch_size, length, self.heads * d_k)
+        return linear(out, self._get("attn1.output_linear.weight"), self._get("attn1.output_linear.bias"))
+
+    def _layer_norm1(self, x, eps=1e-6):
+        # aiModels.tsrnet.LayerNorm : 불편 표준편차(torch.std 기본값)를 사용
+        mean = x.mean(-1, keepdims=True)
+        std = x.std(-1, keepdims=True, ddof=1)
+        return self._get("layer_norm1.a_2") * (x - mean) / (std + eps) + self._get("layer_norm1.b_2")
+
+    def _mlp(self, x, eps=1e-5):
+        x = linear(x, self._get("mlp.0.weight"), self._get("mlp.0.bias"))
+        mean = x.mean(-1, keepdims=True)
+        var = x.var(-1, keepdims=True)
+        x = (x - mean) / np.sqrt(var + eps) * self._get("mlp.1.weight") + self._get("mlp.1.bias")
+        return np.maximum(x, 0)
+
+    def __call__(self, time_ecg, spectrogram_ecg):
+        return self.forward(time_ecg, spectrogram_ecg)
+
+    def forward(self, time_ecg, spectrogram_ecg):
+        time_ecg = np.asarray(time_ecg, dtype=np.float32)
+        spectrogram_ecg = np.asarray(spectrogram_ecg, dtype=np.float32)
+
+        time_features = self._sequential(time_ecg.transpose(0, 2, 1), "time_encoder.main", ENCODER1D_LAYERS)
+
+        spectrogram_features = self._sequential(spectrogram_ecg.transpose(0, 3, 1, 2), "spec_encoder.main", ENCODER2D_LAYERS)
+        n, c, h, w = spectrogram_features.shape
+        spectrogram_features = conv1d(spectrogram_features.reshape(n, c * h, w), self._get("conv_spec1.weight"), None, 1, 1)
+
+        latent_combine = np.concatenate([time_features, spectrogram_features], axis=-1).transpose(0, 2, 1)
+        for _ in range(2):
+            latent_combine = self._layer_norm1(latent_combine + self._attention(latent_combine))
+        latent_combine = self._mlp(latent_combine.transpose(0, 2, 1))
+
+        output = self._sequential(latent_combine, "time_decoder.main", DECODER1D_LAYERS).transpose(0, 2, 1)
+        return output[:, :, 0:self.channel], output[:, :, self.channel:self.channel + 1]
+
+# aiModels.tsrnet.TSRNET_batch 와 같은 형식
+def TSRNET_batch(model, time_instances, spec_instances, threshold):
+    time_bcg = np.asarray(time_instances, dtype=np.float32)
+    gen_time, time_var = model(time_bcg, spec_instances)
+    reconstruction_errors = np.mean((gen_time - time_bcg) ** 2, axis=(1, 2))
+    return reconstruction_errors > threshold, reconstruction_errors
+
+def export_tsrnet_weights(checkpoint_path: str, npz_path: str) -> None:
+    """
+    .pt 체크포인트의 model_state_dict를 NumpyTSRNet 용 .npz로 저장한다. (torch 필요)
+    실행 : python -m aiModels.numpyModel aiModels/TSRNet-63.pt aiModels/TSRNet-63.npz
+    """
+    import torch
+
+    checkpoint = torch.load(checkpoint_path, map_location='cpu', weights_only=True)
+    weights = {
+        name: tensor.detach().cpu().numpy()
+        for name, tensor in checkpoint['model_state_dict'].items()
+        if not name.endswith("num_batches_tracked")
+    }
+    np.savez(npz_path, **weights)
+
+if __name__ == "__main__":
+    import sys
+    export_tsrnet_weights(sys.argv[1], sys.argv[2])
@@ -0,0 +1,114 @@
+import os
+import pickle
+import logging
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+KMEANS_MODEL_PATH = os.getenv("KMEANS_MODEL_PATH", "aiModels/kmeans_model_newfinal.pkl")
+TSRNET_MODEL_PATH = os.getenv("TSRNET_MODEL_PATH", "aiModels/TSRNet-63.pt")
+# numpy 방식에서 사용하는 가중치 (python -m aiModels.numpyModel 로 .pt 에서 변환)
+TSRNET_NUMPY_PATH = os.getenv("TSRNET_NUMPY_PATH", os.path.splitext(TSRNET_MODEL_PATH)[0] + ".npz")
+
+# TSRNet 추론 방식 : eager / torchscript / quantized (aiModels.backend), numpy (aiModels.numpyModel, torch 불필요)
+TSRNET_BACKEND = os.getenv("TSRNET_BACKEND", "eager").lower()
+
+# process_data가 사용하는 특성 수 (ax, ay, az, gx, gy, gz 의 평균 + 표준편차)
+KMEANS_FEATURES = 12
+KMEANS_CLUSTERS = 4
+
+# TSRNet 입력 크기 : 560 샘플 x 3채널, STFT(nperseg=125) 결과 63 x 10 x 3
+TSRNET_TIME_SHAPE = (560, 3)
+TSRNET_SPEC_SHAPE = (63, 10, 3)
+
+def load_kmeans(model_path: str):
+    with open(model_path, 'rb') as file:
+        kmeans = pickle.load(file)
+
+    # 검증
+    centers = getattr(kmeans, "cluster_centers_", None)
+    if centers is None or centers.shape != (KMEANS_CLUSTERS, KMEANS_FEATURES):
+        raise ValueError(f"Unexpected KMeans model in {model_path}")
+
+    # 워밍업
+    kmeans.predict(np.zeros((1, KMEANS_FEATURES)))
+    return kmeans
+
+def get_tsrnet_batch(backend: str = TSRNET_BACKEND):
+    # numpy 방식에서는 torch를 import 하지 않도록 추론 함수도 방식에 맞춰 가져온다.
+    if backend == "numpy":
+        from aiModels.numpyModel import TSRNET_batch
+    else:
+        from aiModels.tsrnet import TSRNET_batch
+    return TSRNET_batch
+
+def load_tsrnet(model_path: str, backend: str = TSRNET_BACKEND):
+    if backend == "numpy":
+        from aiModels.numpyModel import NumpyTSRNet
+
+        model = NumpyTSRNet.load(model_path)
+        zeros = np.zeros
+    else:
+        import torch
+        from aiModels.tsrnet import TSRNet
+        from aiModels.backend import configure_torch_threads, build_tsrnet_backend
+
+        configure_torch_threads()
+        model = TSRNet(enc_in=3)
+        checkpoint = torch.load(model_path, map_location='cpu', weights_only=True)
+        model.load_state_dict(checkpoint['model_state_dict'])  # strict=True 로 키/크기 검증
+        model.eval()
+        zeros = torch.zeros
+        model = build_tsrnet_backend(model, backend, (zeros((1, *TSRNET_TIME_SHAPE)), zeros((1, *TSRNET_SPEC_SHAPE))))
+
+    # 워밍업 forward + 출력 크기 검증
+    _, errors = get_tsrnet_batch(backend)(model, zeros((1, *TSRNET_TIME_SHAPE)), zeros((1, *TSRNET_SPEC_SHAPE)), 0)
+    if tuple(errors.shape) != (1,):
+        raise ValueError(f"Unexpected TSRNet output from {model_path}")
+    return model
+
+class ModelRegistry:
+    """
+    프로세스 당 한 번만 모델을 로드해 재사용하기 위한 저장소.
+    추론 서버(SERVER_ROLE=all)는 시작 시 load()를 호출하며, 로드에 실패하면 예외를 그대로 올려 서버 시작을 중단한다.
+    load()를 호출하지 않는 경우(SERVER_ROLE=api, 벤치마크 등)에만 처음 사용할 때 로드한다.
+    """
+    def __init__(self, kmeans_path: str = KMEANS_MODEL_PATH, tsrnet_path: str = None, tsrnet_backend: str = TSRNET_BACKEND):
+        self.kmeans_path = kmeans_path
+        self.tsrnet_backend = tsrnet_backend
+        self.tsrnet_path = tsrnet_path or (TSRNET_NUMPY_PATH if tsrnet_backend == "numpy" else TSRNET_MODEL_PATH)
+        self._kmeans = None
+        self._tsrnet = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        for name in ("kmeans", "tsrnet"):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                logger.error(f"Failed to load {name} model: {e}")
+                raise
+
+    @property
+    def kmeans(self):
+        if self._kmeans is None:
+            with self._lock:
+                if self._kmeans is None:
+                    self._kmeans = load_kmeans(self.kmeans_path)
+                    logger.info(f"KMeans model loaded from {self.kmeans_path}")
+        return self._kmeans
+
+    @property
+    def tsrnet(self):
+        if self._tsrnet is None:
+            with self._lock:
+                if self._tsrnet is None:
+                    self._tsrnet = load_tsrnet(self.tsrnet_path, self.tsrnet_backend)
+                    logger.info(f"TSRNet model ({self.tsrnet_backend}) loaded from {self.tsrnet_path}")
+        return self._tsrnet
+
+registry = ModelRegistry()
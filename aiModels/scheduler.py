@@ -0,0 +1,84 @@
+import os
+import asyncio
+import logging
+import numpy as np
+from dotenv import load_dotenv
+from aiModels.executor import executor
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 한 번의 TSRNet forward에 묶을 최대 window 수
+ANOMALY_BATCH_SIZE = int(os.getenv("ANOMALY_BATCH_SIZE", 16))
+# 첫 요청이 들어온 뒤 배치를 채우기 위해 기다리는 최대 시간(ms)
+ANOMALY_BATCH_WAIT_MS = float(os.getenv("ANOMALY_BATCH_WAIT_MS", 10))
+
+class InferenceScheduler:
+    """
+    여러 연결에서 들어오는 TSRNet 입력을 모아 한 번의 배치 forward로 처리하는 스케줄러.
+    max_batch_size 만큼 모이거나 max_wait_ms 가 지나면 배치를 실행하고,
+    각 요청(연결)에 (이상치 여부, 복원 오차)를 돌려준다.
+    """
+    def __init__(self, executor=executor, max_batch_size: int = ANOMALY_BATCH_SIZE, max_wait_ms: float = ANOMALY_BATCH_WAIT_MS):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._collector = None
+        self._batches = set()
+
+    async def detect(self, time_instance: np.ndarray, spec_instance: np.ndarray):
+        if self._collector is None or self._collector.done():
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((time_instance, spec_instance, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # 배치 실행 중에도 다음 배치를 모을 수 있도록 별도 task로 실행
+            task = asyncio.create_task(self._run(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run(self, batch):
+        futures = [future for _, _, future in batch]
+        try:
+            time_instances = np.stack([time_instance for time_instance, _, _ in batch])
+            spec_instances = np.stack([spec_instance for _, spec_instance, _ in batch])
+            anomalies, errors = await self.executor.detect_anomalies(time_instances, spec_instances)
+        except Exception as e:
+            logger.error(f"Error running anomaly batch: {e}")
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, anomaly, error in zip(futures, anomalies, errors):
+            if not future.done():
+                future.set_result((bool(anomaly), float(error)))
+
+    def shutdown(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            self._collector = None
+        for task in list(self._batches):
+            task.cancel()
+
+scheduler = InferenceScheduler()
@@ -0,0 +1,225 @@
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import math
+
+########## 모델 관련
+class MultiHeadedAttention(nn.Module):
+    """
+    Take in model size and number of heads.
+    """
+    def __init__(self, h, d_model, dropout=0.1):
+        super().__init__()
+        assert d_model % h == 0
+        # We assume d_v always equals d_k
+        self.d_k = d_model // h
+        self.h = h
+        self.linear_layers = nn.ModuleList([nn.Linear(d_model, d_model) for _ in range(3)])
+        self.output_linear = nn.Linear(d_model, d_model)
+        self.dropout = nn.Dropout(p=dropout)
+    def forward(self, query, key, value, mask=None):
+        batch_size = query.size(0)
+        # 1) Do all the linear projections in batch from d_model => h x d_k
+        query, key, value = [l(x).view(batch_size, -1, self.h, self.d_k).transpose(1, 2)
+                             for l, x in zip(self.linear_layers, (query, key, value))]
+        # 2) Apply attention on all the projected vectors in batch.
+        scores = torch.matmul(query, key.transpose(-2, -1)) / math.sqrt(query.size(-1))
+        if mask is not None:
+            scores = scores.masked_fill(mask == 0, -1e9)
+        attn = F.softmax(scores, dim=-1)
+        attn = self.dropout(attn)
+        x = torch.matmul(attn, value)
+        # 3) "Concat" using a view and apply a final linear.
+        x = x.transpose(1, 2).contiguous().view(batch_size, -1, self.h * self.d_k)
+        return self.output_linear(x)
+class LayerNorm(nn.Module):
+    "Construct a layernorm module (See citation for details)."
+    def __init__(self, features, eps=1e-6):
+        super(LayerNorm, self).__init__()
+        self.a_2 = nn.Parameter(torch.ones(features))
+        self.b_2 = nn.Parameter(torch.zeros(features))
+        self.eps = eps
+    def forward(self, x):
+        mean = x.mean(-1, keepdim=True)
+        std = x.std(-1, keepdim=True)
+        return self.a_2 * (x - mean) / (std + self.eps) + self.b_2
+
+class Encoder1D(nn.Module):
+    def __init__(self, nc):
+        super(Encoder1D, self).__init__()
+        ndf = 32
+        self.main = nn.Sequential(
+            nn.Conv1d(nc, ndf, 4, 2, 1),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv1d(ndf, ndf * 2, 4, 2, 1),
+            nn.BatchNorm1d(ndf * 2),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv1d(ndf * 2, ndf * 4, 4, 2, 1),
+            nn.BatchNorm1d(ndf * 4),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv1d(ndf * 4, ndf * 8, 4, 2, 1),
+            nn.BatchNorm1d(ndf * 8),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv1d(ndf * 8, ndf * 16, 5, 2, 1),
+            nn.BatchNorm1d(ndf * 16),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv1d(ndf * 16, 50, 15, 1, 0),
+        )
+
+    def forward(self, input):
+        output = self.main(input)
+        return output
+
+class Decoder1D(nn.Module):
+    def __init__(self, nc):
+        super(Decoder1D, self).__init__()
+        ngf = 32
+        self.main=nn.Sequential(
+            nn.ConvTranspose1d(50, ngf*16, 15, 1, 0),
+            nn.BatchNorm1d(ngf*16),
+            nn.ReLU(True),
+            nn.ConvTranspose1d(ngf * 16, ngf * 8, 5, 2, 1),
+            nn.BatchNorm1d(ngf * 8),
+            nn.ReLU(True),
+            nn.ConvTranspose1d(ngf * 8, ngf * 4, 4, 2, 1),
+            nn.BatchNorm1d(ngf * 4),
+            nn.ReLU(True),
+            nn.ConvTranspose1d(ngf * 4, ngf*2, 4, 2, 1),
+            nn.BatchNorm1d(ngf*2),
+            nn.ReLU(True),
+            nn.ConvTranspose1d(ngf * 2, ngf, 4, 2, 1),
+            nn.BatchNorm1d(ngf),
+            nn.ReLU(True),
+            nn.ConvTranspose1d(ngf, nc, 4, 2, 1),
+            nn.Sigmoid()
+        )
+
+    def forward(self, input):
+        output = self.main(input)
+        return output
+    
+class Encoder2D(nn.Module):
+    def __init__(self, nc):
+        super(Encoder2D, self).__init__()
+        ndf = 32
+        self.main = nn.Sequential(
+            nn.Conv2d(nc, ndf, 3, 1, 0),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv2d(ndf, ndf * 2, 3, 1, 1),
+            nn.BatchNorm2d(ndf * 2),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv2d(ndf * 2, ndf * 4, 3, 1, 0),
+            nn.BatchNorm2d(ndf * 4),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv2d(ndf * 4, ndf * 8, 3, 1, 1),
+            nn.BatchNorm2d(ndf * 8),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv2d(ndf * 8, ndf * 16, 3, 1, 0),
+            nn.BatchNorm2d(ndf * 16),
+            nn.LeakyReLU(0.2, inplace=True),
+            nn.Conv2d(ndf * 16, 50, 3, 1, 0),
+        )
+
+    def forward(self, input):
+        output = self.main(input)
+        return output
+    
+
+#Time and Spectrogram Restoration
+class TSRNet(nn.Module):
+
+    def __init__(self, enc_in):
+        super(TSRNet, self).__init__()
+
+        self.channel = enc_in
+
+        # Time series module 
+        self.time_encoder = Encoder1D(enc_in)
+        self.time_decoder = Decoder1D(enc_in+1)
+        
+        # Spectrogram module
+        self.spec_encoder = Encoder2D(enc_in)
+    
+        self.conv_spec1 = nn.Conv1d(50*55, 50, 3, 1, 1, bias=False)
+        
+        self.mlp = nn.Sequential(
+            nn.Linear(5, 3),
+            nn.LayerNorm(3),
+            nn.ReLU()
+        )
+        
+        self.attn1 = MultiHeadedAttention(2, 50)
+        self.drop = nn.Dropout(0.1)
+        self.layer_norm1 = LayerNorm(50)
+
+    def attention_func(self,x, attn, norm):
+        attn_latent = attn(x, x, x)
+        attn_latent = norm(x + self.drop(attn_latent))
+        return attn_latent
+    
+    def forward(self, time_ecg, spectrogram_ecg):
+        #Time ECG encode
+        time_features = self.time_encoder(time_ecg.transpose(-1,1)) #(32, 50, 136)
+
+        #Spectrogram ECG encode
+        spectrogram_features = self.spec_encoder(spectrogram_ecg.permute(0,3,1,2)) #(32, 50, 63, 66)
+        n, c, h, w = spectrogram_features.shape
+        spectrogram_features = self.conv_spec1(spectrogram_features.contiguous().view(n, c*h, w)) #(32, 50, 66)
+        
+        latent_combine = torch.cat([time_features, spectrogram_features], dim=-1)
+        #Cross-attention
+        latent_combine = latent_combine.transpose(-1, 1)
+        attn_latent = self.attention_func(latent_combine, self.attn1, self.layer_norm1)
+        attn_latent = self.attention_func(attn_latent, self.attn1, self.layer_norm1)
+        latent_combine = attn_latent.transpose(-1, 1)
+        
+        latent_combine = self.mlp(latent_combine)
+        
+        output = self.time_decoder(latent_combine)
+        output = output.transpose(-1, 1)
+
+        return  (output[:,:,0:self.channel],output[:,:,self.channel:self.channel+1])
+
+
+# model : 이미 로드된 모델 (aiModels.registry), 없으면 model_path에서 로드
+def TSRNET(model_path, time_instance, spec_instance, threshold, model=None):
+    if model is None:
+        model = TSRNet(enc_in=3)
+        checkpoint = torch.load(model_path, map_location='cpu', weights_only=True)
+        model.load_state_dict(checkpoint['model_state_dict'])
+    
+    time_bcg = torch.from_numpy(time_instance).float()
+    time_bcg = time_bcg.unsqueeze(0)
+    
+    spec_bcg = torch.from_numpy(spec_instance).float()
+    spec_bcg = spec_bcg.unsqueeze(0)
+    
+    model.eval()
+    anomalies_detected = False
+    
+    with torch.inference_mode():
+        (gen_time, time_var) = model(time_bcg, spec_bcg)
+        time_err = (gen_time - time_bcg) ** 2
+        reconstruction_error = torch.mean(time_err).item()
+
+        if reconstruction_error > threshold:
+            anomalies_detected = True
+            return anomalies_detected, reconstruction_error
+
+    if not anomalies_detected:
+        return anomalies_detected, None
+
+# 여러 기기의 window를 한 번에 추론 (배치 크기 N)
+# time_instances : (N, 560, 3), spec_instances : (N, 63, 10, 3)
+def TSRNET_batch(model, time_instances, spec_instances, threshold):
+    time_bcg = torch.from_numpy(np.asarray(time_instances, dtype=np.float32))
+    spec_bcg = torch.from_numpy(np.asarray(spec_instances, dtype=np.float32))
+    
+    model.eval()
+    with torch.inference_mode():
+        (gen_time, time_var) = model(time_bcg, spec_bcg)
+        time_err = (gen_time - time_bcg) ** 2
+        reconstruction_errors = torch.mean(time_err, dim=(1, 2)).numpy()
+    
+    return reconstruction_errors > threshold, reconstruction_errors
@@ -1,25 +1,77 @@
 import numpy as np
-import torch
-import torch.nn as nn
-import torch.nn.functional as F
 import scipy.signal
 from scipy.signal import find_peaks, stft
-from scipy.ndimage import gaussian_filter1d
-import math
+from scipy.ndimage import gaussian_filter1d, minimum_filter1d, maximum_filter1d
+from functools import lru_cache
 import pywt
 
 ########## 전처리 관련
+# 필터 설계(butter)는 샘플링 레이트마다 한 번만 수행
+@lru_cache(maxsize=None)
+def get_respiration_filter(SR: float):
+    return scipy.signal.butter(5, 0.7, 'low', fs=SR)
+
+@lru_cache(maxsize=None)
+def get_heartrate_filter(SR: float):
+    return scipy.signal.butter(5, [5, 15], 'band', fs=SR)
+
+class CachedFiltFilt:
+    """
+    필터 계수와 초기 상태(lfilter_zi)를 미리 계산해 둔 scipy.signal.filtfilt (1차원 입력).
+
+    filtfilt와 같은 홀수 확장(odd extension)과 정방향/역방향 lfilter를 같은 순서로 실행하므로
+    결과는 filtfilt와 완전히 같다. 호출마다 반복되던 lfilter_zi 계산(선형 방정식)과 인자 검사만 생략한다.
+    (확인 : python -m benchmarks.filtfilt)
+    """
+    def __init__(self, b: np.ndarray, a: np.ndarray):
+        self.b = b
+        self.a = a
+        self.zi = scipy.signal.lfilter_zi(b, a)
+        self.padlen = 3 * max(len(a), len(b))
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        if len(x) <= self.padlen:
+            raise ValueError("The length of the input must be greater than the filter pad length")
+        edge = self.padlen
+        extended = np.concatenate((2 * x[0] - x[edge:0:-1], x, 2 * x[-1] - x[-2:-(edge + 2):-1]))
+        forward, _ = scipy.signal.lfilter(self.b, self.a, extended, zi=self.zi * extended[0])
+        backward, _ = scipy.signal.lfilter(self.b, self.a, forward[::-1], zi=self.zi * forward[-1])
+        return backward[::-1][edge:-edge]
+
+@lru_cache(maxsize=None)
+def get_respiration_filtfilt(SR: float) -> CachedFiltFilt:
+    return CachedFiltFilt(*get_respiration_filter(SR))
+
+@lru_cache(maxsize=None)
+def get_heartrate_filtfilt(SR: float) -> CachedFiltFilt:
+    return CachedFiltFilt(*get_heartrate_filter(SR))
+
 def get_bcg_respiration_signal(bcg: np.ndarray, SR: int) -> np.ndarray:
-    bcg = bcg.flatten()
-    filter_coeffs = scipy.signal.butter(5, 0.7, 'low', fs=SR)
-    return scipy.signal.filtfilt(*filter_coeffs, bcg)
+    bcg = np.asarray(bcg, dtype=np.float64).flatten()
+    return get_respiration_filtfilt(SR)(bcg)
 
 def get_bcg_heartrate_signal(bcg: np.ndarray, SR: float) -> np.ndarray:
-    bcg = bcg.flatten()
-    filter_coeffs = scipy.signal.butter(5, [5, 15], 'band', fs=SR)
-    return scipy.signal.filtfilt(*filter_coeffs, bcg)
+    bcg = np.asarray(bcg, dtype=np.float64).flatten()
+    return get_heartrate_filtfilt(SR)(bcg)
+
+# 각 샘플에서 끝나는 길이 window_size 구간(i-window_size+1 ~ i)의 최소/최대값
+# 시작 구간은 가능한 샘플까지만 사용하며, scipy의 O(n) 필터로 계산한다.
+def sliding_window_min_max(signal: np.ndarray, window_size: int, axis: int = -1):
+    origin = (window_size - 1) // 2  # 현재 샘플에서 끝나는(trailing) 구간
+    min_vals = minimum_filter1d(signal, window_size, axis=axis, mode='nearest', origin=origin)
+    max_vals = maximum_filter1d(signal, window_size, axis=axis, mode='nearest', origin=origin)
+    return min_vals, max_vals
 
 def normalize_signal_window(signal: np.ndarray, window_size: int = 70) -> np.ndarray:
+    min_vals, max_vals = sliding_window_min_max(signal, window_size)
+    diff = max_vals - min_vals
+    flat = diff == 0
+    normalized_signal = np.divide(signal - min_vals, diff, out=np.zeros_like(diff), where=~flat)
+    normalized_signal[flat] = 0.5
+    return normalized_signal.astype(signal.dtype, copy=False)
+
+# normalize_signal_window 의 기존(반복문) 구현 : 결과 비교/벤치마크 용
+def normalize_signal_window_loop(signal: np.ndarray, window_size: int = 70) -> np.ndarray:
     normalized_signal = np.zeros_like(signal)
     
     for i in range(len(signal)):
@@ -33,7 +85,55 @@ def normalize_signal_window(signal: np.ndarray, window_size: int = 70) -> np.nda
             normalized_signal[i] = 0.5
     return normalized_signal
 
+# 아래 세 함수는 마지막 축을 시간 축으로 사용하며 (samples,) 또는 (windows, samples) 입력을 받는다.
 def calculate_checked_values(signal: np.ndarray, window_size: int = 10, threshold: float = 0.75):
+    min_vals, max_vals = sliding_window_min_max(signal, window_size)
+    # 전체 window를 볼 수 있는 i >= window_size 구간만 계산
+    valid = np.arange(signal.shape[-1]) >= window_size
+
+    max_min_diff = np.where(valid, max_vals - min_vals, 0).astype(signal.dtype, copy=False)
+    checked = valid & (max_min_diff >= threshold)
+    checked_values = np.where(checked, max_vals, 0).astype(signal.dtype, copy=False)
+
+    # 직전 샘플이 checked 되지 않은 지점 (구간의 시작)
+    prev_checked_values = np.zeros_like(checked_values)
+    prev_checked_values[..., 1:] = checked_values[..., :-1]
+    upto = np.where(checked & (prev_checked_values == 0), max_vals, 0).astype(signal.dtype, copy=False)
+
+    return checked_values, max_min_diff, upto
+
+def _peak_intervals(result: np.ndarray):
+    # 각 peak와 직전 peak 사이의 간격 (첫 peak는 -1)
+    is_peak = result > 0
+    index = np.broadcast_to(np.arange(result.shape[-1]), result.shape)
+    last_peak = np.maximum.accumulate(np.where(is_peak, index, -1), axis=-1)
+    prev_peak = np.full(result.shape, -1)
+    prev_peak[..., 1:] = last_peak[..., :-1]
+    intervals = np.where(is_peak & (prev_peak >= 0), index - prev_peak, -1)
+    return is_peak, intervals
+
+def calculate_upto_result(upto: np.ndarray):
+    is_peak, intervals = _peak_intervals(upto)
+    peak_count = is_peak.sum(axis=-1)
+    # 평균 간격 = 간격의 합 / 간격 수 = (마지막 peak - 첫 peak) / (peak 수 - 1)
+    interval_sum = np.where(intervals > 0, intervals, 0).sum(axis=-1)
+    interval_count = np.maximum(peak_count - 1, 1)
+    half_avg_interval = np.where(peak_count > 1, interval_sum / interval_count / 2, 0)
+
+    keep = is_peak & ((intervals < 0) | (intervals >= half_avg_interval[..., None]))
+    return np.where(keep, upto, 0).astype(upto.dtype, copy=False)
+
+def calculate_permin(result: np.ndarray, sr: int):
+    is_peak, intervals = _peak_intervals(result)
+    interval_count = np.maximum(is_peak.sum(axis=-1) - 1, 0)
+    interval_sum = np.where(intervals > 0, intervals / sr, 0).sum(axis=-1)
+    # peak가 2개 미만이면 기존 구현과 같이 nan
+    mean_interval = np.divide(interval_sum, interval_count, out=np.full(interval_sum.shape, np.nan), where=interval_count > 0)
+    bpm = 60.0 / mean_interval
+    return bpm
+
+# 아래는 기존(반복문) 구현 : 결과 비교/벤치마크 용
+def calculate_checked_values_loop(signal: np.ndarray, window_size: int = 10, threshold: float = 0.75):
     checked_values = np.zeros_like(signal)
     max_min_diff = np.zeros_like(signal)
     upto = np.zeros_like(signal)
@@ -51,7 +151,7 @@ def calculate_checked_values(signal: np.ndarray, window_size: int = 10, threshol
 
     return checked_values, max_min_diff, upto
 
-def calculate_upto_result(upto: np.ndarray):
+def calculate_upto_result_loop(upto: np.ndarray):
     peaks = np.where(upto > 0)[0]
     
     if len(peaks) == 0:
@@ -75,7 +175,7 @@ def calculate_upto_result(upto: np.ndarray):
 
     return result
 
-def calculate_permin(result: np.ndarray, sr: int):
+def calculate_permin_loop(result: np.ndarray, sr: int):
     peaks = np.where(result > 0)[0]
     intervals = np.diff(peaks) / sr
     bpm = 60.0 / np.mean(intervals)
@@ -136,206 +236,74 @@ def preprocess_data(time, bcg, sampling_rate=100, normwindow=70, checkwindow=10,
     return bpm_h, bpm_r, combined_matrix_for_s, None, None
 
 
-########## 모델 관련
-class MultiHeadedAttention(nn.Module):
-    """
-    Take in model size and number of heads.
-    """
-    def __init__(self, h, d_model, dropout=0.1):
-        super().__init__()
-        assert d_model % h == 0
-        # We assume d_v always equals d_k
-        self.d_k = d_model // h
-        self.h = h
-        self.linear_layers = nn.ModuleList([nn.Linear(d_model, d_model) for _ in range(3)])
-        self.output_linear = nn.Linear(d_model, d_model)
-        self.dropout = nn.Dropout(p=dropout)
-    def forward(self, query, key, value, mask=None):
-        batch_size = query.size(0)
-        # 1) Do all the linear projections in batch from d_model => h x d_k
-        query, key, value = [l(x).view(batch_size, -1, self.h, self.d_k).transpose(1, 2)
-                             for l, x in zip(self.linear_layers, (query, key, value))]
-        # 2) Apply attention on all the projected vectors in batch.
-        scores = torch.matmul(query, key.transpose(-2, -1)) / math.sqrt(query.size(-1))
-        if mask is not None:
-            scores = scores.masked_fill(mask == 0, -1e9)
-        attn = F.softmax(scores, dim=-1)
-        attn = self.dropout(attn)
-        x = torch.matmul(attn, value)
-        # 3) "Concat" using a view and apply a final linear.
-        x = x.transpose(1, 2).contiguous().view(batch_size, -1, self.h * self.d_k)
-        return self.output_linear(x)
-class LayerNorm(nn.Module):
-    "Construct a layernorm module (See citation for details)."
-    def __init__(self, features, eps=1e-6):
-        super(LayerNorm, self).__init__()
-        self.a_2 = nn.Parameter(torch.ones(features))
-        self.b_2 = nn.Parameter(torch.zeros(features))
-        self.eps = eps
-    def forward(self, x):
-        mean = x.mean(-1, keepdim=True)
-        std = x.std(-1, keepdim=True)
-        return self.a_2 * (x - mean) / (std + self.eps) + self.b_2
-
-class Encoder1D(nn.Module):
-    def __init__(self, nc):
-        super(Encoder1D, self).__init__()
-        ndf = 32
-        self.main = nn.Sequential(
-            nn.Conv1d(nc, ndf, 4, 2, 1),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv1d(ndf, ndf * 2, 4, 2, 1),
-            nn.BatchNorm1d(ndf * 2),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv1d(ndf * 2, ndf * 4, 4, 2, 1),
-            nn.BatchNorm1d(ndf * 4),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv1d(ndf * 4, ndf * 8, 4, 2, 1),
-            nn.BatchNorm1d(ndf * 8),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv1d(ndf * 8, ndf * 16, 5, 2, 1),
-            nn.BatchNorm1d(ndf * 16),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv1d(ndf * 16, 50, 15, 1, 0),
-        )
-
-    def forward(self, input):
-        output = self.main(input)
-        return output
-
-class Decoder1D(nn.Module):
-    def __init__(self, nc):
-        super(Decoder1D, self).__init__()
-        ngf = 32
-        self.main=nn.Sequential(
-            nn.ConvTranspose1d(50, ngf*16, 15, 1, 0),
-            nn.BatchNorm1d(ngf*16),
-            nn.ReLU(True),
-            nn.ConvTranspose1d(ngf * 16, ngf * 8, 5, 2, 1),
-            nn.BatchNorm1d(ngf * 8),
-            nn.ReLU(True),
-            nn.ConvTranspose1d(ngf * 8, ngf * 4, 4, 2, 1),
-            nn.BatchNorm1d(ngf * 4),
-            nn.ReLU(True),
-            nn.ConvTranspose1d(ngf * 4, ngf*2, 4, 2, 1),
-            nn.BatchNorm1d(ngf*2),
-            nn.ReLU(True),
-            nn.ConvTranspose1d(ngf * 2, ngf, 4, 2, 1),
-            nn.BatchNorm1d(ngf),
-            nn.ReLU(True),
-            nn.ConvTranspose1d(ngf, nc, 4, 2, 1),
-            nn.Sigmoid()
-        )
-
-    def forward(self, input):
-        output = self.main(input)
-        return output
+########## 여러 window 일괄 전처리 (backfill, 배치 추론 용)
+# find_peaks(-signal) 로 찾는 극소점 개수 (평탄 구간 포함) 를 마지막 축 기준으로 계산
+def count_minima(signal: np.ndarray) -> np.ndarray:
+    slope = np.sign(np.diff(-signal, axis=-1))
+    index = np.broadcast_to(np.arange(slope.shape[-1]), slope.shape)
+    last_nonzero = np.maximum.accumulate(np.where(slope != 0, index, -1), axis=-1)
+    prev_nonzero = np.full(slope.shape, -1)
+    prev_nonzero[..., 1:] = last_nonzero[..., :-1]
+    prev_slope = np.where(prev_nonzero >= 0, np.take_along_axis(slope, np.maximum(prev_nonzero, 0), axis=-1), 0)
+    # 상승(+) 이후 (평탄 구간을 지나) 처음 하강(-) 하는 지점 = 극소점 하나
+    return np.sum((slope < 0) & (prev_slope > 0), axis=-1)
+
+def normalize_signal_batch(signal: np.ndarray) -> np.ndarray:
+    max_val = np.max(signal, axis=-1, keepdims=True)
+    min_val = np.min(signal, axis=-1, keepdims=True)
+    diff = max_val - min_val
+    flat = diff == 0
+    normalized = (signal - min_val) / np.where(flat, 1, diff)
+    return np.where(flat, 0.5, normalized)
+
+# time, bcg : (N, 560) - window N개를 한 번에 처리 (window 단위 반복문 없음)
+# 반환값은 preprocess_data 결과를 window 축으로 쌓은 형태
+#   bpm_h, bpm_r : (N,), combined_matrix_for_s : (N, 560, 3)
+#   time_instance : (N, 560, 3), spectrogram_instance : (N, 63, 10, 3)
+def preprocess_data_batch(time, bcg, sampling_rate=100, normwindow=70, checkwindow=10, checkthereshold=0.75, run_model=False):
+    bcg = np.asarray(bcg, dtype=np.float64)
+    filtered_hr = scipy.signal.filtfilt(*get_heartrate_filter(sampling_rate), bcg, axis=-1)
+    filtered_rp = scipy.signal.filtfilt(*get_respiration_filter(sampling_rate), bcg, axis=-1)
     
-class Encoder2D(nn.Module):
-    def __init__(self, nc):
-        super(Encoder2D, self).__init__()
-        ndf = 32
-        self.main = nn.Sequential(
-            nn.Conv2d(nc, ndf, 3, 1, 0),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv2d(ndf, ndf * 2, 3, 1, 1),
-            nn.BatchNorm2d(ndf * 2),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv2d(ndf * 2, ndf * 4, 3, 1, 0),
-            nn.BatchNorm2d(ndf * 4),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv2d(ndf * 4, ndf * 8, 3, 1, 1),
-            nn.BatchNorm2d(ndf * 8),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv2d(ndf * 8, ndf * 16, 3, 1, 0),
-            nn.BatchNorm2d(ndf * 16),
-            nn.LeakyReLU(0.2, inplace=True),
-            nn.Conv2d(ndf * 16, 50, 3, 1, 0),
-        )
-
-    def forward(self, input):
-        output = self.main(input)
-        return output
+    normalized_signal_h = normalize_signal_window(filtered_hr, window_size=normwindow)
+    normalized_signal_r = normalize_signal_window(filtered_rp, window_size=normwindow)
     
-
-#Time and Spectrogram Restoration
-class TSRNet(nn.Module):
-
-    def __init__(self, enc_in):
-        super(TSRNet, self).__init__()
-
-        self.channel = enc_in
-
-        # Time series module 
-        self.time_encoder = Encoder1D(enc_in)
-        self.time_decoder = Decoder1D(enc_in+1)
-        
-        # Spectrogram module
-        self.spec_encoder = Encoder2D(enc_in)
+    checked_values_h, max_min_diff_h, upto_h = calculate_checked_values(normalized_signal_h, window_size=checkwindow, threshold=checkthereshold)
+    peak_h = calculate_upto_result(upto_h)
+    bpm_h = calculate_permin(peak_h, sampling_rate)
     
-        self.conv_spec1 = nn.Conv1d(50*55, 50, 3, 1, 1, bias=False)
-        
-        self.mlp = nn.Sequential(
-            nn.Linear(5, 3),
-            nn.LayerNorm(3),
-            nn.ReLU()
-        )
-        
-        self.attn1 = MultiHeadedAttention(2, 50)
-        self.drop = nn.Dropout(0.1)
-        self.layer_norm1 = LayerNorm(50)
-
-    def attention_func(self,x, attn, norm):
-        attn_latent = attn(x, x, x)
-        attn_latent = norm(x + self.drop(attn_latent))
-        return attn_latent
+    bpm_r = count_minima(normalized_signal_r) / (normalized_signal_r.shape[-1] / sampling_rate) * 60
+    
+    combined_matrix_for_s = np.stack(np.broadcast_arrays(np.asarray(time), filtered_hr, filtered_rp), axis=-1)
     
-    def forward(self, time_ecg, spectrogram_ecg):
-        #Time ECG encode
-        time_features = self.time_encoder(time_ecg.transpose(-1,1)) #(32, 50, 136)
-
-        #Spectrogram ECG encode
-        spectrogram_features = self.spec_encoder(spectrogram_ecg.permute(0,3,1,2)) #(32, 50, 63, 66)
-        n, c, h, w = spectrogram_features.shape
-        spectrogram_features = self.conv_spec1(spectrogram_features.contiguous().view(n, c*h, w)) #(32, 50, 66)
+    if run_model :
+        combined_signal = 0.9 * peak_h + 0.1 * normalized_signal_r
+        coeffs = pywt.wavedec(combined_signal, 'db4', level=4, axis=-1)
+        reconstructed_signal = pywt.waverec(coeffs, 'db4', axis=-1)
+        smoothed_reconstructed_signal_gaussian = gaussian_filter1d(reconstructed_signal, sigma=2, axis=-1)
+        normalized_reconstructed_signal = normalize_signal_batch(smoothed_reconstructed_signal_gaussian)
         
-        latent_combine = torch.cat([time_features, spectrogram_features], dim=-1)
-        #Cross-attention
-        latent_combine = latent_combine.transpose(-1, 1)
-        attn_latent = self.attention_func(latent_combine, self.attn1, self.layer_norm1)
-        attn_latent = self.attention_func(attn_latent, self.attn1, self.layer_norm1)
-        latent_combine = attn_latent.transpose(-1, 1)
+        smoothed_peak_h_gaussian = gaussian_filter1d(peak_h.astype(np.float64), sigma=4, axis=-1)
+        normalized_peak_h = normalize_signal_batch(smoothed_peak_h_gaussian)
         
-        latent_combine = self.mlp(latent_combine)
+        time_instance = np.stack([normalized_signal_h, normalized_reconstructed_signal, normalized_peak_h], axis=-1)
         
-        output = self.time_decoder(latent_combine)
-        output = output.transpose(-1, 1)
-
-        return  (output[:,:,0:self.channel],output[:,:,self.channel:self.channel+1])
-
-
-def TSRNET(model_path, time_instance, spec_instance, threshold):
-    model = TSRNet(enc_in=3)
-    checkpoint = torch.load(model_path, map_location='cpu', weights_only=True)
-    model.load_state_dict(checkpoint['model_state_dict'])
-    
-    time_bcg = torch.from_numpy(time_instance).float()
-    time_bcg = time_bcg.unsqueeze(0)
-    
-    spec_bcg = torch.from_numpy(spec_instance).float()
-    spec_bcg = spec_bcg.unsqueeze(0)
-    
-    model.eval()
-    anomalies_detected = False
+        f,t, Zxx = stft(time_instance.transpose(0,2,1),fs=sampling_rate, window='hann',nperseg=125)
+        spectrogram_instance = np.abs(Zxx)  #(N, 3, 63, 10)
+        spectrogram_instance = spectrogram_instance.transpose(0,2,3,1)
+        
+        return bpm_h, bpm_r, combined_matrix_for_s, time_instance, spectrogram_instance
     
-    with torch.no_grad():
-        (gen_time, time_var) = model(time_bcg, spec_bcg)
-        time_err = (gen_time - time_bcg) ** 2
-        reconstruction_error = torch.mean(time_err).item()
+    return bpm_h, bpm_r, combined_matrix_for_s, None, None
 
-        if reconstruction_error > threshold:
-            anomalies_detected = True
-            return anomalies_detected, reconstruction_error
 
-    if not anomalies_detected:
-        return anomalies_detected, None
\ No newline at end of file
+########## 모델 관련
+# TSRNet 모델(torch)은 aiModels.tsrnet 에 있으며, 전처리만 사용하는 워커가 torch 없이
+# 이 모듈을 import 할 수 있도록 처음 접근할 때 불러온다. (예: from aiModels.yeinOh import TSRNET)
+_TSRNET_NAMES = ("MultiHeadedAttention", "LayerNorm", "Encoder1D", "Decoder1D", "Encoder2D", "TSRNet", "TSRNET", "TSRNET_batch")
+
+def __getattr__(name):
+    if name in _TSRNET_NAMES:
+        from aiModels import tsrnet
+        return getattr(tsrnet, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,420 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+from sqlalchemy import and_, select, delete, insert
+import models, schemas
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+from typing import Optional
+from core.security import token_cache
+from core.waveform import pack_waveform, unpack_waveform, waveform_heart_points
+from core.rollup import rollup_values, health_rollup_upsert
+
+# crud.py 의 비동기(AsyncSession) 버전
+# 함수 이름과 반환 형식은 crud.py 와 같다.
+
+# User CRUD
+async def get_user(db: AsyncSession, user_id: int) -> models.User:
+    try:
+        return await db.scalar(select(models.User).where(models.User.id == user_id).limit(1))
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+async def get_user_by_loginId(db: AsyncSession, loginId: str) -> models.User:
+    try:
+        return await db.scalar(select(models.User).where(models.User.loginId == loginId).limit(1))
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    db_user = models.User(loginId=user.loginId, password=user.password, name=user.name)
+    try:
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+
+# Dog CRUD
+async def get_dog(db: AsyncSession, dog_id: int) -> models.Dog:
+    try:
+        return await db.scalar(select(models.Dog).where(models.Dog.id == dog_id).limit(1))
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+async def create_dog(db: AsyncSession, dog: schemas.DogCreate, user_id: int) -> models.Dog:
+    db_dog = models.Dog(**dog.dict(), userId=user_id)
+    try:
+        db.add(db_dog)
+        await db.commit()
+        await db.refresh(db_dog)
+        return db_dog
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+
+async def get_dog_by_user(db: AsyncSession, user_id: int) -> models.Dog:
+    try:
+        return await db.scalar(select(models.Dog).where(models.Dog.userId == user_id).limit(1))
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+async def get_dog_weight_by_user(db: AsyncSession, user_id: int) -> list[float]:
+    try:
+        return (await db.execute(select(models.Dog.weight).where(models.Dog.userId == user_id))).all()
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+# 사용자와 해당 사용자의 강아지를 한 번의 조인 쿼리로 조회 (강아지가 없으면 dog는 None)
+async def get_user_and_dog_by_loginId(db: AsyncSession, loginId: str) -> tuple[models.User, models.Dog]:
+    try:
+        row = (await db.execute(
+            select(models.User, models.Dog).outerjoin(
+                models.Dog, models.Dog.userId == models.User.id
+            ).where(
+                models.User.loginId == loginId
+            ).order_by(
+                models.Dog.id.asc()
+            ).limit(1)
+        )).first()
+        return (row[0], row[1]) if row else (None, None)
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+# Picture CRUD
+async def create_picture(db: AsyncSession, picture: schemas.PictureCreate, dog_id: int) -> models.Picture:
+    db_picture = models.Picture(**picture.dict(), dogId=dog_id)
+    try:
+        db.add(db_picture)
+        await db.commit()
+        await db.refresh(db_picture)
+        return db_picture
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+
+async def get_pictures_by_dog(db: AsyncSession, dog_id: int) -> models.Picture:
+    try:
+        return await db.scalar(select(models.Picture).where(models.Picture.dogId == dog_id).limit(1))
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+# SenseData CRUD
+async def create_sense_data(db: AsyncSession, sense_data: schemas.SenseDataCreate, dog_id: int) -> models.SenseData:
+    db_sense_data = models.SenseData(**sense_data.dict(), dogId=dog_id)
+    try:
+        db.add(db_sense_data)
+        await db.commit()
+        await db.refresh(db_sense_data)
+        return db_sense_data
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+
+async def get_sense_data_by_dog(db: AsyncSession, dog_id: int) -> list[models.SenseData]:
+    try:
+        return (await db.scalars(select(models.SenseData).where(models.SenseData.dogId == dog_id))).all()
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+# RefreshToken CRUD
+async def crud_create_refresh_token(db: AsyncSession, token: schemas.RefreshTokenCreate, user_id: int) -> models.RefreshToken:
+    db_token = models.RefreshToken(**token.dict(), userId=user_id)
+    try:
+        db.add(db_token)
+        await db.commit()
+        await db.refresh(db_token)
+        return db_token
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+
+async def get_refresh_token(db: AsyncSession, token_id: int) -> models.RefreshToken:
+    try:
+        return await db.scalar(select(models.RefreshToken).where(models.RefreshToken.id == token_id).limit(1))
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+async def delete_refresh_token(db: AsyncSession, token_id: int) -> None:
+    try:
+        tokens = (await db.execute(
+            delete(models.RefreshToken).where(models.RefreshToken.id == token_id).returning(models.RefreshToken.token)
+        )).scalars().all()
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+    # 해당 사용자의 access token 검증 캐시 항목만 삭제 (토큰 폐기는 아님, 다음 요청에서 다시 디코딩해 exp 까지 유효)
+    for token in tokens:
+        token_cache.invalidate_refresh_token(token)
+
+async def get_refresh_token_by_user(db: AsyncSession, user_id: int) -> models.RefreshToken:
+    try:
+        return await db.scalar(select(models.RefreshToken).where(models.RefreshToken.userId == user_id).limit(1))
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+# 시퀀스를 시간/일 단위 건강 지표 집계에 더한다 (core.rollup), 호출한 쪽의 트랜잭션에서 함께 커밋
+async def add_to_health_rollups(db: AsyncSession, db_sequence: models.Sequence) -> None:
+    if db_sequence.dogId is None:
+        return
+    await db.execute(health_rollup_upsert(db.get_bind().dialect.name, rollup_values(db_sequence)))
+
+# Sequence CRUD
+async def create_sequence(db: AsyncSession, sequence: schemas.SequenceCreate) -> models.Sequence:
+    db_sequence = models.Sequence(**sequence.dict())
+    db.add(db_sequence)
+    await add_to_health_rollups(db, db_sequence)
+    await db.commit()
+    await db.refresh(db_sequence)
+    return db_sequence
+
+async def get_sequence(db: AsyncSession, sequence_id: int) -> models.Sequence:
+    return await db.scalar(select(models.Sequence).where(models.Sequence.id == sequence_id).limit(1))
+
+# Bcgdata CRUD
+async def create_bcgdata(db: AsyncSession, bcgdata: schemas.BcgdataCreate) -> models.Bcgdata:
+    db_bcgdata = models.Bcgdata(**bcgdata.dict())
+    db.add(db_bcgdata)
+    await db.commit()
+    await db.refresh(db_bcgdata)
+    return db_bcgdata
+
+# 시퀀스와 해당 시퀀스의 BCG 데이터를 하나의 트랜잭션으로 저장
+# bcgdatas : [{"measureTime": datetime, "heart": float, "respiration": float}, ...]
+async def create_sequence_with_bcgdata(db: AsyncSession, sequence: schemas.SequenceCreate, bcgdatas: list[dict]) -> models.Sequence:
+    db_sequence = models.Sequence(**sequence.dict())
+    try:
+        db.add(db_sequence)
+        await db.flush()  # sequence id 확보
+        if bcgdatas:
+            await db.execute(
+                insert(models.Bcgdata),
+                [{"sequenceId": db_sequence.id, **bcgdata} for bcgdata in bcgdatas]
+            )
+        await add_to_health_rollups(db, db_sequence)
+        await db.commit()
+        await db.refresh(db_sequence)
+        return db_sequence
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+
+# 시퀀스와 해당 시퀀스의 BCG 파형(float32 배열 한 행)을 하나의 트랜잭션으로 저장
+async def create_sequence_with_waveform(db: AsyncSession, sequence: schemas.SequenceCreate, startTime: datetime, sampleRate: float, heart, respiration) -> models.Sequence:
+    db_sequence = models.Sequence(**sequence.dict())
+    try:
+        db.add(db_sequence)
+        await db.flush()  # sequence id 확보
+        db.add(models.BcgWaveform(
+            sequenceId=db_sequence.id,
+            startTime=startTime,
+            sampleRate=sampleRate,
+            sampleCount=len(heart),
+            samples=pack_waveform(heart, respiration)
+        ))
+        await add_to_health_rollups(db, db_sequence)
+        await db.commit()
+        await db.refresh(db_sequence)
+        return db_sequence
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+
+# 시각(파티션 키) 조건을 함께 주어 시퀀스 구간의 파티션만 읽음 (sequenceId 만으로는 모든 파티션을 확인함)
+async def get_bcg_waveform(db: AsyncSession, sequence: models.Sequence) -> models.BcgWaveform:
+    try:
+        return await db.scalar(select(models.BcgWaveform).where(
+            models.BcgWaveform.sequenceId == sequence.id,
+            models.BcgWaveform.startTime == sequence.startTime
+        ).limit(1))
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
+
+# TargetExercise CRUD
+async def create_target_exercise(db: AsyncSession, target_exercise: schemas.TargetExerciseCreate) -> models.TargetExercise:
+    db_target_exercise = models.TargetExercise(**target_exercise.dict())
+    db.add(db_target_exercise)
+    await db.commit()
+    await db.refresh(db_target_exercise)
+    return db_target_exercise
+
+async def get_target_exercise(db: AsyncSession, dog_id: int) -> models.TargetExercise:
+    return await db.scalar(select(models.TargetExercise).where(models.TargetExercise.dogId == dog_id).limit(1))
+
+async def update_today_exercise(db: AsyncSession, dog_id: int, tempExcercise: float) -> models.TargetExercise:
+    target_exercise = await get_target_exercise(db, dog_id)
+    if target_exercise:
+        target_exercise.today = target_exercise.today + tempExcercise
+        await db.commit()
+        await db.refresh(target_exercise)
+    return target_exercise
+
+async def update_target_exercise(db: AsyncSession, dog_id: int, targetNum: float) -> models.TargetExercise:
+    target_exercise = await get_target_exercise(db, dog_id)
+    if target_exercise:
+        target_exercise.target = targetNum
+        await db.commit()
+        await db.refresh(target_exercise)
+    return target_exercise
+
+async def get_last_days_average_exercise(db: AsyncSession, dog_id: int, yToday:float, yTarget:float) -> float:
+    target_exercises = (await db.scalars(
+        select(models.ExerciseLog).where(
+            models.ExerciseLog.dogId == dog_id
+        ).order_by(
+            models.ExerciseLog.id.desc()
+        ).limit(10)
+    )).all()
+    if len(target_exercises) < 5:
+        return_exercise = yTarget
+    elif len(target_exercises) == 5:
+        return_exercise = sum([target.exercise for target in target_exercises]) / 5
+    else:
+        return_exercise = (yToday + yTarget) / 2
+    return return_exercise
+
+# ExerciseLog CRUD
+async def create_exercise_log(db: AsyncSession, exercise_log: schemas.ExerciseLogCreate) -> models.ExerciseLog:
+    db_exercise_log = models.ExerciseLog(**exercise_log.dict())
+    db.add(db_exercise_log)
+    await db.commit()
+    await db.refresh(db_exercise_log)
+    return db_exercise_log
+
+async def get_exercise_log(db: AsyncSession, log_id: int) -> models.ExerciseLog:
+    return await db.scalar(select(models.ExerciseLog).where(models.ExerciseLog.id == log_id).limit(1))
+
+async def get_exercise_logs_by_dog(db: AsyncSession, dog_id: int) -> list[models.ExerciseLog]:
+    return (await db.scalars(select(models.ExerciseLog).where(models.ExerciseLog.dogId == dog_id))).all()
+
+async def delete_exercise_log(db: AsyncSession, log_id: int):
+    await db.execute(delete(models.ExerciseLog).where(models.ExerciseLog.id == log_id))
+    await db.commit()
+
+# 특정 강아지의 모든 시퀀스를 최신 순으로 조회하는 함수
+async def get_sequences_by_dog(db: AsyncSession, dog_id: int) -> list[models.Sequence]:
+    return (await db.scalars(select(models.Sequence).where(models.Sequence.dogId == dog_id).order_by(models.Sequence.id.desc()))).all()
+
+# 특정 강아지의 모든 시퀀스를 시간 순으로 조회하는 함수
+async def get_sequences_asc_by_dog(db: AsyncSession, dog_id: int) -> list[models.Sequence]:
+    return (await db.scalars(select(models.Sequence).where(models.Sequence.dogId == dog_id).order_by(models.Sequence.id.asc()))).all()
+
+# 특정 시퀀스와 연관된 BCG 데이터를 조회하는 함수 (시퀀스 구간 measureTime 조건으로 해당 파티션만 읽음)
+async def get_bcgdata_by_sequence(db: AsyncSession, sequence: models.Sequence) -> list[models.Bcgdata]:
+    return (await db.scalars(select(models.Bcgdata).where(
+        models.Bcgdata.sequenceId == sequence.id,
+        models.Bcgdata.measureTime.between(sequence.startTime, sequence.endTime)
+    ).order_by(models.Bcgdata.id.asc()))).all()
+
+# 특정 시퀀스의 심박 파형을 [{"time": epoch, "heart": float}, ...] 로 조회 (파형 저장 방식이 없으면 행 단위 데이터 사용)
+async def get_bcg_heart_by_sequence(db: AsyncSession, sequence: models.Sequence) -> list[dict]:
+    waveform = await get_bcg_waveform(db, sequence)
+    if waveform:
+        heart = unpack_waveform(waveform.samples, waveform.sampleCount)[0]
+        return waveform_heart_points(waveform.startTime, waveform.sampleRate, heart)
+    return [{"time": bcg.measureTime.timestamp(), "heart": bcg.heart} for bcg in await get_bcgdata_by_sequence(db, sequence)]
+
+# 특정 강아지의 최신 시퀀스 id (ix_sequence_dogId_id 의 첫 항목만 읽음), 없으면 None
+async def get_latest_sequence_id(db: AsyncSession, dog_id: int) -> Optional[int]:
+    return await db.scalar(select(models.Sequence.id).where(models.Sequence.dogId == dog_id).order_by(models.Sequence.id.desc()).limit(1))
+
+# 특정 강아지의 최신 시퀀스와 심박 파형을 조회 (ORDER BY id DESC LIMIT 1 + bcgWaveform 조인), 없으면 (None, [])
+# 조인 조건에 startTime 을 포함해 bcgWaveform 은 시퀀스 시각의 파티션만 읽음
+async def get_latest_sequence_with_heart(db: AsyncSession, dog_id: int) -> tuple[Optional[models.Sequence], list[dict]]:
+    sequence = (await db.scalars(
+        select(models.Sequence).outerjoin(models.BcgWaveform, and_(
+            models.BcgWaveform.sequenceId == models.Sequence.id,
+            models.BcgWaveform.startTime == models.Sequence.startTime
+        )).options(contains_eager(models.Sequence.waveform)).where(
+            models.Sequence.dogId == dog_id
+        ).order_by(models.Sequence.id.desc()).limit(1)
+    )).first()
+    if sequence is None:
+        return None, []
+    waveform = sequence.waveform
+    if waveform:
+        heart = unpack_waveform(waveform.samples, waveform.sampleCount)[0]
+        return sequence, waveform_heart_points(waveform.startTime, waveform.sampleRate, heart)
+    return sequence, [{"time": bcg.measureTime.timestamp(), "heart": bcg.heart} for bcg in await get_bcgdata_by_sequence(db, sequence)]
+
+# 특정 강아지의 최근 시퀀스 100개를 조회하는 함수
+async def get_recent_sequences(db: AsyncSession, dog_id: int) -> list[models.Sequence]:
+    return (await db.scalars(
+        select(models.Sequence).where(
+            models.Sequence.dogId == dog_id
+        ).order_by(
+            models.Sequence.id.desc()
+        ).limit(100)
+    )).all()
+
+# 강아지의 시퀀스를 최신순(id 내림차순)으로 한 페이지 조회 (keyset : before_id 보다 작은 id, ix_sequence_dogId_id 사용)
+# start, end 는 startTime 범위 [start, end), None 이면 제한 없음
+async def get_sequence_page(db: AsyncSession, dog_id: int, limit: int, before_id: Optional[int] = None,
+                            start: Optional[datetime] = None, end: Optional[datetime] = None) -> list[models.Sequence]:
+    query = select(models.Sequence).where(models.Sequence.dogId == dog_id)
+    if before_id is not None:
+        query = query.where(models.Sequence.id < before_id)
+    if start is not None:
+        query = query.where(models.Sequence.startTime >= start)
+    if end is not None:
+        query = query.where(models.Sequence.startTime < end)
+    return (await db.scalars(query.order_by(models.Sequence.id.desc()).limit(limit))).all()
+
+async def check_heart_anomaly(db: AsyncSession, user_id: int, checkSequence: int, anomalyCount: int) -> bool:
+    dog = await get_dog_by_user(db, user_id)
+    if dog:
+        # 최근 checkSequence 개만 조회
+        recent_sequences = (await db.scalars(
+            select(models.Sequence.heartAnomoly).where(
+                models.Sequence.dogId == dog.id
+            ).order_by(
+                models.Sequence.id.desc()
+            ).limit(checkSequence)
+        )).all()
+        if len(recent_sequences) < checkSequence:
+            return False
+        heart_anomaly_count = sum(1 for heartAnomoly in recent_sequences if heartAnomoly)
+        return heart_anomaly_count >= anomalyCount
+    else:
+        return False
+
+# 보존 기간이 지나 요약된 데이터 조회 (core.retention), [start, end) 구간을 시간 순으로 반환
+async def get_sense_data_summaries(db: AsyncSession, dog_id: int, start: datetime, end: datetime) -> list[models.SenseDataSummary]:
+    return (await db.scalars(
+        select(models.SenseDataSummary).where(
+            models.SenseDataSummary.dogId == dog_id,
+            models.SenseDataSummary.measureTime >= start,
+            models.SenseDataSummary.measureTime < end
+        ).order_by(models.SenseDataSummary.measureTime.asc())
+    )).all()
+
+async def get_bcg_summaries(db: AsyncSession, dog_id: int, start: datetime, end: datetime) -> list[models.BcgSummary]:
+    return (await db.scalars(
+        select(models.BcgSummary).where(
+            models.BcgSummary.dogId == dog_id,
+            models.BcgSummary.measureTime >= start,
+            models.BcgSummary.measureTime < end
+        ).order_by(models.BcgSummary.measureTime.asc())
+    )).all()
+
+async def get_sequence_summaries(db: AsyncSession, dog_id: int, start: datetime, end: datetime) -> list[models.SequenceSummary]:
+    return (await db.scalars(
+        select(models.SequenceSummary).where(
+            models.SequenceSummary.dogId == dog_id,
+            models.SequenceSummary.startTime >= start,
+            models.SequenceSummary.startTime < end
+        ).order_by(models.SequenceSummary.startTime.asc())
+    )).all()
+
+# 시간('hour')/일('day') 단위 건강 지표 집계를 [start, end) 구간에서 시간 순으로 조회
+async def get_health_rollups(db: AsyncSession, dog_id: int, period: str, start: datetime, end: datetime) -> list[models.HealthRollup]:
+    return (await db.scalars(
+        select(models.HealthRollup).where(
+            models.HealthRollup.dogId == dog_id,
+            models.HealthRollup.period == period,
+            models.HealthRollup.bucketStart >= start,
+            models.HealthRollup.bucketStart < end
+        ).order_by(models.HealthRollup.bucketStart.asc())
+    )).all()
@@ -0,0 +1,119 @@
+# BCG 저장 방식 벤치마크 : 샘플마다 한 행(bcgData) vs 시퀀스마다 float32 배열 한 행(bcgWaveform)
+# 실행 : python -m benchmarks.bcg_storage
+# BCG_BENCH_DATABASE_URL (기본값 : 임시 sqlite 파일) 에 마이그레이션을 적용하고 같은 파형을 두 방식으로 저장한 뒤
+# 테이블(인덱스 포함) 크기와 저장/조회 시간을 비교한다.
+# PostgreSQL URL 이면 별도 스키마(BCG_BENCH_SCHEMA)를 만들어 사용하고 끝나면 삭제한다.
+import os
+import time
+import tempfile
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+import crud, models
+from schemas import SequenceCreate
+from migrations import run_migrations
+
+SEQUENCES = int(os.getenv("BCG_BENCH_SEQUENCES", 2000))
+SAMPLES = 280          # 시퀀스 당 샘플 수 (2.8초, 100 Hz)
+SAMPLE_RATE = 100.0
+READS = int(os.getenv("BCG_BENCH_READS", 500))
+SCHEMA = os.getenv("BCG_BENCH_SCHEMA", "bcg_storage_bench")
+
+def connect():
+    url = os.getenv("BCG_BENCH_DATABASE_URL")
+    if not url:
+        path = os.path.join(tempfile.mkdtemp(), "bcg_storage.db")
+        return create_engine(f"sqlite:///{path}"), None
+    admin = create_engine(url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA "{SCHEMA}"'))
+    return create_engine(url, connect_args={"options": f"-csearch_path={SCHEMA}"}), admin
+
+def table_bytes(connection, table: str) -> int:
+    # 테이블 + 인덱스 (+ TOAST) 크기 (파티션 테이블은 모든 파티션의 합)
+    if connection.dialect.name == "postgresql":
+        return connection.execute(
+            text("SELECT SUM(pg_total_relation_size(relid)) FROM pg_partition_tree(:table)"), {"table": f'"{table}"'}
+        ).scalar()
+    return connection.execute(
+        text("SELECT SUM(pgsize) FROM dbstat WHERE name = :table OR name IN (SELECT name FROM sqlite_master WHERE tbl_name = :table)"),
+        {"table": table}
+    ).scalar()
+
+def sequence_create(dog_id, startTime):
+    return SequenceCreate(
+        dogId=dog_id, startTime=startTime, endTime=startTime + timedelta(seconds=SAMPLES / SAMPLE_RATE),
+        intentsity=0, excercise=0.0, heartAnomoly=0, heartRate=80, respirationRate=20
+    )
+
+def write(db, dog_id, layout, waveforms):
+    sequence_ids = []
+    start = time.perf_counter()
+    startTime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for hearts, respirations in waveforms:
+        if layout == "rows":
+            measureTimes = [startTime + timedelta(seconds=i / SAMPLE_RATE) for i in range(SAMPLES)]
+            bcgdatas = [
+                {"measureTime": measureTime, "heart": heart, "respiration": respiration}
+                for measureTime, heart, respiration in zip(measureTimes, hearts.tolist(), respirations.tolist())
+            ]
+            sequence = crud.create_sequence_with_bcgdata(db, sequence_create(dog_id, startTime), bcgdatas)
+        else:
+            sequence = crud.create_sequence_with_waveform(db, sequence_create(dog_id, startTime), startTime, SAMPLE_RATE, hearts, respirations)
+        sequence_ids.append(sequence.id)
+        startTime += timedelta(seconds=SAMPLES / SAMPLE_RATE)
+    return sequence_ids, (time.perf_counter() - start) / len(waveforms)
+
+def read_rows(db, sequence):
+    # 기존 /hearts, /test-wsbt 의 행 단위 조회
+    return [{"time": bcg.measureTime.timestamp(), "heart": bcg.heart} for bcg in crud.get_bcgdata_by_sequence(db, sequence)]
+
+def read(db, layout, sequence_ids):
+    rng = np.random.default_rng(1)
+    reader = read_rows if layout == "rows" else crud.get_bcg_heart_by_sequence
+    times = []
+    for sequence_id in rng.choice(sequence_ids, READS):
+        db.expire_all()
+        # 호출하는 쪽(/test-wsbt)과 같이 시퀀스는 이미 읽은 상태에서 파형 조회만 측정
+        sequence = crud.get_sequence(db, int(sequence_id))
+        start = time.perf_counter()
+        points = reader(db, sequence)
+        times.append(time.perf_counter() - start)
+        assert len(points) == SAMPLES
+    return np.array(times)
+
+def main():
+    engine, admin = connect()
+    try:
+        run_migrations(engine)
+        db = sessionmaker(bind=engine, autoflush=False)()
+        user = models.User(loginId="bcg_storage_bench", password="x", name="bench")
+        db.add(user)
+        db.flush()
+        dog = models.Dog(userId=user.id, dogName="dog", breed="mix", breedCategory=1, dogAge=3, sex="M", weight=10)
+        db.add(dog)
+        db.commit()
+
+        rng = np.random.default_rng(0)
+        waveforms = [(rng.standard_normal(SAMPLES), rng.standard_normal(SAMPLES)) for _ in range(SEQUENCES)]
+        print(f"{engine.dialect.name}, {SEQUENCES} sequences x {SAMPLES} samples, {READS} reads\n")
+        print(f"{'layout':<10}{'table':<14}{'size (KiB)':>12}{'B/sample':>10}{'write (ms)':>12}{'read p50 (us)':>15}{'read p95 (us)':>15}")
+        for layout, table in (("rows", "bcgData"), ("waveform", "bcgWaveform")):
+            sequence_ids, write_time = write(db, dog.id, layout, waveforms)
+            read_times = read(db, layout, sequence_ids) * 1e6
+            with engine.connect() as connection:
+                size = table_bytes(connection, table)
+            print(f"{layout:<10}{table:<14}{size / 1024:12.0f}{size / (SEQUENCES * SAMPLES):10.1f}{write_time * 1e3:12.2f}"
+                  f"{np.percentile(read_times, 50):15.0f}{np.percentile(read_times, 95):15.0f}")
+        db.close()
+    finally:
+        engine.dispose()
+        if admin is not None:
+            with admin.connect() as connection:
+                connection.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+            admin.dispose()
+
+if __name__ == "__main__":
+    main()
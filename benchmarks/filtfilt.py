@@ -0,0 +1,105 @@
+# BCG 필터 벤치마크 (scipy.signal.filtfilt vs aiModels.yeinOh.CachedFiltFilt)
+# 실행 : python -m benchmarks.filtfilt
+# 합성 BCG 신호 4개를 hop 280 / window 560 으로 60 window씩 나누어 심박/호흡 필터 결과와 preprocess_data 결과
+# (심박수, 호흡수, 필터 신호, TSRNet 입력)가 scipy.signal.filtfilt 를 사용할 때와 같은지 확인하고 시간을 비교한다.
+# 결과가 다르면 종료 코드 1을 반환한다.
+import sys
+import timeit
+import numpy as np
+import scipy.signal
+from contextlib import contextmanager
+from aiModels import yeinOh
+from aiModels.yeinOh import get_heartrate_filter, get_respiration_filter, get_bcg_heartrate_signal, get_bcg_respiration_signal, preprocess_data
+
+SAMPLING_RATE = 100
+WINDOW_SIZE = 560
+HOP_SIZE = 280
+WINDOWS = 60
+# (심박수, 호흡수) per minute
+SIGNALS = ((60, 15), (90, 20), (120, 25), (150, 30))
+
+def synthetic_bcg(seed: int, heart_rate: float, respiration_rate: float, length: int):
+    # 심박 : 9 Hz 로 진동하는 짧은 펄스열 (심박 간격 5% 변동), 호흡 : 저주파 사인, 기기와 같이 int32 로 양자화
+    rng = np.random.default_rng(seed)
+    t = np.arange(length) / SAMPLING_RATE
+    phase = np.cumsum(heart_rate / 60 * (1 + 0.05 * np.sin(2 * np.pi * 0.1 * t))) / SAMPLING_RATE
+    pulse = np.exp(-((phase % 1) - 0.1) ** 2 / 0.0008) * np.sin(2 * np.pi * 9 * t)
+    respiration = 0.8 * np.sin(2 * np.pi * respiration_rate / 60 * t + rng.uniform(0, 2 * np.pi))
+    bcg = (pulse + respiration + 0.15 * rng.standard_normal(length)) * 1000
+    return 1.7e9 + t, bcg.astype(np.int32)
+
+# 기존 구현 : 호출마다 scipy.signal.filtfilt
+def scipy_heartrate_signal(bcg, SR):
+    return scipy.signal.filtfilt(*get_heartrate_filter(SR), bcg.flatten())
+
+def scipy_respiration_signal(bcg, SR):
+    return scipy.signal.filtfilt(*get_respiration_filter(SR), bcg.flatten())
+
+@contextmanager
+def scipy_filtfilt():
+    # preprocess_data 가 기존 구현을 사용하도록 잠시 교체
+    cached = yeinOh.get_bcg_heartrate_signal, yeinOh.get_bcg_respiration_signal
+    yeinOh.get_bcg_heartrate_signal, yeinOh.get_bcg_respiration_signal = scipy_heartrate_signal, scipy_respiration_signal
+    try:
+        yield
+    finally:
+        yeinOh.get_bcg_heartrate_signal, yeinOh.get_bcg_respiration_signal = cached
+
+def scipy_preprocess_data(time, bcg, run_model=False):
+    with scipy_filtfilt():
+        return preprocess_data(time, bcg, run_model=run_model)
+
+def same(a, b) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    return np.array_equal(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64), equal_nan=True)
+
+def compare() -> int:
+    mismatches = 0
+    for seed, (heart_rate, respiration_rate) in enumerate(SIGNALS):
+        time, bcg = synthetic_bcg(seed, heart_rate, respiration_rate, WINDOW_SIZE + HOP_SIZE * (WINDOWS - 1))
+        bad = 0
+        for k in range(WINDOWS):
+            window = slice(k * HOP_SIZE, k * HOP_SIZE + WINDOW_SIZE)
+            expected = (
+                scipy_heartrate_signal(bcg[window], SAMPLING_RATE),
+                scipy_respiration_signal(bcg[window], SAMPLING_RATE),
+                *scipy_preprocess_data(time[window], bcg[window], run_model=True),
+            )
+            actual = (
+                get_bcg_heartrate_signal(bcg[window], SAMPLING_RATE),
+                get_bcg_respiration_signal(bcg[window], SAMPLING_RATE),
+                *preprocess_data(time[window], bcg[window], run_model=True),
+            )
+            bad += not all(same(a, b) for a, b in zip(expected, actual))
+        print(f"signal HR {heart_rate:3d} RR {respiration_rate:2d} : {WINDOWS} windows, {bad} differ")
+        mismatches += bad
+    return mismatches
+
+def bench(func, number=2000):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+def main():
+    mismatches = compare()
+
+    time, bcg = synthetic_bcg(0, 80, 20, WINDOW_SIZE)
+    print()
+    # yeinOh 의 함수를 호출할 때마다 찾으므로 scipy_filtfilt() 안에서는 기존 구현을 측정
+    cases = (
+        ("heart filter", lambda: yeinOh.get_bcg_heartrate_signal(bcg, SAMPLING_RATE)),
+        ("resp filter", lambda: yeinOh.get_bcg_respiration_signal(bcg, SAMPLING_RATE)),
+        ("preprocess", lambda: preprocess_data(time, bcg)),
+        ("+ run_model", lambda: preprocess_data(time, bcg, run_model=True)),
+    )
+    for name, func in cases:
+        after_time = bench(func)
+        with scipy_filtfilt():
+            before_time = bench(func)
+        print(f"{name:<14}filtfilt {before_time * 1e6:7.0f} us   cached {after_time * 1e6:7.0f} us   x{before_time / after_time:4.2f}")
+
+    if mismatches:
+        print(f"FAIL : {mismatches} windows differ from scipy.signal.filtfilt")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# normalize_signal_window 벤치마크 (반복문 구현 vs 슬라이딩 min/max 구현)
+# 실행 : python -m benchmarks.normalize_window
+import timeit
+import numpy as np
+from aiModels.yeinOh import normalize_signal_window, normalize_signal_window_loop
+
+SAMPLING_RATE = 100
+CASES = {
+    "window (560 samples)": 560,
+    "1 hour (360000 samples)": SAMPLING_RATE * 60 * 60,
+}
+
+def bench(func, signal, number):
+    return min(timeit.repeat(lambda: func(signal), number=number, repeat=3)) / number
+
+def main():
+    rng = np.random.default_rng(0)
+    for name, length in CASES.items():
+        signal = rng.normal(size=length)
+        assert np.array_equal(normalize_signal_window(signal), normalize_signal_window_loop(signal))
+
+        number = max(1, 20000 // length)
+        loop_time = bench(normalize_signal_window_loop, signal, number)
+        fast_time = bench(normalize_signal_window, signal, number * 100)
+        print(f"{name:<26} loop {loop_time * 1e3:10.3f} ms   vectorized {fast_time * 1e3:8.3f} ms   x{loop_time / fast_time:7.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# 조회 경로 실행 계획 벤치마크 : 수백만 행을 채운 PostgreSQL 에서 자주 쓰는 쿼리가 인덱스를 사용하는지 확인
+# 실행 : python -m benchmarks.query_plan
+# .env 의 데이터베이스에 별도 스키마(QUERY_PLAN_SCHEMA)를 만들어 마이그레이션을 적용하고 generate_series 로 데이터를 채운 뒤
+# 각 쿼리를 EXPLAIN (ANALYZE, BUFFERS) 로 실행한다. Seq Scan 이 있거나 기대한 인덱스를 쓰지 않으면 종료 코드 1을 반환한다.
+import os
+import sys
+import time
+import json
+from sqlalchemy import create_engine, text
+from database import SQLALCHEMY_DATABASE_URL
+from migrations import run_migrations
+
+SCHEMA = os.getenv("QUERY_PLAN_SCHEMA", "query_plan_bench")
+DOGS = int(os.getenv("QUERY_PLAN_DOGS", 5000))
+SEQUENCES_PER_DOG = int(os.getenv("QUERY_PLAN_SEQUENCES_PER_DOG", 100))  # 500,000 sequence
+BCG_PER_SEQUENCE = int(os.getenv("QUERY_PLAN_BCG_PER_SEQUENCE", 10))     # 5,000,000 bcgData
+SENSE_PER_DOG = int(os.getenv("QUERY_PLAN_SENSE_PER_DOG", 400))          # 2,000,000 senseData
+LOGS_PER_DOG = int(os.getenv("QUERY_PLAN_LOGS_PER_DOG", 60))             # 300,000 exerciseLog
+KEEP = os.getenv("QUERY_PLAN_KEEP", "false").lower() == "true"           # true 면 끝난 뒤 스키마를 남김
+
+# 시퀀스는 2.8초 간격으로 모든 강아지에 번갈아 저장된다 (실제 수집 순서와 같이 dogId 와 id 가 섞이도록)
+SEED = (
+    ("user", """
+        INSERT INTO "user" (id, "loginId", password, name)
+        SELECT g, 'user' || g, 'x', 'user' FROM generate_series(1, :dogs) g"""),
+    ("dog", """
+        INSERT INTO dog (id, "userId", "dogName", breed, "breedCategory", "dogAge", sex, weight)
+        SELECT g, g, 'dog', 'mix', 1, 3, 'M', 10 FROM generate_series(1, :dogs) g"""),
+    ("picture", """
+        INSERT INTO picture (id, "dogId", "fileName", "contentType", "photoPath")
+        SELECT g, g, 'dog.png', 'image/png', 'pictures/dog.png' FROM generate_series(1, :dogs) g"""),
+    ("refreshToken", """
+        INSERT INTO "refreshToken" (id, "userId", token, "createdAt", "expiresAt")
+        SELECT g, g, md5(g::text), now(), now() + interval '7 days' FROM generate_series(1, :dogs) g"""),
+    ("targetExercise", """
+        INSERT INTO "targetExercise" (id, "dogId", target, today)
+        SELECT g, g, 60, 0 FROM generate_series(1, :dogs) g"""),
+    ("exerciseLog", """
+        INSERT INTO "exerciseLog" (id, "dogId", date, exercise)
+        SELECT g, (g - 1) % :dogs + 1, timestamptz '2024-01-01' + ((g - 1) / :dogs) * interval '1 day', random() * 60
+        FROM generate_series(1, :dogs * :logs) g"""),
+    ("sequence", """
+        INSERT INTO sequence (id, "dogId", "startTime", "endTime", intentsity, excercise, "heartAnomoly", "heartRate", "respirationRate")
+        SELECT g, (g - 1) % :dogs + 1,
+               timestamptz '2024-01-01' + ((g - 1) / :dogs) * interval '2.8 seconds',
+               timestamptz '2024-01-01' + ((g - 1) / :dogs) * interval '2.8 seconds' + interval '5.6 seconds',
+               (random() * 3)::int, random(), (random() < 0.05)::int, 60 + (random() * 80)::int, 10 + (random() * 30)::int
+        FROM generate_series(1, :dogs * :sequences) g"""),
+    ("bcgData", """
+        INSERT INTO "bcgData" (id, "sequenceId", "measureTime", heart, respiration)
+        SELECT g, (g - 1) / :bcg + 1,
+               timestamptz '2024-01-01' + ((g - 1) / :bcg / :dogs) * interval '2.8 seconds' + ((g - 1) % :bcg) * (interval '2.8 seconds' / :bcg),
+               random(), random()
+        FROM generate_series(1, :dogs * :sequences * :bcg) g"""),
+    ("senseData", """
+        INSERT INTO "senseData" (id, "dogId", "measureTime", ax, ay, az, bcg, gx, gy, gz, temperature)
+        SELECT g, (g - 1) % :dogs + 1, timestamptz '2024-01-01' + ((g - 1) / :dogs) * interval '10 milliseconds',
+               0, 0, 0, 0, 0, 0, 0, 38.5
+        FROM generate_series(1, :dogs * :sense) g"""),
+)
+
+# (이름, 쿼리, 사용해야 하는 인덱스 중 하나) - crud.py / async_crud.py 의 조회와 같은 형태
+# 강아지의 시퀀스를 모두 읽는 쿼리는 dogId 로 시작하는 두 인덱스 중 어느 것을 써도 된다.
+DOG_ID = DOGS // 2
+SEQUENCE_DOG_INDEXES = ("ix_sequence_dogId_id", "ix_sequence_dogId_startTime")
+SEQUENCE_ID = DOGS * (SEQUENCES_PER_DOG // 2) + DOG_ID
+QUERIES = (
+    ("recent sequences", 'SELECT * FROM sequence WHERE "dogId" = :dog ORDER BY id DESC LIMIT 100',
+     SEQUENCE_DOG_INDEXES),
+    ("sequence page", 'SELECT * FROM sequence WHERE "dogId" = :dog AND id < :sequence ORDER BY id DESC LIMIT 101',
+     ("ix_sequence_dogId_id",)),
+    ("sequence page range", """
+        SELECT * FROM sequence WHERE "dogId" = :dog AND id < :sequence
+        AND "startTime" >= timestamptz '2024-01-01' AND "startTime" < timestamptz '2024-01-01' + interval '2 minutes'
+        ORDER BY id DESC LIMIT 101
+        """, SEQUENCE_DOG_INDEXES),
+    ("latest sequence", 'SELECT * FROM sequence WHERE "dogId" = :dog ORDER BY id DESC LIMIT 1',
+     ("ix_sequence_dogId_id",)),
+    ("anomaly flags", 'SELECT "heartAnomoly" FROM sequence WHERE "dogId" = :dog ORDER BY id DESC LIMIT 10',
+     ("ix_sequence_dogId_id",)),
+    ("sequences asc", 'SELECT * FROM sequence WHERE "dogId" = :dog ORDER BY id ASC',
+     SEQUENCE_DOG_INDEXES),
+    ("sequences time range", """
+        SELECT * FROM sequence WHERE "dogId" = :dog
+        AND "startTime" >= timestamptz '2024-01-01' + interval '1 minute' AND "startTime" < timestamptz '2024-01-01' + interval '2 minutes'
+        ORDER BY "startTime"
+        """, ("ix_sequence_dogId_startTime",)),
+    # 시퀀스 구간(startTime ~ endTime) 조건으로 해당 시각의 파티션만 읽는다
+    ("bcg by sequence", """
+        SELECT * FROM "bcgData" WHERE "sequenceId" = :sequence
+        AND "measureTime" BETWEEN timestamptz '2024-01-01' + ((:sequence - 1) / :dogs) * interval '2.8 seconds'
+                              AND timestamptz '2024-01-01' + ((:sequence - 1) / :dogs) * interval '2.8 seconds' + interval '5.6 seconds'
+        ORDER BY id ASC""",
+     ("ix_bcgData_sequenceId_id",)),
+    ("bcg time range", """
+        SELECT count(*) FROM "bcgData"
+        WHERE "measureTime" >= timestamptz '2024-01-01' + interval '1 minute' AND "measureTime" < timestamptz '2024-01-01' + interval '1 minute 2 seconds'""",
+     ("ix_bcgData_measureTime",)),
+    ("sense time range", """
+        SELECT * FROM "senseData" WHERE "dogId" = :dog
+        AND "measureTime" >= timestamptz '2024-01-01' + interval '1 second' AND "measureTime" < timestamptz '2024-01-01' + interval '2 seconds'""",
+     ("ix_senseData_dogId_measureTime",)),
+    ("user and dog", """
+        SELECT * FROM "user" LEFT OUTER JOIN dog ON dog."userId" = "user".id
+        WHERE "user"."loginId" = 'user' || :dog ORDER BY dog.id ASC LIMIT 1""",
+     ("ix_dog_userId",)),
+    ("dog by user", 'SELECT * FROM dog WHERE "userId" = :dog LIMIT 1', ("ix_dog_userId",)),
+    ("refresh token by user", 'SELECT * FROM "refreshToken" WHERE "userId" = :dog LIMIT 1', ("ix_refreshToken_userId",)),
+    ("picture by dog", 'SELECT * FROM picture WHERE "dogId" = :dog LIMIT 1', ("ix_picture_dogId",)),
+    ("target exercise", 'SELECT * FROM "targetExercise" WHERE "dogId" = :dog LIMIT 1', ("ix_targetExercise_dogId",)),
+    ("recent exercise logs", 'SELECT * FROM "exerciseLog" WHERE "dogId" = :dog ORDER BY id DESC LIMIT 10',
+     ("ix_exerciseLog_dogId_id",)),
+)
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+def seed(engine):
+    params = {"dogs": DOGS, "sequences": SEQUENCES_PER_DOG, "bcg": BCG_PER_SEQUENCE, "sense": SENSE_PER_DOG, "logs": LOGS_PER_DOG}
+    for table, sql in SEED:
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            rows = connection.execute(text(sql), params).rowcount
+        print(f"seeded {table:<15}{rows:>12,} rows {time.perf_counter() - start:8.1f} s")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM ANALYZE"))
+
+def main():
+    admin = create_engine(SQLALCHEMY_DATABASE_URL, isolation_level="AUTOCOMMIT")
+    with admin.connect() as connection:
+        connection.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+        connection.execute(text(f'CREATE SCHEMA "{SCHEMA}"'))
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    failed = False
+    try:
+        print(f"applied migrations {run_migrations(engine)} in schema {SCHEMA}")
+        seed(engine)
+        print(f"\n{'query':<24}{'time (ms)':>10}  plan")
+        with engine.connect() as connection:
+            # 파티션 테이블(core.partitions)은 파티션마다 인덱스 이름이 다르므로 부모 인덱스 이름으로 변환
+            parent_indexes = dict(connection.execute(text(
+                "SELECT c.relname, p.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE c.relkind = 'i' AND c.relnamespace = current_schema()::regnamespace"
+            )).all())
+            # 아직 비어 있는 파티션(앞으로 사용할 파티션, default)의 Seq Scan 은 읽을 페이지가 없으므로 허용
+            empty_tables = set(connection.execute(text(
+                "SELECT relname FROM pg_class WHERE relkind = 'r' AND relpages = 0 AND relnamespace = current_schema()::regnamespace"
+            )).scalars().all())
+            for name, sql, indexes in QUERIES:
+                explain = f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"
+                result = connection.execute(text(explain), {"dog": DOG_ID, "sequence": SEQUENCE_ID, "dogs": DOGS}).scalar()
+                result = json.loads(result) if isinstance(result, str) else result
+                nodes = list(plan_nodes(result[0]["Plan"]))
+                seq_scans = [
+                    node.get("Relation Name") for node in nodes
+                    if node["Node Type"] == "Seq Scan" and node.get("Relation Name") not in empty_tables
+                ]
+                used = [parent_indexes.get(node["Index Name"], node["Index Name"]) for node in nodes if node.get("Index Name")]
+                ok = not seq_scans and any(index in used for index in indexes)
+                scans = ", ".join(
+                    f"{node['Node Type']} {node.get('Index Name') or node.get('Relation Name')}"
+                    for node in nodes if "Scan" in node["Node Type"] and node.get("Relation Name") not in empty_tables
+                )
+                print(f"{name:<24}{result[0]['Execution Time']:10.3f}  {'ok  ' if ok else 'FAIL'} {scans}")
+                failed |= not ok
+    finally:
+        engine.dispose()
+        if not KEEP:
+            with admin.connect() as connection:
+                connection.execute(text(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE'))
+        admin.dispose()
+    if failed:
+        print("FAIL : some hot queries do not use the expected index")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# 서버 시작 시간 벤치마크 : 새 프로세스에서 `python -c 'import main'` 실행 시간 측정
+# 실행 : python -m benchmarks.startup
+# SERVER_ROLE 마다 측정하고, 무거운 AI 모듈이 import 되었거나 기준 시간을 넘으면 종료 코드 1을 반환한다.
+import os
+import sys
+import json
+import time
+import subprocess
+import numpy as np
+
+REPEAT = 5
+# import main 시 불러오면 안 되는 모듈 (처음 분석할 때 import)
+HEAVY_MODULES = ("torch", "pandas", "scipy", "pywt", "sklearn")
+# 역할별 기준 시간 (ms), STARTUP_BUDGET_MS 로 변경 가능
+BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", 1500))
+
+CHECK_MODULES = f"import main, sys, json; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+
+def run(code, role):
+    env = {**os.environ, "SERVER_ROLE": role, "PYTHONDONTWRITEBYTECODE": "1"}
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed (SERVER_ROLE={role}):\n{result.stderr}")
+    return elapsed, result.stdout
+
+def main():
+    failed = False
+    print(f"{'SERVER_ROLE':<12}{'median (ms)':>12}{'min (ms)':>10}  heavy modules imported")
+    for role in ("all", "api"):
+        times = [run("import main", role)[0] for _ in range(REPEAT)]
+        heavy = json.loads(run(CHECK_MODULES, role)[1])
+        median = np.median(times) * 1e3
+        print(f"{role:<12}{median:12.0f}{min(times) * 1e3:10.0f}  {', '.join(heavy) or '-'}")
+        failed |= bool(heavy) or median > BUDGET_MS
+    if failed:
+        print(f"FAIL : heavy modules imported or startup over {BUDGET_MS:.0f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# TSRNet 추론 방식(eager / torchscript / quantized / numpy) 지연 시간 및 복원 오차 비교
+# 실행 : python -m benchmarks.tsrnet_backend
+# TSRNET_MODEL_PATH 체크포인트가 없으면 임의 가중치로 비교한다.
+import os
+import time
+import tempfile
+import numpy as np
+import torch
+from aiModels.registry import TSRNET_MODEL_PATH, TSRNET_TIME_SHAPE, TSRNET_SPEC_SHAPE, load_tsrnet, get_tsrnet_batch
+from aiModels.backend import TSRNET_BACKENDS, configure_torch_threads
+from aiModels.tsrnet import TSRNet
+from aiModels.numpyModel import export_tsrnet_weights
+
+BATCH_SIZES = (1, 16)
+REPEAT = 30
+THRESHOLD = 0.05
+
+def checkpoint_path():
+    if os.path.exists(TSRNET_MODEL_PATH):
+        return TSRNET_MODEL_PATH
+    print(f"{TSRNET_MODEL_PATH} not found, using random weights")
+    path = os.path.join(tempfile.mkdtemp(), "TSRNet-random.pt")
+    torch.save({"model_state_dict": TSRNet(enc_in=3).state_dict()}, path)
+    return path
+
+def latency_ms(TSRNET_batch, model, time_instances, spec_instances):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        TSRNET_batch(model, time_instances, spec_instances, THRESHOLD)
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1e3
+
+def main():
+    path = checkpoint_path()
+    numpy_path = os.path.join(tempfile.mkdtemp(), "TSRNet.npz")
+    export_tsrnet_weights(path, numpy_path)
+    rng = np.random.default_rng(0)
+    time_instances = rng.random((max(BATCH_SIZES), *TSRNET_TIME_SHAPE))
+    spec_instances = rng.random((max(BATCH_SIZES), *TSRNET_SPEC_SHAPE))
+
+    # 서버와 같은 스레드 설정(TORCH_INTRA_OP_THREADS / TORCH_INTER_OP_THREADS)으로 측정
+    configure_torch_threads()
+    print(f"torch {torch.__version__}, intra-op threads {torch.get_num_threads()}, inter-op threads {torch.get_num_interop_threads()}")
+    header = "".join(f"{f'batch {n} (ms)':>16}" for n in BATCH_SIZES)
+    print(f"{'backend':<12}{header}{'max |err - eager|':>20}{'same decision':>16}")
+
+    reference = None
+    for backend in (*TSRNET_BACKENDS, "numpy"):
+        model = load_tsrnet(numpy_path if backend == "numpy" else path, backend)
+        TSRNET_batch = get_tsrnet_batch(backend)
+        anomalies, errors = TSRNET_batch(model, time_instances, spec_instances, THRESHOLD)
+        if reference is None:
+            reference = (anomalies, errors)
+        latencies = "".join(f"{latency_ms(TSRNET_batch, model, time_instances[:n], spec_instances[:n]):16.2f}" for n in BATCH_SIZES)
+        error_diff = np.abs(errors - reference[1]).max()
+        same = np.mean(anomalies == reference[0]) * 100
+        print(f"{backend:<12}{latencies}{error_diff:20.2e}{same:15.0f}%")
+
+if __name__ == "__main__":
+    main()
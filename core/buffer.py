@@ -0,0 +1,103 @@
+import numpy as np
+
+# Sense1 기기가 보내는 채널과 각 채널의 저장 타입
+# time은 기기에 따라 문자열(ISO) 또는 숫자(epoch)로 들어오므로 object로 보관
+SENSOR_COLUMNS = (
+    ("time", object),
+    ("ax", np.int32),
+    ("ay", np.int32),
+    ("az", np.int32),
+    ("bcg", np.int32),
+    ("gx", np.int32),
+    ("gy", np.int32),
+    ("gz", np.int32),
+    ("temperature", np.float32),
+)
+
+WINDOW_SIZE = 560
+HOP_SIZE = 280
+
+class SensorRingBuffer:
+    """
+    연결(기기) 하나가 사용하는 고정 크기 센서 링 버퍼.
+
+    채널마다 capacity * 2 길이의 배열을 미리 할당하고 각 샘플을 i, i + capacity 두 위치에
+    함께 기록한다(미러링). 덕분에 읽기 위치와 상관없이 window 구간이 항상 연속된 메모리에
+    놓이므로 window()는 복사 없이 view를 돌려준다.
+    반환된 view는 다음 push/advance 전까지만 유효하다.
+    """
+    def __init__(self, window_size: int = WINDOW_SIZE, hop_size: int = HOP_SIZE, capacity: int = None, columns=SENSOR_COLUMNS):
+        capacity = capacity or window_size
+        if capacity < window_size:
+            raise ValueError("capacity must be greater than or equal to window_size")
+        if not 0 < hop_size <= window_size:
+            raise ValueError("hop_size must be in (0, window_size]")
+        self.window_size = window_size
+        self.hop_size = hop_size
+        self.capacity = capacity
+        self.columns = tuple(name for name, _ in columns)
+        self._storage = {name: np.zeros(capacity * 2, dtype=dtype) for name, dtype in columns}
+        self._read = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def ready(self) -> bool:
+        return self._size >= self.window_size
+
+    def push_columns(self, columns: dict, start: int = 0) -> int:
+        """
+        채널별 배열(columns[name])의 start 이후 샘플을 남은 공간만큼 기록하고 기록한 개수를 반환한다.
+        """
+        total = len(columns[self.columns[0]]) - start
+        count = min(total, self.free)
+        if count <= 0:
+            return 0
+
+        write = (self._read + self._size) % self.capacity
+        first = min(count, self.capacity - write)
+        for name in self.columns:
+            storage = self._storage[name]
+            values = np.asarray(columns[name][start:start + count], dtype=storage.dtype)
+            # 앞쪽 구간과 미러 구간에 동시에 기록
+            storage[write:write + first] = values[:first]
+            storage[write + self.capacity:write + self.capacity + first] = values[:first]
+            if first < count:
+                rest = count - first
+                storage[:rest] = values[first:]
+                storage[self.capacity:self.capacity + rest] = values[first:]
+        self._size += count
+        return count
+
+    def push(self, records: list, start: int = 0) -> int:
+        """
+        JSON으로 받은 샘플(dict 리스트)을 기록하고 기록한 개수를 반환한다.
+        """
+        count = min(len(records) - start, self.free)
+        if count <= 0:
+            return 0
+        chunk = records[start:start + count]
+        return self.push_columns({name: [record[name] for record in chunk] for name in self.columns})
+
+    def window(self) -> dict:
+        """
+        가장 오래된 window_size 개 샘플을 채널별 view로 반환한다.
+        """
+        if not self.ready():
+            raise ValueError("Not enough samples for a window")
+        end = self._read + self.window_size
+        return {name: storage[self._read:end] for name, storage in self._storage.items()}
+
+    def advance(self, count: int = None) -> None:
+        count = self.hop_size if count is None else min(count, self._size)
+        self._read = (self._read + count) % self.capacity
+        self._size -= count
+
+    def clear(self) -> None:
+        self._read = 0
+        self._size = 0
@@ -0,0 +1,64 @@
+import struct
+import numpy as np
+
+# /wsbt 바이너리 프레임 형식 (모든 값은 little-endian)
+#
+# header (8 bytes)
+#   magic   : 2s   b"PS"
+#   version : u8   1
+#   (pad)   : 1 byte
+#   count   : u32  샘플 수
+#
+# sample record (40 bytes) x count
+#   time        : f8   epoch seconds
+#   ax, ay, az  : i4
+#   bcg         : i4
+#   gx, gy, gz  : i4
+#   temperature : f4
+#
+# JSON(senserData) 대비 샘플 당 약 1/3 크기이며, np.frombuffer 로 복사 없이 해석된다.
+FRAME_MAGIC = b"PS"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<2sBxI")
+
+FRAME_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("ax", "<i4"),
+    ("ay", "<i4"),
+    ("az", "<i4"),
+    ("bcg", "<i4"),
+    ("gx", "<i4"),
+    ("gy", "<i4"),
+    ("gz", "<i4"),
+    ("temperature", "<f4"),
+])
+
+class FrameError(ValueError):
+    pass
+
+def decode_sensor_frame(payload: bytes) -> dict:
+    """
+    바이너리 프레임을 채널별 배열 dict로 변환한다. (SensorRingBuffer.push_columns 입력 형식)
+    """
+    if len(payload) < FRAME_HEADER.size:
+        raise FrameError("Frame is shorter than the header")
+    magic, version, count = FRAME_HEADER.unpack_from(payload)
+    if magic != FRAME_MAGIC:
+        raise FrameError("Invalid frame magic")
+    if version != FRAME_VERSION:
+        raise FrameError(f"Unsupported frame version {version}")
+    if len(payload) != FRAME_HEADER.size + count * FRAME_DTYPE.itemsize:
+        raise FrameError("Frame length does not match sample count")
+
+    records = np.frombuffer(payload, dtype=FRAME_DTYPE, count=count, offset=FRAME_HEADER.size)
+    return {name: records[name] for name in FRAME_DTYPE.names}
+
+def encode_sensor_frame(columns: dict) -> bytes:
+    """
+    채널별 배열 dict를 바이너리 프레임으로 변환한다. (기기 시뮬레이터/테스트 용)
+    """
+    count = len(columns["time"])
+    records = np.empty(count, dtype=FRAME_DTYPE)
+    for name in FRAME_DTYPE.names:
+        records[name] = columns[name]
+    return FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, count) + records.tobytes()
@@ -0,0 +1,36 @@
+import os
+import numpy as np
+from typing import Optional
+from dotenv import load_dotenv
+from core.cache import TTLCache
+
+load_dotenv()
+
+# 강아지별 최신 시퀀스 캐시 (dogId -> (시퀀스 id, intensity, 시각 배열, 심박 배열))
+# run_first_model 이 새 시퀀스를 저장하면 갱신하고, /hearts 는 최신 id 만 확인해 같으면 캐시로 응답한다.
+# (SERVER_ROLE=api 처럼 다른 프로세스가 저장한 경우에도 id 가 다르면 DB 에서 다시 읽는다)
+LATEST_SEQUENCE_CACHE_TTL = float(os.getenv("LATEST_SEQUENCE_CACHE_TTL", 600))  # 초, 0 이면 사용 안 함
+LATEST_SEQUENCE_CACHE_SIZE = int(os.getenv("LATEST_SEQUENCE_CACHE_SIZE", 10000))
+latest_sequence_cache = TTLCache(LATEST_SEQUENCE_CACHE_SIZE if LATEST_SEQUENCE_CACHE_TTL > 0 else 0, LATEST_SEQUENCE_CACHE_TTL)
+
+def cache_latest_sequence(dog_id: int, sequence_id: int, intensity: int, bcgHeart: list[dict]) -> None:
+    # 응답 형식의 dict 목록 대신 배열로 보관 (강아지당 수 KB)
+    cached = latest_sequence_cache.get(dog_id)
+    if cached is not None and cached[0] > sequence_id:
+        return
+    times = np.fromiter((point["time"] for point in bcgHeart), dtype=float, count=len(bcgHeart))
+    hearts = np.fromiter((point["heart"] for point in bcgHeart), dtype=float, count=len(bcgHeart))
+    latest_sequence_cache.set(dog_id, (sequence_id, intensity, times, hearts))
+
+def get_cached_latest_sequence(dog_id: int, sequence_id: int) -> Optional[dict]:
+    """
+    캐시된 최신 시퀀스가 sequence_id 이면 /hearts 응답 내용을, 아니면 None 을 반환한다.
+    """
+    cached = latest_sequence_cache.get(dog_id)
+    if cached is None or cached[0] != sequence_id:
+        return None
+    _, intensity, times, hearts = cached
+    return {
+        "intensity": intensity,
+        "bcgData": [{"time": time, "heart": heart} for time, heart in zip(times.tolist(), hearts.tolist())]
+    }
@@ -0,0 +1,19 @@
+import base64
+import binascii
+
+# keyset 페이지네이션 커서 : 마지막으로 보낸 행의 (dogId, id) 를 감싼 불투명 문자열
+# 클라이언트는 응답의 nextCursor 를 그대로 다음 요청의 cursor 로 보낸다.
+
+def encode_cursor(dog_id: int, last_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{dog_id}:{last_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    """
+    (dogId, id) 를 반환한다. 형식이 잘못되었으면 ValueError.
+    """
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        dog_id, last_id = decoded.split(":")
+        return int(dog_id), int(last_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,91 @@
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 시간 기준 범위 파티션 (PostgreSQL 전용)
+# 파티션 경계는 UTC 기준이며 이름은 <테이블>_pYYYYMMDD (일 단위) / <테이블>_pYYYYMM (월 단위)
+#   <테이블>_legacy  : 파티션 전환 전의 기존 데이터 (MINVALUE ~ 첫 파티션 시작)
+#   <테이블>_default : 어떤 파티션에도 속하지 않는 시각의 데이터 (기기 시각 오류 등)
+
+# 테이블 -> (파티션 키, 파티션 단위)
+PARTITIONED_TABLES = {
+    "senseData": ("measureTime", "day"),
+    "bcgData": ("measureTime", "day"),
+    "bcgWaveform": ("startTime", "day"),
+    "sequence": ("startTime", "month"),
+}
+# 현재 시각 이후로 미리 만들어 둘 파티션 수
+PARTITION_PREMAKE = int(os.getenv("PARTITION_PREMAKE", 3))
+
+def period_start(value: datetime, period: str) -> datetime:
+    value = value.astimezone(timezone.utc)
+    if period == "day":
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def next_period(start: datetime, period: str) -> datetime:
+    if period == "day":
+        return start + timedelta(days=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def partition_name(table: str, start: datetime, period: str) -> str:
+    return f"{table}_p{start:%Y%m%d}" if period == "day" else f"{table}_p{start:%Y%m}"
+
+def is_partitioned(connection, table: str) -> bool:
+    return connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": f'"{table}"'}
+    ).scalar()
+
+def list_partitions(connection, table: str) -> list[tuple[str, datetime]]:
+    """
+    (파티션 이름, 상한 시각) 목록을 상한 순으로 반환한다. default 파티션의 상한은 None.
+    """
+    rows = connection.execute(text(
+        "SELECT c.relname, (regexp_match(pg_get_expr(c.relpartbound, c.oid), 'TO \\(''([^'']+)''\\)'))[1]::timestamptz "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table) AND c.relkind IN ('r', 'p')"
+    ), {"table": f'"{table}"'}).all()
+    return sorted(rows, key=lambda row: (row[1] is None, row[1]))
+
+def default_partition(table: str) -> str:
+    return f"{table}_default"
+
+def create_partition(connection, table: str, start: datetime, end: datetime) -> str:
+    """
+    [start, end) 파티션을 만든다. default 파티션에 이미 들어간 같은 구간의 행은 새 파티션으로 옮긴다.
+    """
+    key, period = PARTITIONED_TABLES[table]
+    name = partition_name(table, start, period)
+    default = default_partition(table)
+    connection.execute(text(f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS)'))
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": f'"{default}"'}).scalar():
+        connection.execute(text(
+            f'WITH moved AS (DELETE FROM "{default}" WHERE "{key}" >= :start AND "{key}" < :end RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ), {"start": start, "end": end})
+    connection.execute(text(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{name}" FOR VALUES FROM (\'{start.isoformat()}\') TO (\'{end.isoformat()}\')'
+    ))
+    return name
+
+def ensure_partitions(connection, table: str, now: datetime = None) -> list[str]:
+    """
+    마지막 파티션부터 현재 시각 이후 PARTITION_PREMAKE 개 구간까지 파티션을 만들고 만든 이름을 반환한다.
+    """
+    _, period = PARTITIONED_TABLES[table]
+    now = now or datetime.now(timezone.utc)
+    target = period_start(now, period)
+    for _ in range(PARTITION_PREMAKE + 1):
+        target = next_period(target, period)
+    uppers = [upper for _, upper in list_partitions(connection, table) if upper is not None]
+    start = max(uppers) if uppers else period_start(now, period)
+    created = []
+    while start < target:
+        end = next_period(start, period)
+        created.append(create_partition(connection, table, start, end))
+        start = end
+    return created
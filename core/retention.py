@@ -0,0 +1,204 @@
+# 파티션 관리 작업 : 앞으로 사용할 파티션을 미리 만들고, 보존 기간이 지난 원본 파티션은 요약 테이블로 다운샘플링한 뒤 삭제
+# 실행 : python -m core.retention (서버에서는 PARTITION_MAINTENANCE_INTERVAL 마다 자동 실행)
+#   senseData, bcgData, bcgWaveform : RAW_RETENTION_DAYS 이후 1초 단위 요약 (senseDataSummary, bcgSummary)
+#   sequence                        : SEQUENCE_RETENTION_DAYS 이후 1분 단위 요약 (sequenceSummary)
+import os
+import asyncio
+import logging
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from dotenv import load_dotenv
+from core.partitions import PARTITIONED_TABLES, list_partitions, ensure_partitions, is_partitioned
+from core.waveform import unpack_waveform
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# 보존 기간 (일), 0 이면 삭제하지 않음
+RAW_RETENTION_DAYS = int(os.getenv("RAW_RETENTION_DAYS", 30))
+SEQUENCE_RETENTION_DAYS = int(os.getenv("SEQUENCE_RETENTION_DAYS", 365))
+# 서버 내 자동 실행 간격 (초), 0 이면 자동 실행하지 않음 (cron 등에서 python -m core.retention 실행)
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", 3600))
+# 여러 워커 중 하나만 실행되도록 사용하는 advisory lock 키
+MAINTENANCE_LOCK_KEY = 7240518
+# bcgWaveform 다운샘플링 시 한 번에 읽는 행 수
+WAVEFORM_BATCH_SIZE = 1000
+
+RETENTION_DAYS = {
+    "senseData": RAW_RETENTION_DAYS,
+    "bcgData": RAW_RETENTION_DAYS,
+    "bcgWaveform": RAW_RETENTION_DAYS,
+    "sequence": SEQUENCE_RETENTION_DAYS,
+}
+
+# 요약 테이블 : 키, 개수, 평균/최소/최대/합계 컬럼 (같은 구간이 다시 들어오면 개수 기준으로 합친다)
+SUMMARIES = {
+    "senseDataSummary": dict(
+        keys=("dogId", "measureTime"), count="sampleCount",
+        means=("ax", "ay", "az", "gx", "gy", "gz", "bcg", "temperature"), mins=("bcgMin",), maxs=("bcgMax",), sums=(),
+    ),
+    "bcgSummary": dict(
+        keys=("dogId", "measureTime"), count="sampleCount",
+        means=("heart", "respiration"), mins=("heartMin", "respirationMin"), maxs=("heartMax", "respirationMax"), sums=(),
+    ),
+    "sequenceSummary": dict(
+        keys=("dogId", "startTime"), count="sequenceCount",
+        means=("heartRate", "respirationRate"), mins=("heartRateMin", "respirationRateMin"),
+        maxs=("heartRateMax", "respirationRateMax", "intensityMax"), sums=("anomalyCount", "exercise"),
+    ),
+}
+
+# 원본 테이블 -> (요약 테이블, 요약 SELECT) : 원본 별칭은 r, {source} 는 파티션 이름, {where} 는 추가 조건
+DOWNSAMPLE = {
+    "senseData": ("senseDataSummary", """
+        SELECT r."dogId", date_trunc('second', r."measureTime"), count(*),
+               avg(r.ax), avg(r.ay), avg(r.az), avg(r.gx), avg(r.gy), avg(r.gz), avg(r.bcg), avg(r.temperature), min(r.bcg), max(r.bcg)
+        FROM "{source}" r WHERE r."dogId" IS NOT NULL {where}
+        GROUP BY 1, 2"""),
+    "bcgData": ("bcgSummary", """
+        SELECT s."dogId", date_trunc('second', r."measureTime"), count(*),
+               avg(r.heart), avg(r.respiration), min(r.heart), min(r.respiration), max(r.heart), max(r.respiration)
+        FROM "{source}" r JOIN "sequence" s ON s.id = r."sequenceId" WHERE s."dogId" IS NOT NULL {where}
+        GROUP BY 1, 2"""),
+    "sequence": ("sequenceSummary", """
+        SELECT r."dogId", date_trunc('minute', r."startTime"), count(*),
+               avg(r."heartRate"), avg(r."respirationRate"), min(r."heartRate"), min(r."respirationRate"),
+               max(r."heartRate"), max(r."respirationRate"), max(r.intentsity), sum(r."heartAnomoly"), sum(r.excercise)
+        FROM "{source}" r WHERE r."dogId" IS NOT NULL {where}
+        GROUP BY 1, 2"""),
+}
+
+def summary_columns(summary: str) -> list[str]:
+    spec = SUMMARIES[summary]
+    return [*spec["keys"], spec["count"], *spec["means"], *spec["mins"], *spec["maxs"], *spec["sums"]]
+
+def upsert_summary_sql(summary: str, select: str) -> str:
+    spec = SUMMARIES[summary]
+    count = f'"{spec["count"]}"'
+    merged = [f'{count} = old.{count} + excluded.{count}']
+    merged += [
+        f'"{column}" = (old."{column}" * old.{count} + excluded."{column}" * excluded.{count}) / (old.{count} + excluded.{count})'
+        for column in spec["means"]
+    ]
+    merged += [f'"{column}" = least(old."{column}", excluded."{column}")' for column in spec["mins"]]
+    merged += [f'"{column}" = greatest(old."{column}", excluded."{column}")' for column in spec["maxs"]]
+    merged += [f'"{column}" = old."{column}" + excluded."{column}"' for column in spec["sums"]]
+    columns = ", ".join(f'"{column}"' for column in summary_columns(summary))
+    keys = ", ".join(f'"{key}"' for key in spec["keys"])
+    return f'INSERT INTO "{summary}" AS old ({columns}) {select} ON CONFLICT ({keys}) DO UPDATE SET {", ".join(merged)}'
+
+def downsample_waveforms(connection, source: str, where: str = "", params: dict = None) -> None:
+    # float32 배열은 SQL 로 풀 수 없으므로 묶음 단위로 읽어 numpy 로 1초 단위 요약
+    result = connection.execute(text(
+        f'SELECT s."dogId", r."startTime", r."sampleRate", r."sampleCount", r.samples '
+        f'FROM "{source}" r JOIN "sequence" s ON s.id = r."sequenceId" WHERE s."dogId" IS NOT NULL {where}'
+    ).execution_options(stream_results=True), params or {})
+    select = "SELECT * FROM unnest(:dogId, :measureTime, :sampleCount, :heart, :respiration, :heartMin, :respirationMin, :heartMax, :respirationMax)"
+    upsert = text(upsert_summary_sql("bcgSummary", select))
+    while True:
+        rows = result.fetchmany(WAVEFORM_BATCH_SIZE)
+        if not rows:
+            break
+        dogIds, seconds, hearts, respirations = [], [], [], []
+        for dogId, startTime, sampleRate, sampleCount, samples in rows:
+            heart, respiration = unpack_waveform(samples, sampleCount)
+            times = startTime.timestamp() + np.arange(sampleCount) / sampleRate
+            dogIds.append(np.full(sampleCount, dogId))
+            seconds.append(np.floor(times))
+            hearts.append(heart)
+            respirations.append(respiration)
+        dogIds, seconds = np.concatenate(dogIds), np.concatenate(seconds)
+        hearts, respirations = np.concatenate(hearts).astype(float), np.concatenate(respirations).astype(float)
+        # (dogId, 초) 로 정렬한 뒤 구간별 집계
+        order = np.lexsort((seconds, dogIds))
+        dogIds, seconds, hearts, respirations = dogIds[order], seconds[order], hearts[order], respirations[order]
+        starts = np.flatnonzero(np.r_[True, (dogIds[1:] != dogIds[:-1]) | (seconds[1:] != seconds[:-1])])
+        counts = np.diff(np.r_[starts, len(seconds)])
+        connection.execute(upsert, {
+            "dogId": dogIds[starts].tolist(),
+            "measureTime": [datetime.fromtimestamp(second, timezone.utc) for second in seconds[starts].tolist()],
+            "sampleCount": counts.tolist(),
+            "heart": (np.add.reduceat(hearts, starts) / counts).tolist(),
+            "respiration": (np.add.reduceat(respirations, starts) / counts).tolist(),
+            "heartMin": np.minimum.reduceat(hearts, starts).tolist(),
+            "respirationMin": np.minimum.reduceat(respirations, starts).tolist(),
+            "heartMax": np.maximum.reduceat(hearts, starts).tolist(),
+            "respirationMax": np.maximum.reduceat(respirations, starts).tolist(),
+        })
+
+def downsample(connection, table: str, source: str, where: str = "", params: dict = None) -> None:
+    if table == "bcgWaveform":
+        downsample_waveforms(connection, source, where, params)
+        return
+    summary, select = DOWNSAMPLE[table]
+    connection.execute(text(upsert_summary_sql(summary, select.format(source=source, where=where))), params or {})
+
+def expire_partitions(connection, table: str, now: datetime) -> list[str]:
+    """
+    상한이 보존 기준 시각 이전인 파티션을 요약 후 삭제하고, default 파티션의 오래된 행도 요약 후 삭제한다.
+    삭제한 파티션 이름을 반환한다.
+    """
+    days = RETENTION_DAYS[table]
+    if days <= 0:
+        return []
+    key, _ = PARTITIONED_TABLES[table]
+    cutoff = now - timedelta(days=days)
+    dropped = []
+    for name, upper in list_partitions(connection, table):
+        if upper is None:
+            downsample(connection, table, name, f'AND r."{key}" < :cutoff', {"cutoff": cutoff})
+            connection.execute(text(f'DELETE FROM "{name}" WHERE "{key}" < :cutoff'), {"cutoff": cutoff})
+        elif upper <= cutoff:
+            downsample(connection, table, name)
+            connection.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+    return dropped
+
+def run_partition_maintenance(bind=None, now: datetime = None) -> dict:
+    """
+    파티션 생성과 보존 기간 처리를 테이블마다 하나의 트랜잭션으로 실행한다.
+    다른 워커가 실행 중이거나 PostgreSQL 이 아니면 아무것도 하지 않는다.
+    반환값 : {테이블: {"created": [...], "dropped": [...]}}
+    """
+    if bind is None:
+        from database import engine as bind
+    now = now or datetime.now(timezone.utc)
+    summary = {}
+    with bind.connect() as connection:
+        if connection.dialect.name != "postgresql":
+            return summary
+        locked = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}).scalar()
+        connection.commit()
+        if not locked:
+            return summary
+        try:
+            # 요약은 sequence 에서 dogId 를 찾으므로 bcgData/bcgWaveform 을 sequence 보다 먼저 처리
+            for table in ("senseData", "bcgData", "bcgWaveform", "sequence"):
+                with connection.begin():
+                    if not is_partitioned(connection, table):
+                        continue
+                    created = ensure_partitions(connection, table, now)
+                    dropped = expire_partitions(connection, table, now)
+                summary[table] = {"created": created, "dropped": dropped}
+                if created or dropped:
+                    logger.info(f"Partition maintenance {table}: created {created}, dropped {dropped}")
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+            connection.commit()
+    return summary
+
+async def partition_maintenance_loop(interval: float = PARTITION_MAINTENANCE_INTERVAL) -> None:
+    # 서버 시작 시 한 번, 이후 interval 초마다 실행 (이벤트 루프를 막지 않도록 스레드풀 사용)
+    while True:
+        try:
+            await run_in_threadpool(run_partition_maintenance)
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}")
+        await asyncio.sleep(interval)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(run_partition_maintenance())
@@ -0,0 +1,81 @@
+import os
+import pytz
+from datetime import datetime, timezone
+from sqlalchemy import case
+from sqlalchemy.dialects import postgresql, sqlite
+from dotenv import load_dotenv
+import models
+
+load_dotenv()
+
+# 강아지별 시간/일 단위 건강 지표 집계 (healthRollup)
+# 시퀀스를 저장할 때 같은 트랜잭션에서 해당 시간/일 구간에 더한다. (crud.create_sequence*)
+ROLLUP_PERIODS = ("hour", "day")
+# 구간 경계 기준 시간대 (일 단위 구간은 이 시간대의 자정부터 시작)
+ROLLUP_TIMEZONE = pytz.timezone(os.getenv("ROLLUP_TIMEZONE", "Asia/Seoul"))
+# 활동 강도(intentsity) 단계 수 : 0 ~ 3
+INTENSITY_LEVELS = 4
+
+def bucket_start(time: datetime, period: str) -> datetime:
+    # 구간 시작 시각 (UTC 로 반환 : 시간대를 저장하지 않는 SQLite 에서도 같은 시각으로 읽힌다)
+    local = time.astimezone(ROLLUP_TIMEZONE)
+    if period == "hour":
+        start = datetime(local.year, local.month, local.day, local.hour)
+    else:
+        start = datetime(local.year, local.month, local.day)
+    return ROLLUP_TIMEZONE.localize(start).astimezone(timezone.utc)
+
+def rollup_values(sequence: models.Sequence) -> list[dict]:
+    # 시퀀스 하나를 구간마다 한 행으로 변환
+    values = {
+        "dogId": sequence.dogId,
+        "sequenceCount": 1,
+        "heartRateMin": sequence.heartRate,
+        "heartRateMax": sequence.heartRate,
+        "heartRateSum": sequence.heartRate,
+        "respirationRateMin": sequence.respirationRate,
+        "respirationRateMax": sequence.respirationRate,
+        "respirationRateSum": sequence.respirationRate,
+        "anomalyCount": 1 if sequence.heartAnomoly else 0,
+        "exercise": sequence.excercise,
+    }
+    for level in range(INTENSITY_LEVELS):
+        values[f"intensity{level}"] = 1 if sequence.intentsity == level else 0
+    return [
+        {**values, "period": period, "bucketStart": bucket_start(sequence.startTime, period)}
+        for period in ROLLUP_PERIODS
+    ]
+
+def health_rollup_upsert(dialect_name: str, values: list[dict]):
+    """
+    healthRollup 에 values 를 더하는 INSERT ... ON CONFLICT DO UPDATE 문 (PostgreSQL / SQLite)
+    """
+    rollup = models.HealthRollup
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = insert(rollup).values(values)
+    excluded = statement.excluded
+    counts = ["sequenceCount", "heartRateSum", "respirationRateSum", "anomalyCount", "exercise"]
+    counts += [f"intensity{level}" for level in range(INTENSITY_LEVELS)]
+    merged = {name: getattr(rollup, name) + getattr(excluded, name) for name in counts}
+    for name in ("heartRateMin", "respirationRateMin"):
+        merged[name] = case((getattr(excluded, name) < getattr(rollup, name), getattr(excluded, name)), else_=getattr(rollup, name))
+    for name in ("heartRateMax", "respirationRateMax"):
+        merged[name] = case((getattr(excluded, name) > getattr(rollup, name), getattr(excluded, name)), else_=getattr(rollup, name))
+    return statement.on_conflict_do_update(index_elements=[rollup.dogId, rollup.period, rollup.bucketStart], set_=merged)
+
+def rollup_response(rollup: models.HealthRollup) -> dict:
+    # API 응답 형식 (평균은 합계 / 시퀀스 수)
+    count = rollup.sequenceCount
+    return {
+        "startTime": rollup.bucketStart.timestamp(),
+        "sequenceCount": count,
+        "heartRateMin": rollup.heartRateMin,
+        "heartRateMax": rollup.heartRateMax,
+        "heartRateMean": rollup.heartRateSum / count,
+        "respirationRateMin": rollup.respirationRateMin,
+        "respirationRateMax": rollup.respirationRateMax,
+        "respirationRateMean": rollup.respirationRateSum / count,
+        "anomalyCount": rollup.anomalyCount,
+        "exercise": rollup.exercise,
+        "intensityHistogram": [getattr(rollup, f"intensity{level}") for level in range(INTENSITY_LEVELS)],
+    }
@@ -3,11 +3,20 @@ from typing import Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import os
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pytz import timezone
 from dotenv import load_dotenv
+from core.cache import TTLCache
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Secret key to encode and decode JWT
 SECRET_KEY = os.getenv("JWT_KEY")
 if not SECRET_KEY:
@@ -16,6 +25,14 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# 검증된 access token 캐시 크기, 거부된 토큰을 기억하는 시간(초)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+TOKEN_REJECT_CACHE_TTL = float(os.getenv("TOKEN_REJECT_CACHE_TTL", 60))
+
+# bcrypt 해시/검증 전용 스레드 수, 실행 중인 작업 외에 대기할 수 있는 작업 수 (초과 시 503)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -24,6 +41,88 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+class PasswordHashBusy(Exception):
+    pass
+
+class PasswordHashExecutor:
+    """
+    bcrypt(약 200ms)를 이벤트 루프 밖의 전용 스레드풀에서 실행한다.
+    동시에 실행되는 작업은 workers 개로 제한되고, 대기 작업이 max_queue 개를 넘으면 PasswordHashBusy를 발생시킨다.
+    bcrypt는 해시 계산 중 GIL을 해제하므로 다른 요청 처리와 병렬로 실행된다.
+    """
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = None
+        self._pending = 0  # 실행 중 + 대기 중 (이벤트 루프에서만 변경)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._pool
+
+    def _record(self, queue_wait: float, latency: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.total_queue_wait += queue_wait
+            self.max_queue_wait = max(self.max_queue_wait, queue_wait)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    async def run(self, func, *args):
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            logger.warning(f"Password hash queue is full ({self._pending} pending)")
+            raise PasswordHashBusy("Password hash queue is full")
+
+        submitted = time.perf_counter()
+        def timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self._record(started - submitted, time.perf_counter() - started)
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, timed)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            completed = self.completed
+            return {
+                "pending": self._pending,
+                "completed": completed,
+                "rejected": self.rejected,
+                "avgLatencyMs": self.total_latency / completed * 1e3 if completed else 0.0,
+                "maxLatencyMs": self.max_latency * 1e3,
+                "avgQueueWaitMs": self.total_queue_wait / completed * 1e3 if completed else 0.0,
+                "maxQueueWaitMs": self.max_queue_wait * 1e3,
+            }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+password_hasher = PasswordHashExecutor()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -50,4 +149,83 @@ def decode_refresh_token(token: str) -> Union[dict, None]:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+class TokenCache:
+    """
+    access token 검증 결과 캐시.
+
+    검증에 성공한 토큰은 토큰 해시 -> (sub, exp) 로 exp 까지 보관하고 (LRU, 최대 maxsize 개),
+    거부된 토큰은 reject_ttl 초 동안 기억해 같은 토큰을 다시 디코딩하지 않는다.
+    invalidate_subject()는 해당 sub의 캐시 항목만 버린다 (Refresh Token 삭제 시).
+    토큰을 폐기하지는 않으므로 다음 decode()에서 다시 디코딩되어 캐시 없이 검증할 때와 같이 exp 까지 유효하다.
+    """
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE, reject_ttl: float = TOKEN_REJECT_CACHE_TTL):
+        max_ttl = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        self.verified = TTLCache(maxsize, max_ttl)
+        self.rejected = TTLCache(maxsize, reject_ttl)
+        # sub -> 무효화 시각 : 이 시각 이전에 캐시된 항목은 버리고 다시 디코딩한다
+        self.invalidated = TTLCache(maxsize, max_ttl)
+        self.hits = 0
+        self.misses = 0
+        self.rejected_hits = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def decode(self, token: str) -> Union[dict, None]:
+        """
+        decode_access_token 과 같지만 캐시를 사용한다. 캐시 적중 시 {"sub", "exp"} 만 반환한다.
+        """
+        if not token:
+            return None
+        key = self.key(token)
+        entry = self.verified.get(key)
+        if entry is not None:
+            sub, exp, cached_at = entry
+            invalidated_at = self.invalidated.get(sub)
+            if exp > time.time() and (invalidated_at is None or invalidated_at < cached_at):
+                self._count("hits")
+                return {"sub": sub, "exp": exp}
+            self.verified.invalidate(key)
+        elif self.rejected.get(key) is not None:
+            self._count("rejected_hits")
+            return None
+
+        self._count("misses")
+        payload = decode_access_token(token)
+        if not payload:
+            self.rejected.set(key, True)
+            return None
+        exp = payload.get("exp")
+        if exp is not None:
+            self.verified.set(key, (payload.get("sub"), exp, time.monotonic()), ttl=exp - time.time())
+        return payload
+
+    def invalidate_subject(self, sub: str) -> None:
+        if sub:
+            self.invalidated.set(sub, time.monotonic())
+
+    def invalidate_refresh_token(self, refresh_token: str) -> None:
+        # 삭제된 Refresh Token의 sub (만료된 토큰일 수 있으므로 서명/만료 검증 없이 읽음)
+        try:
+            self.invalidate_subject(jwt.get_unverified_claims(refresh_token).get("sub"))
+        except JWTError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejectedHits": self.rejected_hits,
+            "verifiedSize": len(self.verified),
+            "rejectedSize": len(self.rejected),
+        }
+
+token_cache = TokenCache()
@@ -0,0 +1,45 @@
+import os
+import numpy as np
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 분석 결과 BCG 파형 저장 방식
+#   rows     : bcgData 테이블에 샘플마다 한 행 (기존 방식)
+#   waveform : bcgWaveform 테이블에 시퀀스마다 한 행, 아래 형식의 float32 배열
+# 조회는 저장 방식과 관계없이 bcgWaveform 을 먼저 찾고 없으면 bcgData 를 읽는다.
+BCG_STORAGE = os.getenv("BCG_STORAGE", "rows")
+
+# bcgWaveform.samples 형식 (little-endian float32, 채널 순서로 연속 저장)
+#   heart[0..n) + respiration[0..n)
+# 샘플 i 의 측정 시각 = startTime + i / sampleRate
+WAVEFORM_DTYPE = np.dtype("<f4")
+WAVEFORM_CHANNELS = ("heart", "respiration")
+DEFAULT_SAMPLE_RATE = 100.0
+
+def pack_waveform(heart, respiration) -> bytes:
+    samples = np.asarray([heart, respiration], dtype=WAVEFORM_DTYPE)
+    return samples.tobytes()
+
+def unpack_waveform(samples: bytes, sampleCount: int) -> np.ndarray:
+    """
+    (채널, 샘플) 배열로 변환한다. 복사 없이 읽기 전용 view 를 반환한다.
+    """
+    return np.frombuffer(samples, dtype=WAVEFORM_DTYPE, count=len(WAVEFORM_CHANNELS) * sampleCount).reshape(len(WAVEFORM_CHANNELS), sampleCount)
+
+def estimate_sample_rate(measureTimes: list[datetime]) -> float:
+    # 첫/마지막 측정 시각으로 평균 샘플링 주기 계산 (기기 시각이 불규칙해도 시퀀스 길이는 유지)
+    if len(measureTimes) < 2:
+        return DEFAULT_SAMPLE_RATE
+    duration = (measureTimes[-1] - measureTimes[0]).total_seconds()
+    return (len(measureTimes) - 1) / duration if duration > 0 else DEFAULT_SAMPLE_RATE
+
+def waveform_times(startTime: datetime, sampleRate: float, sampleCount: int) -> np.ndarray:
+    # 각 샘플의 epoch 초
+    return startTime.timestamp() + np.arange(sampleCount) / sampleRate
+
+def waveform_heart_points(startTime: datetime, sampleRate: float, heart) -> list[dict]:
+    # 클라이언트 전송 형식 [{"time": epoch, "heart": float}, ...]
+    times = waveform_times(startTime, sampleRate, len(heart))
+    return [{"time": time, "heart": value} for time, value in zip(times.tolist(), np.asarray(heart).tolist())]
@@ -1,8 +1,12 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import and_, insert, delete
 import models, schemas
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
+from typing import Optional
+from core.security import token_cache
+from core.waveform import pack_waveform, unpack_waveform, waveform_heart_points
+from core.rollup import rollup_values, health_rollup_upsert
 
 # User CRUD
 def get_user(db: Session, user_id: int) -> models.User:
@@ -114,11 +118,16 @@ def get_refresh_token(db: Session, token_id: int) -> models.RefreshToken:
 
 def delete_refresh_token(db: Session, token_id: int) -> None:
     try:
-        db.query(models.RefreshToken).filter(models.RefreshToken.id == token_id).delete()
+        tokens = db.execute(
+            delete(models.RefreshToken).where(models.RefreshToken.id == token_id).returning(models.RefreshToken.token)
+        ).scalars().all()
         db.commit()
     except SQLAlchemyError as e:
         db.rollback()
         raise Exception(f"Database error: {str(e)}")
+    # 해당 사용자의 access token 검증 캐시 항목만 삭제 (토큰 폐기는 아님, 다음 요청에서 다시 디코딩해 exp 까지 유효)
+    for token in tokens:
+        token_cache.invalidate_refresh_token(token)
     
 def get_refresh_token_by_user(db: Session, user_id: int) -> models.RefreshToken:
     try:
@@ -126,10 +135,17 @@ def get_refresh_token_by_user(db: Session, user_id: int) -> models.RefreshToken:
     except SQLAlchemyError as e:
         raise Exception(f"Database error: {str(e)}")
 
+# 시퀀스를 시간/일 단위 건강 지표 집계에 더한다 (core.rollup), 호출한 쪽의 트랜잭션에서 함께 커밋
+def add_to_health_rollups(db: Session, db_sequence: models.Sequence) -> None:
+    if db_sequence.dogId is None:
+        return
+    db.execute(health_rollup_upsert(db.get_bind().dialect.name, rollup_values(db_sequence)))
+
 # Sequence CRUD
 def create_sequence(db: Session, sequence: schemas.SequenceCreate) -> models.Sequence:
     db_sequence = models.Sequence(**sequence.dict())
     db.add(db_sequence)
+    add_to_health_rollups(db, db_sequence)
     db.commit()
     db.refresh(db_sequence)
     return db_sequence
@@ -145,8 +161,59 @@ def create_bcgdata(db: Session, bcgdata: schemas.BcgdataCreate) -> models.Bcgdat
     db.refresh(db_bcgdata)
     return db_bcgdata
 
-def get_bcgdata_by_sequence(db: Session, sequence_id: int) -> list[models.Bcgdata]:
-    return db.query(models.Bcgdata).filter(models.Bcgdata.sequenceId == sequence_id).all()
+# 시퀀스와 해당 시퀀스의 BCG 데이터를 하나의 트랜잭션으로 저장
+# bcgdatas : [{"measureTime": datetime, "heart": float, "respiration": float}, ...]
+def create_sequence_with_bcgdata(db: Session, sequence: schemas.SequenceCreate, bcgdatas: list[dict]) -> models.Sequence:
+    db_sequence = models.Sequence(**sequence.dict())
+    try:
+        db.add(db_sequence)
+        db.flush()  # sequence id 확보
+        if bcgdatas:
+            # executemany -> 다중 행 INSERT 로 묶어서 실행
+            db.execute(
+                insert(models.Bcgdata),
+                [{"sequenceId": db_sequence.id, **bcgdata} for bcgdata in bcgdatas]
+            )
+        add_to_health_rollups(db, db_sequence)
+        db.commit()
+        db.refresh(db_sequence)
+        return db_sequence
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+
+# 시퀀스와 해당 시퀀스의 BCG 파형(float32 배열 한 행)을 하나의 트랜잭션으로 저장
+# heart/respiration : 같은 길이의 샘플 배열, 샘플 i 의 시각 = startTime + i / sampleRate
+def create_sequence_with_waveform(db: Session, sequence: schemas.SequenceCreate, startTime: datetime, sampleRate: float, heart, respiration) -> models.Sequence:
+    db_sequence = models.Sequence(**sequence.dict())
+    try:
+        db.add(db_sequence)
+        db.flush()  # sequence id 확보
+        db.add(models.BcgWaveform(
+            sequenceId=db_sequence.id,
+            startTime=startTime,
+            sampleRate=sampleRate,
+            sampleCount=len(heart),
+            samples=pack_waveform(heart, respiration)
+        ))
+        add_to_health_rollups(db, db_sequence)
+        db.commit()
+        db.refresh(db_sequence)
+        return db_sequence
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise Exception(f"Database error: {str(e)}")
+
+# 시각(파티션 키) 조건을 함께 주어 시퀀스 구간의 파티션만 읽음 (sequenceId 만으로는 모든 파티션을 확인함)
+# 파형의 startTime 은 시퀀스의 startTime 과 같다 (routers.webSocket.save_analysis_result)
+def get_bcg_waveform(db: Session, sequence: models.Sequence) -> models.BcgWaveform:
+    try:
+        return db.query(models.BcgWaveform).filter(
+            models.BcgWaveform.sequenceId == sequence.id,
+            models.BcgWaveform.startTime == sequence.startTime
+        ).first()
+    except SQLAlchemyError as e:
+        raise Exception(f"Database error: {str(e)}")
 
 # TargetExercise CRUD
 def create_target_exercise(db: Session, target_exercise: schemas.TargetExerciseCreate) -> models.TargetExercise:
@@ -215,9 +282,41 @@ def get_sequences_by_dog(db: Session, dog_id: int) -> list[models.Sequence]:
 def get_sequences_asc_by_dog(db: Session, dog_id: int) -> list[models.Sequence]:
     return db.query(models.Sequence).filter(models.Sequence.dogId == dog_id).order_by(models.Sequence.id.asc()).all()
 
-# 특정 시퀀스와 연관된 BCG 데이터를 조회하는 함수
-def get_bcgdata_by_sequence(db: Session, sequence_id: int) -> list[models.Bcgdata]:
-    return db.query(models.Bcgdata).filter(models.Bcgdata.sequenceId == sequence_id).order_by(models.Bcgdata.id.asc()).all()
+# 특정 시퀀스와 연관된 BCG 데이터를 조회하는 함수 (시퀀스 구간 measureTime 조건으로 해당 파티션만 읽음)
+def get_bcgdata_by_sequence(db: Session, sequence: models.Sequence) -> list[models.Bcgdata]:
+    return db.query(models.Bcgdata).filter(
+        models.Bcgdata.sequenceId == sequence.id,
+        models.Bcgdata.measureTime.between(sequence.startTime, sequence.endTime)
+    ).order_by(models.Bcgdata.id.asc()).all()
+
+# 특정 시퀀스의 심박 파형을 [{"time": epoch, "heart": float}, ...] 로 조회 (파형 저장 방식이 없으면 행 단위 데이터 사용)
+def get_bcg_heart_by_sequence(db: Session, sequence: models.Sequence) -> list[dict]:
+    waveform = get_bcg_waveform(db, sequence)
+    if waveform:
+        heart = unpack_waveform(waveform.samples, waveform.sampleCount)[0]
+        return waveform_heart_points(waveform.startTime, waveform.sampleRate, heart)
+    return [{"time": bcg.measureTime.timestamp(), "heart": bcg.heart} for bcg in get_bcgdata_by_sequence(db, sequence)]
+
+# 특정 강아지의 최신 시퀀스 id (ix_sequence_dogId_id 의 첫 항목만 읽음), 없으면 None
+def get_latest_sequence_id(db: Session, dog_id: int) -> Optional[int]:
+    return db.query(models.Sequence.id).filter(models.Sequence.dogId == dog_id).order_by(models.Sequence.id.desc()).limit(1).scalar()
+
+# 특정 강아지의 최신 시퀀스와 심박 파형을 조회 (ORDER BY id DESC LIMIT 1 + bcgWaveform 조인), 없으면 (None, [])
+# 조인 조건에 startTime 을 포함해 bcgWaveform 은 시퀀스 시각의 파티션만 읽음
+def get_latest_sequence_with_heart(db: Session, dog_id: int) -> tuple[Optional[models.Sequence], list[dict]]:
+    sequence = db.query(models.Sequence).outerjoin(models.BcgWaveform, and_(
+        models.BcgWaveform.sequenceId == models.Sequence.id,
+        models.BcgWaveform.startTime == models.Sequence.startTime
+    )).options(contains_eager(models.Sequence.waveform)).filter(
+        models.Sequence.dogId == dog_id
+    ).order_by(models.Sequence.id.desc()).limit(1).first()
+    if sequence is None:
+        return None, []
+    waveform = sequence.waveform
+    if waveform:
+        heart = unpack_waveform(waveform.samples, waveform.sampleCount)[0]
+        return sequence, waveform_heart_points(waveform.startTime, waveform.sampleRate, heart)
+    return sequence, [{"time": bcg.measureTime.timestamp(), "heart": bcg.heart} for bcg in get_bcgdata_by_sequence(db, sequence)]
 
 # 특정 강아지의 최근 시퀀스 100개를 조회하는 함수
 def get_recent_sequences(db: Session, dog_id: int) -> list[models.Sequence]:
@@ -227,6 +326,19 @@ def get_recent_sequences(db: Session, dog_id: int) -> list[models.Sequence]:
         models.Sequence.id.desc()
     ).limit(100).all()
 
+# 강아지의 시퀀스를 최신순(id 내림차순)으로 한 페이지 조회 (keyset : before_id 보다 작은 id, ix_sequence_dogId_id 사용)
+# start, end 는 startTime 범위 [start, end), None 이면 제한 없음
+def get_sequence_page(db: Session, dog_id: int, limit: int, before_id: Optional[int] = None,
+                      start: Optional[datetime] = None, end: Optional[datetime] = None) -> list[models.Sequence]:
+    query = db.query(models.Sequence).filter(models.Sequence.dogId == dog_id)
+    if before_id is not None:
+        query = query.filter(models.Sequence.id < before_id)
+    if start is not None:
+        query = query.filter(models.Sequence.startTime >= start)
+    if end is not None:
+        query = query.filter(models.Sequence.startTime < end)
+    return query.order_by(models.Sequence.id.desc()).limit(limit).all()
+
 def check_heart_anomaly(db: Session, user_id: int, checkSequence: int, anomalyCount: int) -> bool:
     dog = get_dog_by_user(db, user_id)
     if dog:
@@ -243,4 +355,35 @@ def check_heart_anomaly(db: Session, user_id: int, checkSequence: int, anomalyCo
         else:
             return False
     else:
-        return False
\ No newline at end of file
+        return False
+
+# 보존 기간이 지나 요약된 데이터 조회 (core.retention), [start, end) 구간을 시간 순으로 반환
+def get_sense_data_summaries(db: Session, dog_id: int, start: datetime, end: datetime) -> list[models.SenseDataSummary]:
+    return db.query(models.SenseDataSummary).filter(
+        models.SenseDataSummary.dogId == dog_id,
+        models.SenseDataSummary.measureTime >= start,
+        models.SenseDataSummary.measureTime < end
+    ).order_by(models.SenseDataSummary.measureTime.asc()).all()
+
+def get_bcg_summaries(db: Session, dog_id: int, start: datetime, end: datetime) -> list[models.BcgSummary]:
+    return db.query(models.BcgSummary).filter(
+        models.BcgSummary.dogId == dog_id,
+        models.BcgSummary.measureTime >= start,
+        models.BcgSummary.measureTime < end
+    ).order_by(models.BcgSummary.measureTime.asc()).all()
+
+def get_sequence_summaries(db: Session, dog_id: int, start: datetime, end: datetime) -> list[models.SequenceSummary]:
+    return db.query(models.SequenceSummary).filter(
+        models.SequenceSummary.dogId == dog_id,
+        models.SequenceSummary.startTime >= start,
+        models.SequenceSummary.startTime < end
+    ).order_by(models.SequenceSummary.startTime.asc()).all()
+
+# 시간('hour')/일('day') 단위 건강 지표 집계를 [start, end) 구간에서 시간 순으로 조회
+def get_health_rollups(db: Session, dog_id: int, period: str, start: datetime, end: datetime) -> list[models.HealthRollup]:
+    return db.query(models.HealthRollup).filter(
+        models.HealthRollup.dogId == dog_id,
+        models.HealthRollup.period == period,
+        models.HealthRollup.bucketStart >= start,
+        models.HealthRollup.bucketStart < end
+    ).order_by(models.HealthRollup.bucketStart.asc()).all()
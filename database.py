@@ -1,5 +1,6 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
@@ -10,12 +11,41 @@ db_user = os.getenv("DB_USER")
 db_password = os.getenv("DB_PASSWORD")
 db_host = os.getenv("DB_HOST")
 
+# 커넥션 풀 설정 (동기/비동기 엔진 공통)
+db_pool_size = int(os.getenv("DB_POOL_SIZE", 10))
+db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", 20))
+db_pool_timeout = int(os.getenv("DB_POOL_TIMEOUT", 30))
+db_pool_recycle = int(os.getenv("DB_POOL_RECYCLE", 1800))  # 초, 서버/방화벽의 유휴 연결 종료 대비
+db_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# asyncpg prepared statement 캐시 크기 (연결 당, 0 이면 사용 안 함 - pgbouncer transaction 모드 등)
+# SQLAlchemy asyncpg 드라이버는 쿼리마다 connection.prepare() 를 사용하므로 이 캐시(URL 의 prepared_statement_cache_size)가
+# 실제로 쓰이는 캐시이고, asyncpg 자체의 statement_cache_size 는 따로 설정하지 않는다.
+db_statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+
 SQLALCHEMY_DATABASE_URL = f"postgresql://{db_user}:{db_password}@{db_host}:5432/{db_name}" # 로컬 용
 #SQLALCHEMY_DATABASE_URL = f"postgresql://{db_user}:{db_password}@{db_host}:5432/{db_name}?sslmode=require" # Azure 용
+ASYNC_SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{db_user}:{db_password}@{db_host}:5432/{db_name}?prepared_statement_cache_size={db_statement_cache_size}" # 로컬 용
+#ASYNC_SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{db_user}:{db_password}@{db_host}:5432/{db_name}?prepared_statement_cache_size={db_statement_cache_size}&ssl=require" # Azure 용
+
+pool_options = dict(
+    pool_size=db_pool_size,
+    max_overflow=db_max_overflow,
+    pool_timeout=db_pool_timeout,
+    pool_recycle=db_pool_recycle,
+    pool_pre_ping=db_pool_pre_ping,
+)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 비동기 엔진 : async def 엔드포인트에서 쿼리 중 이벤트 루프를 막지 않도록 사용
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **pool_options
+)
+# commit 후에도 객체 속성을 다시 조회하지 않도록 expire_on_commit=False
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -23,4 +53,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,10 +1,12 @@
+import os
+import asyncio
 from fastapi import FastAPI, HTTPException
-from database import engine, Base
-import models
+from migrations import run_migrations
 from fastapi.middleware.cors import CORSMiddleware
-from routers import router as api_router
-
-Base.metadata.create_all(bind=engine)
+from routers import router as api_router, SERVER_ROLE
+from routers.auth import IdentityError, identity_error_response
+from core.security import password_hasher, token_cache
+from core.retention import partition_maintenance_loop, PARTITION_MAINTENANCE_INTERVAL
 
 app = FastAPI()
 
@@ -22,7 +24,50 @@ app.add_middleware(
 )
 
 app.include_router(api_router)
+app.add_exception_handler(IdentityError, identity_error_response)
+
+# 스키마 마이그레이션은 import 시점이 아닌 서버 시작 시 수행
+@app.on_event("startup")
+async def migrate_schema():
+    run_migrations()
+
+# 파티션 생성/보존 기간 처리 (core.retention), 여러 워커 중 하나만 실제로 실행
+@app.on_event("startup")
+async def start_partition_maintenance():
+    if PARTITION_MAINTENANCE_INTERVAL > 0:
+        app.state.partitionMaintenance = asyncio.create_task(partition_maintenance_loop())
+
+@app.on_event("shutdown")
+async def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+async def stop_partition_maintenance():
+    task = getattr(app.state, "partitionMaintenance", None)
+    if task:
+        task.cancel()
+
+# AI 모델은 추론을 담당하는 서버(SERVER_ROLE=all)에서만 시작 시 한 번 로드
+if SERVER_ROLE != "api":
+    from aiModels.registry import registry
+    from aiModels.executor import executor
+    from aiModels.scheduler import scheduler
+
+    @app.on_event("startup")
+    async def load_models():
+        registry.load()
+
+    @app.on_event("shutdown")
+    async def shutdown_executor():
+        scheduler.shutdown()
+        executor.shutdown()
 
 @app.get("/")
 async def main():
-    return {"message":"Connect successfully"}
\ No newline at end of file
+    return {"message":"Connect successfully"}
+
+# 내부 지표 (비밀번호 해시 지연/대기 시간, 토큰 캐시 적중률), METRICS_ENABLED=true 일 때만 노출
+if os.getenv("METRICS_ENABLED", "false").lower() == "true":
+    @app.get("/metrics")
+    async def metrics():
+        return {"passwordHash": password_hasher.stats(), "tokenCache": token_cache.stats()}
\ No newline at end of file
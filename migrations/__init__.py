@@ -0,0 +1,83 @@
+# 버전 기반 스키마 마이그레이션
+# migrations/vNNN_<이름>.py 모듈의 upgrade(connection) 을 버전 순서대로 한 번씩 실행하고
+# 적용한 버전을 "schemaVersion" 테이블에 기록한다.
+# 모듈에 prepare(connection) 이 있으면 upgrade 전에 트랜잭션 밖(AUTOCOMMIT)에서 먼저 실행한다.
+#   테이블을 오래 잠그지 않는 준비 작업용 (CREATE INDEX CONCURRENTLY, VALIDATE CONSTRAINT 등)
+#   다시 실행해도 되도록 작성한다. (upgrade 가 실패하면 다음 실행에서 prepare 부터 다시 실행)
+# 실행 : python -m migrations (서버 시작 시에도 main.py 에서 자동 실행)
+import re
+import pkgutil
+import logging
+import importlib
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_TABLE = "schemaVersion"
+# 여러 워커가 동시에 시작해도 마이그레이션은 한 번만 실행되도록 사용하는 PostgreSQL advisory lock 키
+MIGRATION_LOCK_KEY = 7240517
+
+_MODULE_PATTERN = re.compile(r"^v(\d+)_\w+$")
+
+def discover_migrations() -> list[tuple[int, str]]:
+    """(버전, 모듈 이름) 목록을 버전 순으로 반환"""
+    migrations = []
+    for module in pkgutil.iter_modules(__path__):
+        match = _MODULE_PATTERN.match(module.name)
+        if match:
+            migrations.append((int(match.group(1)), module.name))
+    migrations.sort()
+    versions = [version for version, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return migrations
+
+def _applied_versions(connection) -> set[int]:
+    rows = connection.execute(text(f'SELECT version FROM "{SCHEMA_VERSION_TABLE}"'))
+    return {row[0] for row in rows}
+
+def run_migrations(bind=None) -> list[int]:
+    """
+    아직 적용하지 않은 마이그레이션을 각각 하나의 트랜잭션으로 적용하고 적용한 버전 목록을 반환한다.
+    bind 를 생략하면 database.engine 을 사용한다.
+    """
+    if bind is None:
+        from database import engine as bind
+    applied_now = []
+    with bind.connect() as connection:
+        is_postgresql = connection.dialect.name == "postgresql"
+        if is_postgresql:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+        try:
+            with connection.begin():
+                connection.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{SCHEMA_VERSION_TABLE}" ('
+                    'version INTEGER PRIMARY KEY, '
+                    'name VARCHAR(255) NOT NULL, '
+                    '"appliedAt" TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP)'
+                ))
+            with connection.begin():
+                applied = _applied_versions(connection)
+            for version, name in discover_migrations():
+                if version in applied:
+                    continue
+                module = importlib.import_module(f"{__name__}.{name}")
+                prepare = getattr(module, "prepare", None)
+                if prepare is not None:
+                    logger.info(f"Preparing migration {name}")
+                    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as prepare_connection:
+                        prepare(prepare_connection)
+                logger.info(f"Applying migration {name}")
+                with connection.begin():
+                    module.upgrade(connection)
+                    connection.execute(
+                        text(f'INSERT INTO "{SCHEMA_VERSION_TABLE}" (version, name) VALUES (:version, :name)'),
+                        {"version": version, "name": name}
+                    )
+                applied_now.append(version)
+        finally:
+            if is_postgresql:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
+    return applied_now
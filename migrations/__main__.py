@@ -0,0 +1,8 @@
+import logging
+from migrations import run_migrations
+
+logging.basicConfig(level=logging.INFO)
+
+if __name__ == "__main__":
+    applied = run_migrations()
+    print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
@@ -0,0 +1,12 @@
+# 초기 스키마 : 기존에 Base.metadata.create_all 로 만들던 테이블
+# 이미 테이블이 있는 데이터베이스에서는 없는 테이블만 생성한다.
+from database import Base
+import models
+
+TABLES = (
+    models.User, models.Dog, models.Picture, models.SenseData, models.RefreshToken,
+    models.Sequence, models.Bcgdata, models.TargetExercise, models.ExerciseLog,
+)
+
+def upgrade(connection):
+    Base.metadata.create_all(bind=connection, tables=[model.__table__ for model in TABLES])
@@ -0,0 +1,46 @@
+# 자주 실행되는 조회 경로의 인덱스 (models.py 의 __table_args__ 와 같은 이름)
+# 기존 테이블에 행이 많을 수 있으므로 prepare 에서 쓰기를 막지 않는 CREATE INDEX CONCURRENTLY 로 만든다 (PostgreSQL)
+#   강아지별 최신/과거 시퀀스 : sequence (dogId, id), 기간 조회 : sequence (dogId, startTime)
+#   시퀀스별 BCG 데이터 : bcgData (sequenceId, id), 기간 조회 : bcgData (measureTime)
+#   강아지별 센서 데이터 기간 조회 : senseData (dogId, measureTime)
+#   사용자/강아지 기준 조회 : dog (userId), refreshToken (userId), picture (dogId),
+#                            targetExercise (dogId), exerciseLog (dogId, id)
+from sqlalchemy import text
+
+INDEXES = (
+    ("ix_dog_userId", "dog", ("userId",)),
+    ("ix_picture_dogId", "picture", ("dogId",)),
+    ("ix_senseData_dogId_measureTime", "senseData", ("dogId", "measureTime")),
+    ("ix_refreshToken_userId", "refreshToken", ("userId",)),
+    ("ix_sequence_dogId_id", "sequence", ("dogId", "id")),
+    ("ix_sequence_dogId_startTime", "sequence", ("dogId", "startTime")),
+    ("ix_bcgData_sequenceId_id", "bcgData", ("sequenceId", "id")),
+    ("ix_targetExercise_dogId", "targetExercise", ("dogId",)),
+    ("ix_exerciseLog_dogId_id", "exerciseLog", ("dogId", "id")),
+)
+
+def create_index(connection, name, definition):
+    if connection.dialect.name != "postgresql":
+        connection.execute(text(f'CREATE INDEX IF NOT EXISTS "{name}" ON {definition}'))
+        return
+    valid = connection.execute(text(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:index)"
+    ), {"index": f'"{name}"'}).scalar()
+    if valid is False:
+        # 중단된 CREATE INDEX CONCURRENTLY 가 남긴 인덱스
+        connection.execute(text(f'DROP INDEX CONCURRENTLY "{name}"'))
+    if not valid:
+        connection.execute(text(f'CREATE INDEX CONCURRENTLY "{name}" ON {definition}'))
+
+# 행이 많은 sequence, bcgData, senseData 에서도 쓰기를 막지 않도록 트랜잭션 밖에서 CONCURRENTLY 로 만든다
+def prepare(connection):
+    for name, table, columns in INDEXES:
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        create_index(connection, name, f'"{table}" ({column_list})')
+    # bcgData 는 measureTime 순으로만 추가되므로 PostgreSQL 에서는 B-tree 보다 훨씬 작은 BRIN 사용
+    using = "USING brin " if connection.dialect.name == "postgresql" else ""
+    create_index(connection, "ix_bcgData_measureTime", f'"bcgData" {using}("measureTime")')
+
+def upgrade(connection):
+    # 인덱스는 prepare 에서 만들고 여기서는 버전만 기록
+    pass
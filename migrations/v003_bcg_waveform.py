@@ -0,0 +1,5 @@
+# 시퀀스마다 BCG 파형을 하나의 float32 배열로 저장하는 bcgWaveform 테이블 (core.waveform)
+import models
+
+def upgrade(connection):
+    models.BcgWaveform.__table__.create(bind=connection, checkfirst=True)
@@ -0,0 +1,142 @@
+# senseData, sequence, bcgData, bcgWaveform 을 시간 기준 범위 파티션 테이블로 전환 (PostgreSQL 전용, core.partitions)
+# 기존 테이블은 <테이블>_legacy 로 이름을 바꿔 (MINVALUE ~ 다음 파티션 시작) 구간의 파티션으로 붙인다.
+# 파티션 테이블의 기본 키는 파티션 키를 포함해야 하므로 (id, 시각) 이 되고,
+# sequence.id 를 참조하는 외래 키(bcgData, bcgWaveform)는 유지할 수 없어 삭제한다.
+#
+# 기존 행을 읽는 작업은 prepare 에서 쓰기를 막지 않고 미리 한다.
+#   - 구간 상한 CHECK 제약 (NOT VALID 로 추가 후 VALIDATE) : ATTACH PARTITION 과 NOT NULL 설정이 테이블을 다시 읽지 않음
+#   - (id, 시각) 고유 인덱스 (CREATE INDEX CONCURRENTLY) : 기본 키를 다시 만들지 않고 USING INDEX 로 교체
+# upgrade 는 카탈로그만 변경하므로 행 수와 관계없이 짧게 끝난다.
+# prepare 는 행 수에 비례해 오래 걸리고 서버 시작(main.py)은 끝날 때까지 기다리므로,
+# 행이 많은 데이터베이스는 배포 전에 python -m migrations 로 미리 적용한다.
+# prepare 이후 상한보다 늦은 시각의 행은 CHECK 제약으로 저장이 거부되므로 상한은 현재 구간보다 한 구간 더 뒤로 잡는다.
+from datetime import datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+import models
+from core.partitions import PARTITIONED_TABLES, period_start, next_period, default_partition, ensure_partitions, is_partitioned
+
+MODELS = {
+    "senseData": models.SenseData,
+    "bcgData": models.Bcgdata,
+    "bcgWaveform": models.BcgWaveform,
+    "sequence": models.Sequence,
+}
+
+def bound_constraint(table):
+    return f"{table}_partition_bound"
+
+def prepared_index(table):
+    return f"{table}_partition_pkey"
+
+def primary_key_columns(table):
+    key, _ = PARTITIONED_TABLES[table]
+    columns = [column.name for column in MODELS[table].__table__.primary_key.columns if column.name != key]
+    return ", ".join(f'"{column}"' for column in [*columns, key])
+
+def prepared_boundary(connection, table):
+    # prepare 에서 추가한 CHECK 제약의 상한, 없으면 None
+    return connection.execute(text(
+        "SELECT (regexp_match(pg_get_constraintdef(oid), '< ''([^'']+)'''))[1]::timestamptz "
+        "FROM pg_constraint WHERE conrelid = to_regclass(:table) AND conname = :name"
+    ), {"table": f'"{table}"', "name": bound_constraint(table)}).scalar()
+
+def drop_foreign_keys_to(connection, table):
+    rows = connection.execute(text(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint WHERE contype = 'f' AND confrelid = to_regclass(:table)"
+    ), {"table": f'"{table}"'}).all()
+    for referencing, name in rows:
+        connection.execute(text(f'ALTER TABLE {referencing} DROP CONSTRAINT "{name}"'))
+
+def prepare_table(connection, table, now, concurrently=True):
+    key, period = PARTITIONED_TABLES[table]
+    concurrently = "CONCURRENTLY " if concurrently else ""
+    if prepared_boundary(connection, table) is None:
+        # 기존 데이터가 있는 구간의 다음 구간 (prepare 와 upgrade 사이에 구간이 바뀌어도 되도록 한 구간 더)
+        latest = connection.execute(text(f'SELECT max("{key}") FROM "{table}"')).scalar()
+        boundary = next_period(next_period(period_start(max(latest, now) if latest else now, period), period), period)
+        connection.execute(text(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{bound_constraint(table)}" '
+            f'CHECK ("{key}" IS NOT NULL AND "{key}" < \'{boundary.isoformat()}\') NOT VALID'
+        ))
+    # 이미 확인된 제약이면 아무것도 하지 않음
+    connection.execute(text(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{bound_constraint(table)}"'))
+
+    index = prepared_index(table)
+    valid = connection.execute(text(
+        "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:index)"
+    ), {"index": f'"{index}"'}).scalar()
+    if valid is False:
+        # 중단된 CREATE INDEX CONCURRENTLY 가 남긴 인덱스
+        connection.execute(text(f'DROP INDEX {concurrently}"{index}"'))
+    if not valid:
+        connection.execute(text(f'CREATE UNIQUE INDEX {concurrently}"{index}" ON "{table}" ({primary_key_columns(table)})'))
+
+def convert(connection, table, now):
+    key, period = PARTITIONED_TABLES[table]
+    model_table = MODELS[table].__table__
+    legacy = f"{table}_legacy"
+
+    if prepared_boundary(connection, table) is None:
+        # prepare 없이 upgrade 만 호출한 경우 트랜잭션 안에서 준비
+        prepare_table(connection, table, now, concurrently=False)
+    boundary = prepared_boundary(connection, table)
+
+    connection.execute(text(f'ALTER TABLE "{table}" RENAME TO "{legacy}"'))
+    # 인덱스 이름은 스키마 전체에서 유일해야 하므로 기존 인덱스 이름 변경 (같은 정의의 부모 인덱스에 그대로 연결됨)
+    indexes = connection.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"
+    ), {"table": legacy}).scalars().all()
+    for index in indexes:
+        connection.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index}_legacy"'))
+
+    connection.execute(text(f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS) PARTITION BY RANGE ("{key}")'))
+    serial = connection.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": f'"{legacy}"'}).scalar() if "id" in model_table.c else None
+    if serial:
+        # legacy 파티션을 삭제해도 id 시퀀스는 남도록 소유 테이블 변경
+        connection.execute(text(f'ALTER SEQUENCE {serial} OWNED BY "{table}".id'))
+    connection.execute(text(f'ALTER TABLE "{table}" ADD PRIMARY KEY ({primary_key_columns(table)})'))
+    for foreign_key in model_table.foreign_keys:
+        if foreign_key.column.table.name in PARTITIONED_TABLES:
+            continue
+        connection.execute(text(
+            f'ALTER TABLE "{table}" ADD FOREIGN KEY ("{foreign_key.parent.name}") '
+            f'REFERENCES "{foreign_key.column.table.name}" ("{foreign_key.column.name}")'
+        ))
+
+    # legacy 의 기본 키를 prepare 에서 만든 (id, 시각) 인덱스로 교체 (부모 기본 키에 연결됨)
+    legacy_primary_key = connection.execute(text(
+        "SELECT conname FROM pg_constraint WHERE contype = 'p' AND conrelid = to_regclass(:table)"
+    ), {"table": f'"{legacy}"'}).scalar()
+    drop_primary_key = f'DROP CONSTRAINT "{legacy_primary_key}", ' if legacy_primary_key else ""
+    connection.execute(text(
+        f'ALTER TABLE "{legacy}" {drop_primary_key}'
+        f'ADD CONSTRAINT "{legacy}_pkey" PRIMARY KEY USING INDEX "{prepared_index(table)}_legacy"'
+    ))
+
+    # CHECK 제약이 구간 조건을 보장하므로 legacy 를 다시 읽지 않고 붙는다
+    connection.execute(text(
+        f'ALTER TABLE "{table}" ATTACH PARTITION "{legacy}" FOR VALUES FROM (MINVALUE) TO (\'{boundary.isoformat()}\')'
+    ))
+    connection.execute(text(f'ALTER TABLE "{legacy}" DROP CONSTRAINT "{bound_constraint(table)}"'))
+    connection.execute(text(f'CREATE TABLE "{default_partition(table)}" PARTITION OF "{table}" DEFAULT'))
+    for index in model_table.indexes:
+        connection.execute(CreateIndex(index))
+    ensure_partitions(connection, table, now)
+
+def prepare(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    now = datetime.now(timezone.utc)
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            prepare_table(connection, table, now)
+
+def upgrade(connection):
+    if connection.dialect.name != "postgresql":
+        return
+    now = datetime.now(timezone.utc)
+    drop_foreign_keys_to(connection, "sequence")
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            convert(connection, table, now)
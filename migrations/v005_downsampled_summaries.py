@@ -0,0 +1,6 @@
+# 보존 기간이 지난 원본 파티션의 요약 테이블 (core.retention)
+import models
+
+def upgrade(connection):
+    for model in (models.SenseDataSummary, models.BcgSummary, models.SequenceSummary):
+        model.__table__.create(bind=connection, checkfirst=True)
@@ -0,0 +1,27 @@
+# 시간/일 단위 건강 지표 집계 테이블 (core.rollup) 과 기존 시퀀스로부터의 초기 집계
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+import models
+from core.rollup import ROLLUP_PERIODS, ROLLUP_TIMEZONE, INTENSITY_LEVELS, rollup_values, health_rollup_upsert
+
+def upgrade(connection):
+    models.HealthRollup.__table__.create(bind=connection, checkfirst=True)
+    if connection.dialect.name != "postgresql":
+        # 개발용 데이터베이스 : 시퀀스마다 집계에 더한다
+        for sequence in Session(bind=connection).scalars(select(models.Sequence).where(models.Sequence.dogId.isnot(None))):
+            connection.execute(health_rollup_upsert(connection.dialect.name, rollup_values(sequence)))
+        return
+    intensities = ", ".join(f'"intensity{level}"' for level in range(INTENSITY_LEVELS))
+    intensity_counts = ", ".join(f"count(*) FILTER (WHERE intentsity = {level})" for level in range(INTENSITY_LEVELS))
+    for period in ROLLUP_PERIODS:
+        connection.execute(text(f"""
+            INSERT INTO "healthRollup" ("dogId", period, "bucketStart", "sequenceCount",
+                "heartRateMin", "heartRateMax", "heartRateSum", "respirationRateMin", "respirationRateMax", "respirationRateSum",
+                "anomalyCount", exercise, {intensities})
+            SELECT "dogId", :period, date_trunc(:period, "startTime" AT TIME ZONE :timezone) AT TIME ZONE :timezone, count(*),
+                min("heartRate"), max("heartRate"), sum("heartRate"), min("respirationRate"), max("respirationRate"), sum("respirationRate"),
+                count(*) FILTER (WHERE "heartAnomoly" <> 0), sum(excercise), {intensity_counts}
+            FROM "sequence" WHERE "dogId" IS NOT NULL
+            GROUP BY 1, 3
+            ON CONFLICT DO NOTHING
+        """), {"period": period, "timezone": ROLLUP_TIMEZONE.zone})
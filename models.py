@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Float
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Float, Index, LargeBinary
 from sqlalchemy.orm import relationship
 
 from database import Base
@@ -16,6 +16,9 @@ class User(Base):
 
 class Dog(Base):
     __tablename__ = 'dog'
+    __table_args__ = (
+        Index('ix_dog_userId', 'userId'),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     userId = Column(Integer, ForeignKey('user.id'))
@@ -35,6 +38,9 @@ class Dog(Base):
 
 class Picture(Base):
     __tablename__ = 'picture'
+    __table_args__ = (
+        Index('ix_picture_dogId', 'dogId'),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     dogId = Column(Integer, ForeignKey('dog.id'))
@@ -46,6 +52,9 @@ class Picture(Base):
 
 class SenseData(Base):
     __tablename__ = 'senseData'
+    __table_args__ = (
+        Index('ix_senseData_dogId_measureTime', 'dogId', 'measureTime'),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     dogId = Column(Integer, ForeignKey('dog.id'))
@@ -63,6 +72,9 @@ class SenseData(Base):
 
 class RefreshToken(Base):
     __tablename__ = 'refreshToken'
+    __table_args__ = (
+        Index('ix_refreshToken_userId', 'userId'),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     userId = Column(Integer, ForeignKey('user.id'))
@@ -74,6 +86,10 @@ class RefreshToken(Base):
 
 class Sequence(Base):
     __tablename__ = 'sequence'
+    __table_args__ = (
+        Index('ix_sequence_dogId_id', 'dogId', 'id'),
+        Index('ix_sequence_dogId_startTime', 'dogId', 'startTime'),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     dogId = Column(Integer, ForeignKey('dog.id'))
@@ -87,9 +103,15 @@ class Sequence(Base):
     
     dog = relationship('Dog', back_populates='sequences')
     bcgdatas = relationship('Bcgdata', back_populates='sequence')
+    waveform = relationship('BcgWaveform', back_populates='sequence', uselist=False)
 
 class Bcgdata(Base):
     __tablename__ = 'bcgData'
+    __table_args__ = (
+        Index('ix_bcgData_sequenceId_id', 'sequenceId', 'id'),
+        # 시간 순으로만 추가되는 테이블이므로 PostgreSQL 에서는 작은 BRIN 인덱스 사용
+        Index('ix_bcgData_measureTime', 'measureTime', postgresql_using='brin'),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     sequenceId = Column(Integer, ForeignKey('sequence.id')) 
@@ -100,8 +122,23 @@ class Bcgdata(Base):
     
     sequence = relationship('Sequence', back_populates='bcgdatas')
 
+# 시퀀스 하나의 BCG 파형을 한 행에 저장 (core.waveform 형식의 float32 배열)
+class BcgWaveform(Base):
+    __tablename__ = 'bcgWaveform'
+    
+    sequenceId = Column(Integer, ForeignKey('sequence.id'), primary_key=True)
+    startTime = Column(DateTime(timezone=True), nullable=False)
+    sampleRate = Column(Float, nullable=False)
+    sampleCount = Column(Integer, nullable=False)
+    samples = Column(LargeBinary, nullable=False)
+
+    sequence = relationship('Sequence', back_populates='waveform')
+
 class TargetExercise(Base):
     __tablename__ = 'targetExercise'
+    __table_args__ = (
+        Index('ix_targetExercise_dogId', 'dogId'),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     dogId = Column(Integer, ForeignKey('dog.id'))
@@ -112,10 +149,85 @@ class TargetExercise(Base):
 
 class ExerciseLog(Base):
     __tablename__ = 'exerciseLog'
+    __table_args__ = (
+        Index('ix_exerciseLog_dogId_id', 'dogId', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     dogId = Column(Integer, ForeignKey('dog.id'))
     date = Column(DateTime(timezone=True), nullable=False)
     exercise = Column(Float, nullable=False)
     
-    dog = relationship('Dog', back_populates='exerciseLogs')
\ No newline at end of file
+    dog = relationship('Dog', back_populates='exerciseLogs')
+
+# 보존 기간이 지난 원본 파티션을 삭제하기 전에 남기는 요약 데이터 (core.retention)
+class SenseDataSummary(Base):
+    __tablename__ = 'senseDataSummary'
+    
+    # 1초 단위 평균
+    dogId = Column(Integer, ForeignKey('dog.id'), primary_key=True)
+    measureTime = Column(DateTime(timezone=True), primary_key=True)
+    sampleCount = Column(Integer, nullable=False)
+    ax = Column(Float, nullable=False)
+    ay = Column(Float, nullable=False)
+    az = Column(Float, nullable=False)
+    gx = Column(Float, nullable=False)
+    gy = Column(Float, nullable=False)
+    gz = Column(Float, nullable=False)
+    bcg = Column(Float, nullable=False)
+    bcgMin = Column(Float, nullable=False)
+    bcgMax = Column(Float, nullable=False)
+    temperature = Column(Float, nullable=False)
+
+class BcgSummary(Base):
+    __tablename__ = 'bcgSummary'
+    
+    # 1초 단위 평균/최소/최대 (bcgData 와 bcgWaveform 모두 이 테이블로 요약)
+    dogId = Column(Integer, ForeignKey('dog.id'), primary_key=True)
+    measureTime = Column(DateTime(timezone=True), primary_key=True)
+    sampleCount = Column(Integer, nullable=False)
+    heart = Column(Float, nullable=False)
+    heartMin = Column(Float, nullable=False)
+    heartMax = Column(Float, nullable=False)
+    respiration = Column(Float, nullable=False)
+    respirationMin = Column(Float, nullable=False)
+    respirationMax = Column(Float, nullable=False)
+
+class SequenceSummary(Base):
+    __tablename__ = 'sequenceSummary'
+    
+    # 1분 단위 요약
+    dogId = Column(Integer, ForeignKey('dog.id'), primary_key=True)
+    startTime = Column(DateTime(timezone=True), primary_key=True)
+    sequenceCount = Column(Integer, nullable=False)
+    heartRate = Column(Float, nullable=False)
+    heartRateMin = Column(Integer, nullable=False)
+    heartRateMax = Column(Integer, nullable=False)
+    respirationRate = Column(Float, nullable=False)
+    respirationRateMin = Column(Integer, nullable=False)
+    respirationRateMax = Column(Integer, nullable=False)
+    anomalyCount = Column(Integer, nullable=False)
+    exercise = Column(Float, nullable=False)
+    intensityMax = Column(Integer, nullable=False)
+
+# 강아지별 시간('hour')/일('day') 단위 건강 지표 집계 (core.rollup), 평균은 합계 / sequenceCount
+class HealthRollup(Base):
+    __tablename__ = 'healthRollup'
+    
+    dogId = Column(Integer, ForeignKey('dog.id'), primary_key=True)
+    period = Column(String(10), primary_key=True)
+    bucketStart = Column(DateTime(timezone=True), primary_key=True)
+    sequenceCount = Column(Integer, nullable=False)
+    heartRateMin = Column(Integer, nullable=False)
+    heartRateMax = Column(Integer, nullable=False)
+    heartRateSum = Column(Integer, nullable=False)
+    respirationRateMin = Column(Integer, nullable=False)
+    respirationRateMax = Column(Integer, nullable=False)
+    respirationRateSum = Column(Integer, nullable=False)
+    anomalyCount = Column(Integer, nullable=False)
+    exercise = Column(Float, nullable=False)
+    # 활동 강도(intentsity) 0 ~ 3 별 시퀀스 수
+    intensity0 = Column(Integer, nullable=False)
+    intensity1 = Column(Integer, nullable=False)
+    intensity2 = Column(Integer, nullable=False)
+    intensity3 = Column(Integer, nullable=False)
@@ -1,7 +1,24 @@
+import os
 from fastapi import APIRouter
-from routers import users, dogs, webSocket
+from dotenv import load_dotenv
+from routers import users, dogs
+
+load_dotenv()
+
+# 서버 역할
+#   all : REST + 웹소켓(/wsbt) 추론 (기본)
+#   api : REST 전용, 웹소켓 라우터와 AI 모델을 불러오지 않음
+# 역할을 나누어 여러 프로세스로 실행할 때 사용자/강아지 캐시(routers.auth.identity_cache)는 프로세스마다 따로 있어
+# 한 프로세스의 PUT /dogs/me 가 다른 프로세스에는 최대 IDENTITY_CACHE_TTL 초 늦게 반영된다.
+# /wsbt 는 연결할 때마다 강아지 정보를 다시 조회하므로 연결 이후의 변경은 다음 연결부터 반영된다.
+SERVER_ROLE = os.getenv("SERVER_ROLE", "all").lower()
+SERVER_ROLES = ("all", "api")
+if SERVER_ROLE not in SERVER_ROLES:
+    raise ValueError(f"Unknown SERVER_ROLE: {SERVER_ROLE}")
 
 router = APIRouter()
 router.include_router(users.router, tags=['users'])
 router.include_router(dogs.router, tags=['dogs'])
-router.include_router(webSocket.router, tags=['webSocket'])
\ No newline at end of file
+if SERVER_ROLE != "api":
+    from routers import webSocket
+    router.include_router(webSocket.router, tags=['webSocket'])
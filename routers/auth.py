@@ -1,15 +1,36 @@
+import os
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Union, Tuple
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from core.security import create_access_token, decode_access_token, decode_refresh_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, Header, status
+from core.security import create_access_token, decode_access_token, decode_refresh_token, token_cache
+from core.cache import TTLCache
 from crud import get_refresh_token, delete_refresh_token, get_refresh_token_by_user, get_user_by_loginId
+from database import get_async_db
 from fastapi.responses import JSONResponse
+from dotenv import load_dotenv
+import models
+import async_crud
+
+load_dotenv()
+
+# 요청 사용자 정보 캐시 (sub -> (user, dog))
+# 대시보드 폴링 때마다 사용자/강아지 조회를 반복하지 않도록 짧은 시간 동안 재사용한다.
+# 캐시는 프로세스마다 따로 있고 invalidate_identity()는 요청을 처리한 프로세스의 캐시만 지운다.
+# 여러 워커나 SERVER_ROLE=api 로 나누어 실행하면 다른 프로세스는 최대 IDENTITY_CACHE_TTL 초 동안
+# 이전 사용자/강아지 정보(예 : PUT /dogs/me 이전 weight)를 사용할 수 있다.
+# 그래서 웹소켓(/wsbt, /test-wsbt)은 연결할 때 캐시를 쓰지 않고 다시 조회하며, 강아지가 없는 결과는 캐시하지 않는다.
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", 30))  # 초, 0 이면 사용 안 함
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", 10000))
+identity_cache = TTLCache(IDENTITY_CACHE_SIZE if IDENTITY_CACHE_TTL > 0 else 0, IDENTITY_CACHE_TTL)
 
 def verify_and_refresh_token(db: Session, access_token: str) -> Tuple[bool, Union[str, None]]:
+    payload = None
     try:
         # Access Token 검증
-        payload = decode_access_token(access_token)
+        payload = token_cache.decode(access_token)
         if payload:
             return (True, access_token)  # 유효한 액세스 토큰
 
@@ -17,9 +38,8 @@ def verify_and_refresh_token(db: Session, access_token: str) -> Tuple[bool, Unio
         # Access Token이 만료되었거나 유효하지 않음
         pass
 
-    # Access Token에서 사용자 ID 추출
+    # Access Token에서 사용자 ID 추출 (위의 검증 결과를 사용, 다시 디코딩하면 캐시 통계가 두 번 집계됨)
     try:
-        payload = decode_access_token(access_token)
         if not payload:
             return (False, "Invalid access token")
         loginId = payload.get("sub")
@@ -43,4 +63,103 @@ def verify_and_refresh_token(db: Session, access_token: str) -> Tuple[bool, Unio
         return (True, new_access_token)
 
     except JWTError:
-        return (False, "Invalid access token")
\ No newline at end of file
+        return (False, "Invalid access token")
+
+# verify_and_refresh_token 의 비동기(AsyncSession) 버전
+async def async_verify_and_refresh_token(db: AsyncSession, access_token: str) -> Tuple[bool, Union[str, None]]:
+    payload = None
+    try:
+        # Access Token 검증
+        payload = token_cache.decode(access_token)
+        if payload:
+            return (True, access_token)  # 유효한 액세스 토큰
+
+    except JWTError:
+        # Access Token이 만료되었거나 유효하지 않음
+        pass
+
+    # Access Token에서 사용자 ID 추출 (위의 검증 결과를 사용, 다시 디코딩하면 캐시 통계가 두 번 집계됨)
+    try:
+        if not payload:
+            return (False, "Invalid access token")
+        loginId = payload.get("sub")
+        if not loginId:
+            return (False, "Invalid access token") # access token에 sub이 없음
+
+        # 사용자 ID로 Refresh Token 조회
+        userId = (await async_crud.get_user_by_loginId(db, loginId)).id
+        db_refresh_token = await async_crud.get_refresh_token_by_user(db, userId)
+        if not db_refresh_token:
+            return (False, "Refresh token not found")
+
+        # Refresh Token 검증
+        refresh_payload = decode_refresh_token(db_refresh_token.token)
+        if not refresh_payload:
+            await async_crud.delete_refresh_token(db, db_refresh_token.id)  # 유효하지 않은 Refresh Token 삭제
+            return (False, "Invalid refresh token")
+
+        # Refresh Token이 유효한 경우 새로운 Access Token 발급
+        new_access_token = create_access_token(data={"sub": loginId})
+        return (True, new_access_token)
+
+    except JWTError:
+        return (False, "Invalid access token")
+
+
+class IdentityError(Exception):
+    """
+    사용자 확인 실패. main.py 의 예외 처리기가 {"errorMessage": ...} 응답으로 변환한다.
+    """
+    def __init__(self, status_code: int, errorMessage: str):
+        super().__init__(errorMessage)
+        self.status_code = status_code
+        self.errorMessage = errorMessage
+
+def identity_error_response(request, exc: IdentityError) -> JSONResponse:
+    return JSONResponse(status_code=exc.status_code, content={"errorMessage": exc.errorMessage})
+
+class Identity:
+    """
+    요청 사용자 정보 : (갱신되었을 수 있는) access token, 사용자, 강아지(없으면 None)
+    user, dog는 캐시에서 여러 요청이 공유하는 읽기 전용 객체이므로,
+    수정할 때는 현재 세션에서 다시 조회한 뒤 invalidate_identity()를 호출한다.
+    """
+    def __init__(self, accessToken: str, loginId: str, user: models.User, dog: Optional[models.Dog]):
+        self.accessToken = accessToken
+        self.loginId = loginId
+        self.user = user
+        self.dog = dog
+
+def invalidate_identity(loginId: str) -> None:
+    identity_cache.invalidate(loginId)
+
+async def resolve_identity(db: AsyncSession, access_token: str, fresh: bool = False) -> Identity:
+    # 토큰 검증 -> sub 추출 -> 사용자 + 강아지 조회 (캐시 또는 조인 쿼리 1회)
+    # fresh : 캐시를 쓰지 않고 DB 에서 다시 조회 (조회 결과로 캐시 갱신)
+    is_valid, result = await async_verify_and_refresh_token(db, access_token)
+    if not is_valid:
+        raise IdentityError(status.HTTP_401_UNAUTHORIZED, result)
+
+    loginId = token_cache.decode(result).get("sub")
+    cached = None if fresh else identity_cache.get(loginId)
+    if cached is None:
+        user, dog = await async_crud.get_user_and_dog_by_loginId(db, loginId)
+        if not user:
+            raise IdentityError(status.HTTP_500_INTERNAL_SERVER_ERROR, "Server error")
+        if dog:
+            # 강아지가 없는 결과는 다른 프로세스의 POST /dogs 이후에도 남지 않도록 캐시하지 않음
+            identity_cache.set(loginId, (user, dog))
+        else:
+            identity_cache.invalidate(loginId)
+    else:
+        user, dog = cached
+    return Identity(result, loginId, user, dog)
+
+# FastAPI 의존성 : 같은 요청 안에서는 한 번만 실행된다 (의존성 캐시)
+async def get_identity(accessToken: str = Header(...), db: AsyncSession = Depends(get_async_db)) -> Identity:
+    return await resolve_identity(db, accessToken)
+
+async def get_dog_identity(identity: Identity = Depends(get_identity)) -> Identity:
+    if not identity.dog:
+        raise IdentityError(status.HTTP_400_BAD_REQUEST, "Dog information does not exist")
+    return identity
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends, Request, status, Header, Body, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, Request, status, Body, File, UploadFile, Query
 from fastapi.responses import JSONResponse, FileResponse
-from sqlalchemy.orm import Session
-from database import get_db
-from routers.auth import verify_and_refresh_token, decode_access_token
-from crud import create_dog, get_user_by_loginId, create_picture, get_pictures_by_dog, get_dog_by_user, create_target_exercise, create_exercise_log, get_last_days_average_exercise
-from crud import get_sequences_by_dog, get_bcgdata_by_sequence, get_user_by_loginId, get_dog_by_user, get_target_exercise, get_recent_sequences, update_target_exercise
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from routers.auth import Identity, get_identity, get_dog_identity, invalidate_identity
+from async_crud import create_dog, get_dog, create_picture, get_pictures_by_dog, create_target_exercise, create_exercise_log, get_last_days_average_exercise
+from async_crud import get_latest_sequence_id, get_latest_sequence_with_heart, get_target_exercise, update_target_exercise
+from async_crud import get_health_rollups, get_sequence_page
+from core.rollup import ROLLUP_PERIODS, bucket_start, rollup_response
+from core.pagination import encode_cursor, decode_cursor
+from core.latest import cache_latest_sequence, get_cached_latest_sequence
 from schemas import DogCreate, PictureCreate, TargetExerciseCreate, ExerciseLogCreate
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
 from pydantic import ValidationError
 import shutil
@@ -18,17 +22,17 @@ router = APIRouter()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 건강 지표 집계 조회 기본 기간과 한 번에 조회 가능한 최대 구간 수
+ROLLUP_DEFAULT_RANGE = {"hour": timedelta(hours=24), "day": timedelta(days=30)}
+ROLLUP_PERIOD_LENGTH = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+MAX_ROLLUP_BUCKETS = 1000
+# 시퀀스 한 페이지의 기본/최대 개수
+SEQUENCE_PAGE_SIZE = 100
+MAX_SEQUENCE_PAGE_SIZE = 1000
+
 # 강아지 정보 등록
 @router.post("/dogs", status_code=status.HTTP_201_CREATED)
-async def add_dog(request: Request, accessToken: str = Header(...), db: Session = Depends(get_db)):
-    # 토큰 검증
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"errorMessage": result}
-        )
-
+async def add_dog(request: Request, identity: Identity = Depends(get_identity), db: AsyncSession = Depends(get_async_db)):
     try:
         user_data = await request.json()
         try:
@@ -41,22 +45,14 @@ async def add_dog(request: Request, accessToken: str = Header(...), db: Session
                 content={"errorMessage": f"{errors} is a required field"}
             )
 
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"errorMessage": "Server error"}
-            )
-        
         # 강아지 정보 생성
-        db_dog = create_dog(db, dog, db_user.id)
+        db_dog = await create_dog(db, dog, identity.user.id)
         if not db_dog:
             return JSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"errorMessage": "Server error"}
             )
+        invalidate_identity(identity.loginId)
         
         # 운동 목표량 정보 생성
         try:
@@ -72,7 +68,7 @@ async def add_dog(request: Request, accessToken: str = Header(...), db: Session
                 target=targetNum,  # 기본 목표 운동량 설정 (예: 60분)
                 today=0     # 오늘 운동량 초기화
             )
-            create_target_exercise(db, target_exercise)
+            await create_target_exercise(db, target_exercise)
         except Exception as e:
             logger.error(f"Error creating target exercise: {e}")
             return JSONResponse(
@@ -83,7 +79,7 @@ async def add_dog(request: Request, accessToken: str = Header(...), db: Session
         return JSONResponse(
                 status_code=status.HTTP_201_CREATED,
                 content={"message": "Dog information added successfully"},
-                headers={"accessToken": result}
+                headers={"accessToken": identity.accessToken}
         )
     except Exception as e:
         logger.error(f"Error adding dog: {e}")
@@ -94,34 +90,11 @@ async def add_dog(request: Request, accessToken: str = Header(...), db: Session
 
 # 강아지 사진 업로드
 @router.post("/dogs/photos", status_code=status.HTTP_201_CREATED)
-async def upload_dog_photo(accessToken: str = Header(...), db: Session = Depends(get_db), image: UploadFile = File(...)):
-    # 토큰 검증
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"errorMessage": result}
-        )
-
+async def upload_dog_photo(identity: Identity = Depends(get_dog_identity), db: AsyncSession = Depends(get_async_db), image: UploadFile = File(...)):
     try:
-        # Access Token에서 로그인 ID 추출
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"errorMessage": "Server error"}
-            )
-            
-        dog = get_dog_by_user(db, db_user.id)
-        if not dog:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"errorMessage": "Dog information does not exist"}
-            )
+        dog = identity.dog
         # 기존 사진이 있는지 확인
-        existing_photo = get_pictures_by_dog(db, dog.id)
+        existing_photo = await get_pictures_by_dog(db, dog.id)
         if existing_photo:
             # 기존 파일 삭제
             if os.path.exists(existing_photo.photoPath):
@@ -136,7 +109,7 @@ async def upload_dog_photo(accessToken: str = Header(...), db: Session = Depends
             existing_photo.fileName = image.filename
             existing_photo.contentType = image.content_type
             existing_photo.photoPath = photo_path
-            db.commit()
+            await db.commit()
 
         else:
             # 사진 정보 데이터베이스에 저장 (새 사진)
@@ -150,12 +123,12 @@ async def upload_dog_photo(accessToken: str = Header(...), db: Session = Depends
                 photoPath=photo_path
             )
             logger.warning(f"{dog.id}")
-            create_picture(db, photo_data, dog.id)
+            await create_picture(db, photo_data, dog.id)
 
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
             content={"message": "Photo upload completed"},
-            headers={"accessToken": result}
+            headers={"accessToken": identity.accessToken}
         )
     except Exception as e:
         return JSONResponse(
@@ -166,8 +139,8 @@ async def upload_dog_photo(accessToken: str = Header(...), db: Session = Depends
 # 강아지 정보 수정
 @router.put("/dogs/me", status_code=status.HTTP_200_OK)
 async def update_dog_info(
-    accessToken: str = Header(...),
-    db: Session = Depends(get_db),
+    identity: Identity = Depends(get_dog_identity),
+    db: AsyncSession = Depends(get_async_db),
     dogName: str = Body(...),
     breed: str = Body(...),
     breedCategory: int = Body(...),
@@ -175,32 +148,9 @@ async def update_dog_info(
     sex: str = Body(...),
     weight: float = Body(...)
 ):
-    # 토큰 검증
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"errorMessage": result}
-        )
-
     try:
-        # Access Token에서 로그인 ID 추출
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"errorMessage": "Server error"}
-            )
-        
-        # 사용자의 강아지 정보 조회
-        dog = get_dog_by_user(db, db_user.id)
-        if not dog:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"errorMessage": "Dog information does not exist"}
-            )
+        # 캐시된 강아지 정보는 읽기 전용이므로 현재 세션에서 다시 조회해 수정
+        dog = await get_dog(db, identity.dog.id)
 
         # 강아지 정보 업데이트
         dog.dogName = dogName
@@ -210,12 +160,13 @@ async def update_dog_info(
         dog.sex = sex
         dog.weight = weight
 
-        db.commit()
+        await db.commit()
+        invalidate_identity(identity.loginId)
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={"message": "Dog information change successfully"},
-            headers={"accessToken": result}
+            headers={"accessToken": identity.accessToken}
         )
 
     except ValidationError as e:
@@ -234,33 +185,9 @@ async def update_dog_info(
 
 # 강아지 정보 조회
 @router.get("/dogs/me", status_code=status.HTTP_200_OK)
-async def get_dog_info(accessToken: str = Header(...), db: Session = Depends(get_db)):
-    # 토큰 검증
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"errorMessage": "Invalid token"}
-        )
-
+async def get_dog_info(identity: Identity = Depends(get_dog_identity), db: AsyncSession = Depends(get_async_db)):
     try:
-        # Access Token에서 로그인 ID 추출
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"errorMessage": "Server error"}
-            )
-        
-        # 사용자의 강아지 정보 조회
-        dog = get_dog_by_user(db, db_user.id)
-        if not dog:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"errorMessage": "Dog information does not exist"}
-            )
+        dog = identity.dog
 
         # 성공 시 강아지 정보 반환
         return JSONResponse(
@@ -273,7 +200,7 @@ async def get_dog_info(accessToken: str = Header(...), db: Session = Depends(get
                 "sex": dog.sex,
                 "weight": dog.weight
             },
-            headers={"accessToken": result}
+            headers={"accessToken": identity.accessToken}
         )
 
     except Exception as e:
@@ -285,35 +212,12 @@ async def get_dog_info(accessToken: str = Header(...), db: Session = Depends(get
 
 # 강아지 사진 가져오기
 @router.get("/dogs/photos", response_class=FileResponse)
-async def get_dog_photo(accessToken: str = Header(...), db: Session = Depends(get_db)):
-    # 토큰 검증
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"errorMessage": result}
-        )
-
+async def get_dog_photo(identity: Identity = Depends(get_dog_identity), db: AsyncSession = Depends(get_async_db)):
     try:
-        # Access Token에서 로그인 ID 추출
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"errorMessage": "Server error"}
-            )
-            
-        dog = get_dog_by_user(db, db_user.id)
-        if not dog:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"errorMessage": "Dog information does not exist"}
-            )
+        dog = identity.dog
         
         # 사진 정보 가져오기
-        existing_photo = get_pictures_by_dog(db, dog.id)
+        existing_photo = await get_pictures_by_dog(db, dog.id)
         if not existing_photo or not os.path.exists(existing_photo.photoPath):
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -321,7 +225,7 @@ async def get_dog_photo(accessToken: str = Header(...), db: Session = Depends(ge
             )
 
         # 사진 파일 반환
-        headers = {"accessToken": result}
+        headers = {"accessToken": identity.accessToken}
         return FileResponse(path=existing_photo.photoPath, media_type=existing_photo.contentType, headers=headers)
 
     except Exception as e:
@@ -332,57 +236,31 @@ async def get_dog_photo(accessToken: str = Header(...), db: Session = Depends(ge
 
 # 심박값 데이터 전송
 @router.get("/hearts", status_code=status.HTTP_200_OK)
-async def get_heart_data(accessToken: str = Header(...), db: Session = Depends(get_db)):
-    # 토큰 검증
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"errormessage": "Invalid token"}
-        )
-
+async def get_heart_data(identity: Identity = Depends(get_dog_identity), db: AsyncSession = Depends(get_async_db)):
     try:
-        # Access Token에서 로그인 ID 추출
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"errorMessage": "Server error"}
-            )
-
-        # 사용자에 해당하는 강아지 정보 조회
-        dog = get_dog_by_user(db, db_user.id)
-        if not dog:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"errorMessage": "Dog information does not exist"}
-            )
+        dog = identity.dog
 
-        # 최신 시퀀스 정보 조회
-        sequences = get_sequences_by_dog(db, dog.id)
-        if not sequences:
+        # 최신 시퀀스 id 만 확인하고, 캐시(run_first_model 이 갱신)에 있으면 파형은 다시 읽지 않는다
+        latest_id = await get_latest_sequence_id(db, dog.id)
+        if latest_id is None:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"errorMessage": "Sequence information does not exist"}
             )
-        
-        latest_sequence = sequences[-1]  # 가장 최신 시퀀스
 
-        # intensity 값에 따른 데이터 처리
-        bcg_data = get_bcgdata_by_sequence(db, latest_sequence.id)
-        bcg_data_list = [
-            {"time": data.measureTime.timestamp(), "heart": data.heart} for data in bcg_data
-        ]
+        content = get_cached_latest_sequence(dog.id, latest_id)
+        if content is None:
+            latest_sequence, bcg_data_list = await get_latest_sequence_with_heart(db, dog.id)
+            cache_latest_sequence(dog.id, latest_sequence.id, latest_sequence.intentsity, bcg_data_list)
+            content = {
+                "intensity": latest_sequence.intentsity,
+                "bcgData": bcg_data_list
+            }
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
-            content={
-                "intensity": latest_sequence.intentsity,
-                "bcgData": bcg_data_list
-            },
-            headers={"accessToken": result}
+            content=content,
+            headers={"accessToken": identity.accessToken}
         )
 
     except Exception as e:
@@ -394,36 +272,12 @@ async def get_heart_data(accessToken: str = Header(...), db: Session = Depends(g
 
 # 운동 목표량 정보 전송
 @router.get("/exercise", status_code=status.HTTP_200_OK)
-async def get_exercise_data(accessToken: str = Header(...), db: Session = Depends(get_db)):
-    # 토큰 검증
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"errormessage": "Invalid token"}
-        )
-
+async def get_exercise_data(identity: Identity = Depends(get_dog_identity), db: AsyncSession = Depends(get_async_db)):
     try:
-        # Access Token에서 로그인 ID 추출
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"errorMessage": "Server error"}
-            )
-
-        # 사용자에 해당하는 강아지 정보 조회
-        dog = get_dog_by_user(db, db_user.id)
-        if not dog:
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"errorMessage": "Dog information does not exist"}
-            )
+        dog = identity.dog
 
         # TargetExercise 정보 조회
-        target_exercise = get_target_exercise(db, dog.id)
+        target_exercise = await get_target_exercise(db, dog.id)
         if not target_exercise:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -436,7 +290,7 @@ async def get_exercise_data(accessToken: str = Header(...), db: Session = Depend
                 "target": target_exercise.target,
                 "today": target_exercise.today
             },
-            headers={"accessToken": result}
+            headers={"accessToken": identity.accessToken}
         )
 
     except Exception as e:
@@ -446,45 +300,54 @@ async def get_exercise_data(accessToken: str = Header(...), db: Session = Depend
             content={"errorMessage": "Server error"}
         )
 
-# 시퀀스 데이터 전송
+# 시퀀스 데이터 전송 (최신순, from/to : startTime 범위 epoch 초, cursor : 이전 응답의 nextCursor)
 @router.get("/sequences", status_code=status.HTTP_200_OK)
-async def get_sequences(accessToken: str = Header(...), db: Session = Depends(get_db)):
-    # 토큰 검증
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
+async def get_sequences(
+    start: float = Query(None, alias="from"),
+    end: float = Query(None, alias="to"),
+    limit: int = Query(SEQUENCE_PAGE_SIZE),
+    cursor: str = Query(None),
+    identity: Identity = Depends(get_dog_identity),
+    db: AsyncSession = Depends(get_async_db)
+):
+    dog = identity.dog
+    if not 1 <= limit <= MAX_SEQUENCE_PAGE_SIZE:
         return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"errormessage": "Invalid token"}
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"errorMessage": f"limit must be between 1 and {MAX_SEQUENCE_PAGE_SIZE}"}
         )
-
     try:
-        # Access Token에서 로그인 ID 추출
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"errorMessage": "Server error"}
-            )
-
-        # 사용자에 해당하는 강아지 정보 조회
-        dog = get_dog_by_user(db, db_user.id)
-        if not dog:
+        startTime = datetime.fromtimestamp(start, timezone.utc) if start is not None else None
+        endTime = datetime.fromtimestamp(end, timezone.utc) if end is not None else None
+    except (ValueError, OverflowError, OSError):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"errorMessage": "Invalid time range"}
+        )
+    before_id = None
+    if cursor is not None:
+        try:
+            cursor_dog_id, before_id = decode_cursor(cursor)
+        except ValueError:
+            cursor_dog_id = None
+        if cursor_dog_id != dog.id:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                content={"errorMessage": "Dog information does not exist"}
+                content={"errorMessage": "Invalid cursor"}
             )
 
-        # 현재 시간으로부터 1시간 내의 시퀀스 정보 조회
-        now = datetime.utcnow()
-        sequences = get_recent_sequences(db, dog.id)
+    try:
+        # 다음 페이지가 있는지 확인하기 위해 하나 더 조회
+        sequences = await get_sequence_page(db, dog.id, limit + 1, before_id, startTime, endTime)
         
-        if not sequences:
+        # 기존 호출(파라미터 없음)만 시퀀스가 없을 때 400, from/to/cursor 를 준 경우 빈 목록은 정상 응답
+        if not sequences and start is None and end is None and cursor is None:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"errorMessage": "Sequence information does not exist"}
             )
+        next_cursor = encode_cursor(dog.id, sequences[limit - 1].id) if len(sequences) > limit else None
+        sequences = sequences[:limit]
 
         sequence_datas = [
             {
@@ -500,8 +363,8 @@ async def get_sequences(accessToken: str = Header(...), db: Session = Depends(ge
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
-            content={"sequenceDatas": sequence_datas},
-            headers={"accessToken": result}
+            content={"sequenceDatas": sequence_datas, "nextCursor": next_cursor},
+            headers={"accessToken": identity.accessToken}
         )
 
     except Exception as e:
@@ -511,40 +374,62 @@ async def get_sequences(accessToken: str = Header(...), db: Session = Depends(ge
             content={"errorMessage": "Server error"}
         )
 
-@router.get("/update-exercise", status_code=status.HTTP_200_OK)
-async def update_exercise_and_target(
-    accessToken: str = Header(...),
-    db: Session = Depends(get_db)
+# 시간/일 단위 건강 지표 집계 전송 (from, to : epoch 초, 기본값은 최근 24시간 / 30일)
+@router.get("/health-rollups", status_code=status.HTTP_200_OK)
+async def get_health_rollup_datas(
+    period: str = Query("hour"),
+    start: float = Query(None, alias="from"),
+    end: float = Query(None, alias="to"),
+    identity: Identity = Depends(get_dog_identity),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # 토큰 검증
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
+    if period not in ROLLUP_PERIODS:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"errorMessage": f"period must be one of {', '.join(ROLLUP_PERIODS)}"}
+        )
+    try:
+        endTime = datetime.fromtimestamp(end, timezone.utc) if end is not None else datetime.now(timezone.utc)
+        startTime = datetime.fromtimestamp(start, timezone.utc) if start is not None else endTime - ROLLUP_DEFAULT_RANGE[period]
+    except (ValueError, OverflowError, OSError):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"errorMessage": "Invalid time range"}
+        )
+    if startTime >= endTime or (endTime - startTime) / ROLLUP_PERIOD_LENGTH[period] > MAX_ROLLUP_BUCKETS:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"errorMessage": f"Time range must be positive and at most {MAX_ROLLUP_BUCKETS} {period}s"}
         )
 
     try:
-        # Access Token에서 로그인 ID 추출
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="User not found"
-            )
+        dog = identity.dog
+        # from 이 속한 구간부터 조회
+        rollups = await get_health_rollups(db, dog.id, period, bucket_start(startTime, period), endTime)
 
-        # 사용자에 해당하는 강아지 정보 조회
-        dog = get_dog_by_user(db, db_user.id)
-        if not dog:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Dog information does not exist"
-            )
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={"period": period, "rollups": [rollup_response(rollup) for rollup in rollups]},
+            headers={"accessToken": identity.accessToken}
+        )
+
+    except Exception as e:
+        logger.error(f"Error fetching health rollups: {e}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"errorMessage": "Server error"}
+        )
+
+@router.get("/update-exercise", status_code=status.HTTP_200_OK)
+async def update_exercise_and_target(
+    identity: Identity = Depends(get_dog_identity),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        dog = identity.dog
 
         # 오늘의 운동량 가져오기
-        target_exercise = get_target_exercise(db, dog.id)
+        target_exercise = await get_target_exercise(db, dog.id)
         if not target_exercise:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -559,22 +444,22 @@ async def update_exercise_and_target(
             date=datetime.utcnow(),
             exercise=returnToday
         )
-        create_exercise_log(db, excerciseData)
+        await create_exercise_log(db, excerciseData)
 
         # 오늘의 운동량 초기화
         target_exercise.today = 0
-        db.commit()
-        db.refresh(target_exercise)
+        await db.commit()
+        await db.refresh(target_exercise)
 
         # 운동량 평균 계산
-        average_exercise = get_last_days_average_exercise(db, dog.id, returnToday, returnTarget)
+        average_exercise = await get_last_days_average_exercise(db, dog.id, returnToday, returnTarget)
         # 목표 운동량 업데이트
-        update_target_exercise(db, dog.id, average_exercise)
+        await update_target_exercise(db, dog.id, average_exercise)
 
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={"target": returnTarget, "today": returnToday},
-            headers={"accessToken": result}
+            headers={"accessToken": identity.accessToken}
         )
 
     except Exception as e:
@@ -1,15 +1,15 @@
 import logging
 from datetime import datetime, timedelta
-from fastapi import APIRouter, HTTPException, Depends, Request, status, Query, Header
+from fastapi import APIRouter, HTTPException, Depends, Request, status, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, ValidationError
-from core.security import create_access_token, get_password_hash, create_refresh_token, verify_password, decode_access_token
+from core.security import create_access_token, create_refresh_token, decode_access_token, password_hasher, PasswordHashBusy
 from core.security import REFRESH_TOKEN_EXPIRE_DAYS
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from schemas import UserCreateRequest, UserCreate, RefreshTokenCreate
-from crud import create_user, crud_create_refresh_token, get_user_by_loginId, get_refresh_token_by_user, delete_refresh_token
-from routers.auth import verify_and_refresh_token
+from async_crud import create_user, crud_create_refresh_token, get_user_by_loginId, get_refresh_token_by_user, delete_refresh_token
+from routers.auth import Identity, get_identity
 
 router = APIRouter()
 
@@ -17,9 +17,17 @@ router = APIRouter()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 비밀번호 해시 대기열이 가득 찬 경우
+def password_hash_busy_response():
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"errorMessage": "Server is busy, please try again"},
+        headers={"Retry-After": "1"}
+    )
+
 # 회원가입 기능
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-async def register(request: Request, db: Session = Depends(get_db)):
+async def register(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         user_data = await request.json()
         user = UserCreateRequest(**user_data)
@@ -34,10 +42,10 @@ async def register(request: Request, db: Session = Depends(get_db)):
     try:
         user_data = UserCreate(
             loginId=user.loginId,
-            password=get_password_hash(user.password),
+            password=await password_hasher.hash(user.password),
             name=user.name,
         )
-        db_user = create_user(db, user_data)
+        db_user = await create_user(db, user_data)
         
         # 리프레시 토큰 생성 및 저장
         refresh_token_str = create_refresh_token(data={"sub": db_user.loginId})
@@ -46,7 +54,7 @@ async def register(request: Request, db: Session = Depends(get_db)):
             createdAt=datetime.utcnow(),
             expiresAt=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
         )
-        crud_create_refresh_token(db, refresh_token_data, db_user.id)
+        await crud_create_refresh_token(db, refresh_token_data, db_user.id)
         
         access_token = create_access_token(data={"sub": db_user.loginId})
         headers = {"accessToken": access_token}
@@ -55,6 +63,8 @@ async def register(request: Request, db: Session = Depends(get_db)):
             content={"message": "User created successfully"},
             headers=headers
         )
+    except PasswordHashBusy:
+        return password_hash_busy_response()
     except Exception as e:
         logger.error(f"Error occurred while creating user: {e}")
         return JSONResponse(
@@ -64,7 +74,7 @@ async def register(request: Request, db: Session = Depends(get_db)):
 
 # loginId 중복 확인 기능
 @router.get("/check-loginid", status_code=status.HTTP_200_OK)
-async def check_loginid(loginid: str = Query(...), db: Session = Depends(get_db)):
+async def check_loginid(loginid: str = Query(...), db: AsyncSession = Depends(get_async_db)):
     if not loginid.strip():
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -72,7 +82,7 @@ async def check_loginid(loginid: str = Query(...), db: Session = Depends(get_db)
         )
 
     try:
-        existing_user = get_user_by_loginId(db, loginid)
+        existing_user = await get_user_by_loginId(db, loginid)
         if existing_user:
             return JSONResponse(
                 status_code=status.HTTP_409_CONFLICT,
@@ -92,14 +102,14 @@ async def check_loginid(loginid: str = Query(...), db: Session = Depends(get_db)
 
 # 로그인 기능
 @router.post("/login", status_code=status.HTTP_200_OK)
-async def login(request: Request, db: Session = Depends(get_db)):
+async def login(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         loginData = await request.json()
         loginId = loginData.get("loginId")
         password = loginData.get("password")
 
         # 사용자가 존재하는지 확인
-        dbUser = get_user_by_loginId(db, loginId)
+        dbUser = await get_user_by_loginId(db, loginId)
         if not dbUser:
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -107,16 +117,16 @@ async def login(request: Request, db: Session = Depends(get_db)):
             )
 
         # 비밀번호 확인
-        if not verify_password(password, dbUser.password):
+        if not await password_hasher.verify(password, dbUser.password):
             return JSONResponse(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 content={"errorMessage": "Password is incorrect"}
             )
         
         # 잔여 리프레시 토큰 삭제
-        existing_refresh_token = get_refresh_token_by_user(db, dbUser.id)
+        existing_refresh_token = await get_refresh_token_by_user(db, dbUser.id)
         if existing_refresh_token:
-            delete_refresh_token(db, existing_refresh_token.id)
+            await delete_refresh_token(db, existing_refresh_token.id)
 
         accessToken = create_access_token(data={"sub": dbUser.loginId})
         refreshTokenStr = create_refresh_token(data={"sub": dbUser.loginId})
@@ -125,7 +135,7 @@ async def login(request: Request, db: Session = Depends(get_db)):
             createdAt=datetime.utcnow(),
             expiresAt=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
         )
-        crud_create_refresh_token(db, refreshTokenData, dbUser.id)
+        await crud_create_refresh_token(db, refreshTokenData, dbUser.id)
 
         headers = {"accessToken": accessToken}
         return JSONResponse(
@@ -134,6 +144,8 @@ async def login(request: Request, db: Session = Depends(get_db)):
             headers=headers
         )
 
+    except PasswordHashBusy:
+        return password_hash_busy_response()
     except Exception as e:
         logger.error(f"Error occurred while logging in: {e}")
         return JSONResponse(
@@ -143,29 +155,16 @@ async def login(request: Request, db: Session = Depends(get_db)):
 
 #유저 정보 조회 기능
 @router.get("/users/me", status_code=status.HTTP_200_OK)
-async def get_user_info(accessToken: str = Header(...), db: Session = Depends(get_db)):
-    is_valid, result = verify_and_refresh_token(db, accessToken)
-    if not is_valid:
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={"errorMessage": result}
-        )
+async def get_user_info(identity: Identity = Depends(get_identity)):
     try:
-        payload = decode_access_token(result)
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        if not db_user:
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"errorMessage": "Server error"}
-            )
+        db_user = identity.user
         return JSONResponse(
             status_code=status.HTTP_201_CREATED,
             content={
                 "loginId": db_user.loginId,
                 "name": db_user.name
             },
-            headers={"accessToken": result}
+            headers={"accessToken": identity.accessToken}
         )
     except:
         return JSONResponse(
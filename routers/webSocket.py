@@ -1,56 +1,40 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from datetime import datetime
+from pydantic import TypeAdapter
 from core.security import decode_access_token
-from database import get_db
-from routers.auth import verify_and_refresh_token
+from database import get_db, get_async_db
+from routers.auth import resolve_identity, IdentityError
 from schemas import SenseDataCreate, SequenceCreate, BcgdataCreate
-from crud import create_sense_data, get_user_by_loginId, get_dog_by_user, get_bcgdata_by_sequence, check_heart_anomaly
-from crud import create_sequence, create_bcgdata, update_today_exercise, get_sequences_asc_by_dog
+from crud import create_sense_data, create_sequence_with_bcgdata, create_sequence_with_waveform, update_today_exercise
+from async_crud import get_bcg_heart_by_sequence, get_sequences_asc_by_dog
 from models import Sequence, Bcgdata
-from aiModels.yeinOh import *
-from aiModels.dongukKim import *
-import pandas as pd
-import numpy as np
-import pickle
+from core.buffer import SensorRingBuffer
+from core.frame import decode_sensor_frame, FrameError
+from core.waveform import BCG_STORAGE, estimate_sample_rate, waveform_heart_points
+from core.latest import cache_latest_sequence
+from aiModels.executor import executor
+from aiModels.scheduler import scheduler
+import json
+import logging
 
 router = APIRouter()
 
-global sensorDataBuffer
-global bufferSize
-sensorDataBuffer = []
-bufferSize = 0
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-async def run_first_model(db, dog, websocket, input_datas, result):
-    # 필요 데이터 나누기
-    inputSequence = [list(data.values()) for data in input_datas]
-    time = [data["time"] for data in input_datas]
-    bcg = np.array([data["bcg"] for data in input_datas])
-    
-    # 모델 로직 - 동욱님 코드
-    model_filename = 'aiModels/kmeans_model_newfinal.pkl'
-    _, _, cluster, excerciseNum = process_data(inputSequence, model_filename, dog.weight)
-    excerciseNum = float(excerciseNum/2) # 운동 값 절반 적용
+# 측정 시간(문자열/epoch)을 datetime 으로 한 번에 변환
+measureTimeAdapter = TypeAdapter(List[datetime])
+
+# 분석 결과를 DB에 저장 (스레드풀에서 실행)
+def save_analysis_result(db, dog, cluster, excerciseNum, anomalies_detected, bpm_h, bpm_r, combined_matrix_for_s):
     update_today_exercise(db, dog.id, excerciseNum)
-    run_model = (cluster == 0 or cluster == 1)
 
-    # 모델 함수 (수면 중일 때 이상치 탐지) - 예인님 코드
-    anomalies_detected = False
-    if run_model:
-        bpm_h, bpm_r, combined_matrix_for_s, time_instance, spec_instance = preprocess_data(time, bcg, run_model=True)
-        model_path = "aiModels/TSRNet-63.pt"
-        threshold = 0.05
-        anomalies_detected, _ = TSRNET(model_path, time_instance, spec_instance, threshold)
-    else: 
-        # bpm_h = 심박수, bpm_r = 호흡수
-        # combined_matrix_for_s = (time, filtered_hr, filtered_rp) = (시간, 심박, 호흡)
-        bpm_h, bpm_r, combined_matrix_for_s, _, _ = preprocess_data(time, bcg)
-    
-    bpm_h = int(bpm_h)
-    bpm_r = int(bpm_r)
-    combined_matrix_for_s = combined_matrix_for_s[140:420]
-    
     # 시퀀스 데이터 생성
     sqCreate = SequenceCreate(
         dogId = dog.id,
@@ -62,19 +46,54 @@ async def run_first_model(db, dog, websocket, input_datas, result):
         heartRate = bpm_h,
         respirationRate = bpm_r
     )
-    sequenceData = create_sequence(db, sqCreate)
+
+    # bcg 데이터 생성 (시퀀스와 함께 한 번에 저장)
+    measureTimes = measureTimeAdapter.validate_python(list(combined_matrix_for_s[:, 0]))
+    hearts = combined_matrix_for_s[:, 1].astype(float)
+    respirations = combined_matrix_for_s[:, 2].astype(float)
+    if BCG_STORAGE == "waveform":
+        # 시퀀스마다 float32 배열 한 행으로 저장 (core.waveform)
+        sampleRate = estimate_sample_rate(measureTimes)
+        sequenceData = create_sequence_with_waveform(db, sqCreate, measureTimes[0], sampleRate, hearts, respirations)
+        return sequenceData, waveform_heart_points(measureTimes[0], sampleRate, hearts.astype("<f4"))
+
+    bcgdatas = [
+        {"measureTime": measureTime, "heart": heart, "respiration": respiration}
+        for measureTime, heart, respiration in zip(measureTimes, hearts.tolist(), respirations.tolist())
+    ]
+    sequenceData = create_sequence_with_bcgdata(db, sqCreate, bcgdatas)
+
+    bcgHeart = [{"time": bcgdata["measureTime"].timestamp(), "heart": bcgdata["heart"]} for bcgdata in bcgdatas]
+    return sequenceData, bcgHeart
+
+async def run_first_model(db, dog, websocket, window, result, activityStats=None):
+    # 필요 데이터 나누기 (window: 채널별 560 샘플 view)
+    inputSequence = {("timestamp" if name == "time" else name): values for name, values in window.items()}
+    time = window["time"]
+    bcg = window["bcg"]
+    
+    # 모델 실행 (이벤트 루프를 막지 않도록 워커 풀에서 실행)
+    # bpm_h = 심박수, bpm_r = 호흡수
+    # combined_matrix_for_s = (time, filtered_hr, filtered_rp) = (시간, 심박, 호흡)
+    cluster, excerciseNum, bpm_h, bpm_r, combined_matrix_for_s, time_instance, spec_instance, activityStats = await executor.analyze(
+        inputSequence, time, bcg, dog.weight, activityStats
+    )
+    excerciseNum = float(excerciseNum/2) # 운동 값 절반 적용
+
+    # 수면 중일 때 이상치 탐지 (다른 기기의 요청과 묶어 배치로 실행)
+    anomalies_detected = False
+    if time_instance is not None:
+        anomalies_detected, _ = await scheduler.detect(time_instance, spec_instance)
     
-    bcgHeart = []
-    # bcg 데이터 생성
-    for data in combined_matrix_for_s:
-        bcgObject = BcgdataCreate(
-            sequenceId = sequenceData.id,
-            measureTime = data[0],
-            heart = float(data[1]),
-            respiration = float(data[2])
-        )
-        bcgHeart.append({"time": bcgObject.measureTime.timestamp(), "heart": float(data[1])})
-        create_bcgdata(db, bcgObject)
+    bpm_h = int(bpm_h)
+    bpm_r = int(bpm_r)
+    combined_matrix_for_s = combined_matrix_for_s[140:420]
+    
+    sequenceData, bcgHeart = await run_in_threadpool(
+        save_analysis_result, db, dog, cluster, excerciseNum, anomalies_detected, bpm_h, bpm_r, combined_matrix_for_s
+    )
+    # /hearts 폴링이 DB 에서 파형을 다시 읽지 않도록 최신 시퀀스 캐시 갱신
+    cache_latest_sequence(dog.id, sequenceData.id, sequenceData.intentsity, bcgHeart)
 
     # sequence 데이터와 bcg 데이터를 클라이언트로 전송
     await websocket.send_json({"heartRate": sequenceData.heartRate,
@@ -84,7 +103,7 @@ async def run_first_model(db, dog, websocket, input_datas, result):
                                "intentsity":sequenceData.intentsity,
                                "accessToken": result
                               })
-    return
+    return activityStats
 
 # 센서 데이터를 데이터베이스에 저장
 async def upload_sense_data(db, dog_id, sense_data_list):
@@ -103,31 +122,33 @@ async def upload_sense_data(db, dog_id, sense_data_list):
         create_sense_data(db, sensor_data_obj, dog_id)
 
 @router.websocket("/wsbt")
-async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)):
-    global sensorDataBuffer
-    global bufferSize
+async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db), asyncDb: AsyncSession = Depends(get_async_db)):
     await websocket.accept()
+    # 연결마다 독립된 센서 버퍼와 활동 특성 누적기 사용
+    sensorBuffer = SensorRingBuffer()
+    # 분석 모듈은 필요할 때만 import (REST 전용 서버의 시작 시간 단축)
+    from aiModels.dongukKim import RunningImuStats
+    activityStats = RunningImuStats(window_size=sensorBuffer.window_size, hop_size=sensorBuffer.hop_size)
     
     try:
         # 첫 번째 메시지에서 액세스 토큰을 수신
         data = await websocket.receive_json()
         accessToken = data.get("accessToken")
 
-        # 토큰 검증
-        is_valid, result = verify_and_refresh_token(db, accessToken)
-        if not is_valid:
-            await websocket.send_json({"auth_success": False, "message": "Authentication fail", "accessToken": result})
+        # 토큰 검증 및 사용자/강아지 정보 조회 (routers.auth.resolve_identity)
+        # 연결 동안 같은 강아지 정보(weight 등)를 사용하므로 다른 프로세스의 변경이 반영되도록 캐시 없이 조회
+        try:
+            identity = await resolve_identity(asyncDb, accessToken, fresh=True)
+        except IdentityError as e:
+            await websocket.send_json({"auth_success": False, "message": "Authentication fail", "accessToken": e.errorMessage})
             await websocket.close()
             return
-        else:
-            await websocket.send_json({"auth_success": True, "message": "Authentication success", "accessToken": result})
+        result = identity.accessToken
+        dog = identity.dog
+        # 조회가 끝나면 비동기 세션의 연결을 풀에 반환 (이후 저장은 동기 세션을 스레드풀에서 사용)
+        await asyncDb.close()
+        await websocket.send_json({"auth_success": True, "message": "Authentication success", "accessToken": result})
 
-        payload = decode_access_token(result)
-        
-        # 사용자 정보에서 강아지 정보 조회
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        dog = get_dog_by_user(db, db_user.id)
         if not dog:
             await websocket.send_json({"auth_success": False, "message": "Dog information does not exist", "accessToken": result})
             await websocket.close()
@@ -135,30 +156,44 @@ async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)
         
         # 인증 후 수신된 데이터 처리
         while True:
-            data = await websocket.receive_json()
-            sensor_data_list = data.get("senserData")
-
-            if not sensor_data_list:
-                continue
-            #await upload_sense_data(db, dog.id, sensor_data_list)
-            sensorDataBuffer.extend(sensor_data_list)
-            bufferSize += len(sensor_data_list)
-            if bufferSize >= 560:
-                modelInputDatas = sensorDataBuffer[:560]
-
-                # 모델 실행
-                await run_first_model(db, dog, websocket, modelInputDatas, result)
-
-                # 데이터 버퍼 갱신
-                sensorDataBuffer = sensorDataBuffer[280:]
-                bufferSize -= 280
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            # 바이너리 프레임(core.frame) 또는 JSON(senserData) 수신
+            if message.get("bytes") is not None:
+                try:
+                    sensor_data = decode_sensor_frame(message["bytes"])
+                except FrameError as e:
+                    logger.warning(f"Invalid sensor frame: {e}")
+                    continue
+                sampleCount = len(sensor_data["time"])
+                push = sensorBuffer.push_columns
+            else:
+                data = json.loads(message["text"])
+                sensor_data = data.get("senserData")
+                if not sensor_data:
+                    continue
+                #await upload_sense_data(db, dog.id, sensor_data)
+                sampleCount = len(sensor_data)
+                push = sensorBuffer.push
+
+            written = 0
+            while written < sampleCount:
+                written += push(sensor_data, written)
+                while sensorBuffer.ready():
+                    # 모델 실행
+                    activityStats = await run_first_model(db, dog, websocket, sensorBuffer.window(), result, activityStats)
+
+                    # 데이터 버퍼 갱신
+                    sensorBuffer.advance()
 
     except WebSocketDisconnect:
         print("Client disconnected")
 
 # 시연용 웹소켓 : 자동으로 DB에 있는 데이터를 전송
 @router.websocket("/test-wsbt")
-async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)):
+async def websocket_endpoint(websocket: WebSocket, db: AsyncSession = Depends(get_async_db)):
     await websocket.accept()
     
     try:
@@ -166,27 +201,23 @@ async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)
         data = await websocket.receive_json()
         accessToken = data.get("accessToken")
 
-        # 토큰 검증
-        is_valid, result = verify_and_refresh_token(db, accessToken)
-        if not is_valid:
-            await websocket.send_json({"auth_success": False, "message": "Authentication fail", "accessToken": result})
+        # 토큰 검증 및 사용자/강아지 정보 조회 (routers.auth.resolve_identity, 캐시 없이 조회)
+        try:
+            identity = await resolve_identity(db, accessToken, fresh=True)
+        except IdentityError as e:
+            await websocket.send_json({"auth_success": False, "message": "Authentication fail", "accessToken": e.errorMessage})
             await websocket.close()
             return
-        else:
-            await websocket.send_json({"auth_success": True, "message": "Authentication success", "accessToken": result})
+        result = identity.accessToken
+        dog = identity.dog
+        await websocket.send_json({"auth_success": True, "message": "Authentication success", "accessToken": result})
 
-        payload = decode_access_token(result)
-        
-        # 사용자 정보에서 강아지 정보 조회
-        loginId = payload.get("sub")
-        db_user = get_user_by_loginId(db, loginId)
-        dog = get_dog_by_user(db, db_user.id)
         if not dog:
             await websocket.send_json({"auth_success": False, "message": "Dog information does not exist", "accessToken": result})
             await websocket.close()
             return
         
-        dogSequences = get_sequences_asc_by_dog(db, dog.id)
+        dogSequences = await get_sequences_asc_by_dog(db, dog.id)
         i = 0
         testLen = 0
         # 인증 후 수신된 데이터 처리
@@ -198,7 +229,7 @@ async def websocket_endpoint(websocket: WebSocket, db: Session = Depends(get_db)
             testLen += len(testInput)
             if testLen >= 560:
                 sequenceData = dogSequences[i]
-                bcgHeart = [{"time":bcg.measureTime.timestamp(), "heart":bcg.heart} for bcg in get_bcgdata_by_sequence(db, sequenceData.id)]
+                bcgHeart = await get_bcg_heart_by_sequence(db, sequenceData)
                 await websocket.send_json({"heartRate": sequenceData.heartRate,
                                 "respirationRate":sequenceData.respirationRate,
                                 "heartAnomoly":False,